@@ -1,21 +1,42 @@
-# 🧑‍🏫 (봇 2) '전문가' 봇(LLM). 100% '자동' 정답 생성 -> feedback_data.csv
-# (v2.1 - 로그 중복 제거)
+# 🧑‍🏫 (봇 2) '전문가' 봇(LLM). 100% '자동' 정답 생성 -> pii_guardian.db (status='labeled')
+# (v2.7 - CSV In/Outbox -> SQLite 저장소, 동시 라벨링 + 토큰 버킷 속도 제한, LLM 판단 캐시, 다건 배치 판단, 규칙 기반 Triage,
+#         실행 단위 점유 + 묶음 커밋 + 이어서 처리, 불확실성 우선순위 + 실행당 예산)
 # ----------------------------------------------------
-# (✨ 최종 로직: In/Outbox)
-# 1. '의심' 목록 (detected_leaks.csv) [In_1]을 읽습니다.
+# (✨ 최종 로직: 저장소 상태 전환)
+# 1. 저장소에서 '의심' 목록 (status='pending')을 읽습니다. (필요한 열만)
+#    (✨ v2.7) 이번 실행(run_id)으로 점유(claim)한 행만 읽고, 그 행에만 라벨을 기록합니다.
+#              비정상 종료된 이전 실행이 점유했던 행은 heartbeat가 끊긴 뒤 다음 실행이 이어받습니다.
 # 2. "모든" 항목을 LLM에게 물어봅니다. (crawler.py가 이미 걸러줬기 때문)
-# 3. '정답' 목록 (feedback_data.csv) [In_2]에 '추가'합니다.
-# 4. 작업 완료 후 '의심' 목록 (detected_leaks.csv) [In_1]을 "삭제"합니다.
+#    (✨ v2.6) 단, Luhn/주민번호 검증 실패, 샘플 도메인, 대표번호 등 뻔한 항목은 triage.py 규칙으로 먼저 판정합니다.
+#    (✨ v2.3) 여러 건을 동시에 요청하고, 분당 요청/토큰 한도는 label_scheduler가 지킵니다. (time.sleep(1) 제거)
+#    (02:00 train.py 시작 전에 끝나도록 마감 시각이 지나면 남은 항목은 다음 실행으로 넘깁니다.)
+#    (✨ v2.4) 같은 PII + 같은 문맥은 LLM 판단 캐시(verdict_cache)에서 꺼내고, 한 번만 물어봅니다.
+#    (✨ v2.5) 여러 항목을 요청 1건으로 묶어 묻고(토큰 예산에 맞춰 배치 크기 결정),
+#              답변에서 빠지거나 형식이 틀린 항목만 단건으로 다시 묻습니다.
+#    (✨ v2.8) 순서: 불확실한(NER 확신도 낮은) 항목 + 새로운 유형 먼저, 이미 라벨링한 것과 거의 같은 항목은 맨 뒤.
+#              실행당 LLM 요청/토큰 예산(LABEL_MAX_LLM_REQUESTS / LABEL_MAX_LLM_TOKENS)을 다 쓰면 나머지는 다음 실행으로.
+# 3. '정답'을 기록하고 해당 행을 'labeled'로 옮깁니다.
+#    (✨ v2.7) 끝에 한 번이 아니라 LABEL_COMMIT_ROWS건마다 (라벨 + 캐시 + 진행 기록)을 한 트랜잭션으로 커밋합니다.
+#              (중간에 죽어도 이미 돈을 낸 LLM 판단은 남고, 같은 판단을 두 번 사지 않습니다.)
+# 4. (✨ 수정) 파일 삭제 없음: 작업 도중 crawler가 추가한 행은 'pending'으로 남아 다음 실행에서 처리됩니다.
 # ----------------------------------------------------
 
-import pandas as pd
 import os
+import datetime
 import llm_helper # (우리의 LLM 헬퍼 로드)
 import time
 import logging # (✨ 수정) logging 모듈 임포트
+import config
+from leak_store import LeakStore, LEAK_STORE_FILE, CLAIM_STALE_MINUTES
+from http_helper import get_client
+from triage import triage_rows
+from verdict_cache import VerdictCache, VERDICT_CACHE_TTL_DAYS, VERDICT_CACHE_MAX_ENTRIES
+from label_scheduler import (label_concurrently, LLMRateLimiter, RunBudget, prioritize, near_duplicate_signature,
+                             LLM_MAX_WORKERS, LLM_REQUESTS_PER_MIN, LLM_TOKENS_PER_MIN,
+                             LABEL_MAX_LLM_REQUESTS, LABEL_MAX_LLM_TOKENS)
 
 # (✨ 수정) 로깅 설정 (대시보드에서 볼 수 있도록 파일에도 저장)
-BASE_PATH = "/root/PII-Guardian" 
+BASE_PATH = "/root/PII-Guardian"
 LOG_FILE = os.path.join(BASE_PATH, 'autolabeler.log')
 
 # (✨✨✨ 핵심 수정: 로그 중복 제거 ✨✨✨)
@@ -24,78 +45,216 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.StreamHandler()])
 
-# (✨ 경로 수정) BASE_PATH 기준으로 경로 재설정
-DETECTED_FILE = os.path.join(BASE_PATH, 'detected_leaks.csv')
-FEEDBACK_FILE = os.path.join(BASE_PATH, 'feedback_data.csv')
+# LLM 판단에 필요한 열만 읽습니다.
+PENDING_COLUMNS = ['id', 'type', 'content', 'context', 'url', 'source', 'ner_score']
+
+# (✨ v2.3) 01:00에 시작해 02:00 train.py 전에 끝나도록 하는 작업 시간 한도(분)
+LABEL_DEADLINE_MINUTES = 55
+
+# (✨ v2.7) 이 건수마다 (라벨 + 캐시 + 진행 기록)을 커밋합니다. (비정상 종료 시 잃는 LLM 판단은 최대 이만큼)
+LABEL_COMMIT_ROWS = 200
+
+# (✨ v2.8) 우선순위 계산 때 비교할 "최근 라벨링한 행" 수 (이와 거의 같은 항목은 맨 뒤로)
+LABELED_SIGNATURE_WINDOW = 20000
+
+def judge(row):
+    logging.info(f"🧠 LLM(HyperCLOVA)에게 판단 요청: {row.content}")
+    return llm_helper.get_llm_judgment(row.context, row.content)
+
+def judge_batch(batch_rows):
+    logging.info(f"🧠 LLM(HyperCLOVA)에게 {len(batch_rows)}건 묶음 판단 요청")
+    return llm_helper.get_llm_judgments_batch([(row.context, row.content) for row in batch_rows])
+
+def ask_llm(rows, max_workers, limiter, deadline, budget=None):
+    """
+    (✨ v2.5) rows를 LLM에게 묻고 (rows와 같은 순서의 판단 목록, LLM 요청 수)를 반환합니다.
+    1) 토큰 예산에 맞춰 배치로 묶어 동시에 요청
+    2) 배치 답변에서 빠지거나 형식이 틀린 항목만 단건으로 다시 요청
+    (마감 시각이 지나거나 예산(budget)을 다 써서 묻지 못한 항목은 None)
+    """
+    answers = [None] * len(rows)
+    retry = list(range(len(rows))) # 단건으로 물을 항목
+    requests_made = 0
+
+    max_items = getattr(config, 'LLM_BATCH_MAX_ITEMS', llm_helper.LLM_BATCH_MAX_ITEMS)
+    if max_items > 1 and len(rows) > 1:
+        batches = llm_helper.plan_batches(
+            [(row.context, row.content) for row in rows], max_items=max_items,
+            max_output_tokens=getattr(config, 'LLM_MAX_OUTPUT_TOKENS', llm_helper.LLM_MAX_OUTPUT_TOKENS),
+            context_tokens=getattr(config, 'LLM_CONTEXT_TOKENS', llm_helper.LLM_CONTEXT_TOKENS))
+        batch_rows = [[rows[index] for index in batch] for batch in batches]
+        batch_results = label_concurrently(
+            batch_rows, judge_batch,
+            estimate_tokens=lambda items: llm_helper.estimate_batch_tokens([(r.context, r.content) for r in items]),
+            max_workers=max_workers, limiter=limiter, deadline=deadline, budget=budget)
+        retry = []
+        for batch, result in zip(batches, batch_results):
+            if result is None:
+                continue # (마감 시각 초과 / 예산 소진)
+            requests_made += 1
+            if not isinstance(result, list): # (429 재시도 실패 등 -> 배치 전체를 단건으로)
+                result = [None] * len(batch)
+            for index, verdict in zip(batch, result):
+                if verdict is None:
+                    retry.append(index)
+                else:
+                    answers[index] = verdict
+        logging.info(f"📦 배치 {len(batches)}건(평균 {len(rows) / max(len(batches), 1):.1f}항목)으로 요청, "
+                     f"단건 재요청 {len(retry)}건")
+
+    single_results = label_concurrently(
+        [rows[index] for index in retry], judge,
+        estimate_tokens=lambda row: llm_helper.estimate_tokens(row.context, row.content),
+        max_workers=max_workers, limiter=limiter, deadline=deadline, budget=budget)
+    for index, verdict in zip(retry, single_results):
+        if verdict is not None:
+            requests_made += 1
+            answers[index] = verdict
+    return answers, requests_made
+
+def new_run_id():
+    return f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
 
 def main():
     logging.info("🤖 2. '전문가' 봇(AutoLabeler) 작동 시작...")
-    
-    # 1. '의심' 목록(In_1) 파일이 있는지 확인
-    if not os.path.exists(DETECTED_FILE):
-        logging.info("✅ '의심' 목록(In_1)이 없습니다. 작업을 종료합니다.")
-        return
 
-    # 2. '의심' 목록 로드
+    # 1. (✨ v2.7) 이번 실행(run_id)으로 '의심' 목록(pending)을 점유하고 로드
+    run_id = new_run_id()
+    store = None
     try:
-        detected_df = pd.read_csv(DETECTED_FILE)
-        if detected_df.empty:
-            logging.info("✅ '의심' 목록(In_1)이 비어있습니다. 작업을 종료합니다.")
-            os.remove(DETECTED_FILE)
-            logging.info(f"🗑️ 비어있는 {DETECTED_FILE} 파일을 정리했습니다.")
-            return
-            
-    except pd.errors.EmptyDataError:
-        logging.info("✅ '의심' 목록(In_1)이 비어있습니다. 작업을 종료합니다.")
-        os.remove(DETECTED_FILE)
-        logging.info(f"🗑️ 비어있는 {DETECTED_FILE} 파일을 정리했습니다.")
-        return
+        store = LeakStore(LEAK_STORE_FILE)
+        for aborted in store.start_run(run_id, getattr(config, 'CLAIM_STALE_MINUTES', CLAIM_STALE_MINUTES)):
+            logging.warning(f"♻️ 중단된 실행 {aborted['run_id']}(라벨 {aborted['labeled']}건 기록, 기록한 최대 id "
+                            f"{aborted['cursor_id']})의 남은 항목을 이어서 처리합니다.")
+        store.claim_pending(run_id)
+        store.commit()
+        detected_df = store.claimed_leaks(run_id, columns=PENDING_COLUMNS)
     except Exception as e:
-        logging.error(f"❌ {DETECTED_FILE} 로드 중 에러: {e}. 작업을 중단합니다.")
+        logging.error(f"❌ {LEAK_STORE_FILE} 로드 중 에러: {e}. 작업을 중단합니다.")
+        if store is not None:
+            store.conn.close()
         return
-        
-    logging.info(f"총 {len(detected_df)}개의 새로운 '의심' 항목을 처리합니다...")
-    new_feedbacks = []
-
-    # 3. '의심' 목록을 "전부" 처리
-    for index, row in detected_df.iterrows():
-        logging.info(f"🧠 LLM(HyperCLOVA)에게 판단 요청: {row['content']}")
-        
-        try:
-            result = llm_helper.get_llm_judgment(row['context'], row['content'])
-            
-            feedback = row.to_dict()
-            feedback['llm_label'] = result.get('label', '오류') # "유출" or "공개"
-            feedback['llm_reason'] = result.get('reason', 'N/A')
-            new_feedbacks.append(feedback)
-            
-            time.sleep(1) 
-            
-        except Exception as e:
-            logging.error(f"❌ LLM 처리 중 에러: {e}")
-            new_feedbacks.append({**row.to_dict(), 'llm_label': '오류', 'llm_reason': str(e)})
-
-    # 4. 새로운 '정답'들을 '정답' 목록(In_2)에 '추가'
-    if new_feedbacks:
-        logging.info(f"✅ {len(new_feedbacks)}개의 '정답'을 생성했습니다. {FEEDBACK_FILE}(In_2)에 추가합니다.")
-        new_feedback_df = pd.DataFrame(new_feedbacks)
-        
-        new_feedback_df.to_csv(FEEDBACK_FILE, 
-                               mode='a', 
-                               header=not os.path.exists(FEEDBACK_FILE), 
-                               index=False, 
-                               encoding='utf-8-sig')
-    else:
-        logging.warning("⚠️ 처리할 항목이 있었으나, '정답'이 생성되지 않았습니다.")
 
-    # 5. (✨ 핵심) 작업 완료 후 '의심' 목록(In_1)을 "삭제" (In/Outbox)
-    try:
-        os.remove(DETECTED_FILE)
-        logging.info(f"🗑️ 작업 완료. {DETECTED_FILE}(In_1)을 삭제했습니다.")
-    except Exception as e:
-        logging.error(f"❌ {DETECTED_FILE} 삭제 중 에러: {e}")
+    with store:
+        try:
+            run_status = label_claimed(store, run_id, detected_df)
+        except BaseException:
+            store.conn.rollback() # (진행 중이던 묶음만 버림)
+            store.finish_run(run_id, 'failed') # (이미 커밋한 묶음은 그대로 남음)
+            store.commit()
+            raise
+        released = store.finish_run(run_id, run_status)
+    if released:
+        logging.warning(f"⚠️ 마감 시각 초과, 예산 소진 또는 API 차단으로 {released}건은 다음 실행으로 넘깁니다. (status='pending' 유지)")
 
+    get_client().log_metrics() # (API 요청/에러/재시도/지연 시간)
     logging.info("🤖 2. '전문가' 봇(AutoLabeler) 작동 완료.")
 
+def label_claimed(store, run_id, detected_df):
+    """
+    (✨ v2.7) 점유한 행을 LABEL_COMMIT_ROWS건씩 판단하고, 묶음마다 (라벨 + 캐시 + 진행 기록)을 한 트랜잭션으로 커밋합니다.
+    (중간에 죽어도 커밋한 묶음의 유료 LLM 판단은 남고, 다음 실행이 나머지를 이어받습니다.) 반환: 실행 상태
+    """
+    if detected_df.empty:
+        logging.info("✅ '의심' 목록(pending)이 비어있습니다. 작업을 종료합니다.")
+        return 'done'
+
+    logging.info(f"총 {len(detected_df)}개의 새로운 '의심' 항목을 처리합니다... (실행 {run_id})")
+    rows = list(detected_df.itertuples(index=False))
+
+    # 2. '의심' 목록을 "전부" 동시에 처리 (결과는 rows와 같은 순서)
+    max_workers = getattr(config, 'LLM_MAX_WORKERS', LLM_MAX_WORKERS)
+    limiter = LLMRateLimiter(getattr(config, 'LLM_REQUESTS_PER_MIN', LLM_REQUESTS_PER_MIN),
+                             getattr(config, 'LLM_TOKENS_PER_MIN', LLM_TOKENS_PER_MIN))
+    deadline_minutes = getattr(config, 'LABEL_DEADLINE_MINUTES', LABEL_DEADLINE_MINUTES)
+    deadline = time.time() + deadline_minutes * 60
+    commit_rows = getattr(config, 'LABEL_COMMIT_ROWS', LABEL_COMMIT_ROWS)
+    budget = RunBudget(getattr(config, 'LABEL_MAX_LLM_REQUESTS', LABEL_MAX_LLM_REQUESTS),
+                       getattr(config, 'LABEL_MAX_LLM_TOKENS', LABEL_MAX_LLM_TOKENS))
+    logging.info(f"🚦 동시 {max_workers}개, 분당 {limiter.requests_per_min}건 / {limiter.tokens_per_min:,}토큰 한도, "
+                 f"{commit_rows}건마다 커밋, 실행 예산 요청 {budget.max_requests or '무제한'} / "
+                 f"토큰 {budget.max_tokens or '무제한'}")
+
+    # (✨ v2.6) 규칙 기반 Triage: 확실한 항목은 LLM 없이 바로 판정 (✨ v2.7 바로 기록)
+    triage_verdicts, triage_stats = triage_rows(rows)
+    for line in triage_stats.report_lines():
+        logging.info(line)
+    saved = store.save_labels([(row.id, triaged['label'], triaged['reason'])
+                               for row, triaged in zip(rows, triage_verdicts) if triaged is not None], run_id)
+    store.update_run(run_id, labeled=saved)
+    store.commit()
+    rows = [row for row, triaged in zip(rows, triage_verdicts) if triaged is None]
+
+    # (✨ v2.8) 우선순위: 불확실 + 새로운 항목 먼저, 최근 라벨링한 항목과 거의 같은 항목은 맨 뒤 (예산이 모자랄 때 대비)
+    recent = store.labeled_leaks(columns=['type', 'content', 'context'], newest_first=True,
+                                 limit=getattr(config, 'LABELED_SIGNATURE_WINDOW', LABELED_SIGNATURE_WINDOW))
+    labeled_signatures = {near_duplicate_signature(*values) for values in recent.itertuples(index=False)}
+    rows = prioritize(rows, labeled_signatures)
+    logging.info(f"🎯 LLM 대상 {len(rows)}건을 우선순위 순으로 처리합니다. (최근 라벨 서명 {len(labeled_signatures)}개와 비교)")
+
+    # (✨ v2.4) 캐시: 라벨과 같은 연결/트랜잭션을 씁니다. (같은 키는 한 번만 조회/요청)
+    # (배치 판단은 BATCH_SYSTEM_PROMPT(= SYSTEM_PROMPT + BATCH_INSTRUCTIONS)로 받으므로 둘 다 버전에 반영)
+    cache = VerdictCache(system_prompt=llm_helper.BATCH_SYSTEM_PROMPT, conn=store.conn,
+                         ttl_days=getattr(config, 'VERDICT_CACHE_TTL_DAYS', VERDICT_CACHE_TTL_DAYS),
+                         max_entries=getattr(config, 'VERDICT_CACHE_MAX_ENTRIES', VERDICT_CACHE_MAX_ENTRIES))
+    store.commit()
+
+    started = time.time()
+    labeled, requests_made = saved, 0
+    max_written_id = None
+    for chunk_start in range(0, len(rows), commit_rows):
+        if time.time() >= deadline:
+            break
+        chunk = rows[chunk_start:chunk_start + commit_rows]
+        keys = [cache.make_key(row.content, row.context) for row in chunk]
+        verdicts = {}     # key -> {'label', 'reason'}
+        to_ask = {}       # key -> 대표 row (캐시에 없는 키)
+        for key, row in zip(keys, chunk):
+            if key in verdicts or key in to_ask:
+                continue
+            cached = cache.get(key)
+            if cached is not None:
+                verdicts[key] = cached
+            else:
+                to_ask[key] = row
+        store.commit() # (LLM 호출 동안 저장소 쓰기 잠금을 잡고 있지 않도록)
+
+        ask_keys = list(to_ask)
+        answers, chunk_requests = ask_llm([to_ask[key] for key in ask_keys], max_workers, limiter, deadline, budget)
+        for key, answer in zip(ask_keys, answers):
+            if answer is not None:
+                verdicts[key] = answer
+                cache.put(key, answer) # ('오류'는 저장하지 않음)
+
+        new_labels = [] # (id, llm_label, llm_reason)
+        for key, row in zip(keys, chunk):
+            result = verdicts.get(key)
+            if result is None:
+                continue # (마감 시각 초과 / API 차단 -> 'pending' 그대로, 다음 실행에서 처리)
+            new_labels.append((row.id, result.get('label', '오류'), result.get('reason', 'N/A'))) # "유출" or "공개"
+
+        # 3. 이번 묶음의 '정답' + 캐시 + 진행 기록을 한 번에 커밋 (pending -> labeled)
+        chunk_saved = store.save_labels(new_labels, run_id)
+        # (우선순위 순서로 처리하므로 "마지막 행"이 아니라 지금까지 기록한 가장 큰 id를 남김)
+        if new_labels:
+            max_written_id = max(max_written_id or 0, max(label[0] for label in new_labels))
+        store.update_run(run_id, labeled=chunk_saved, llm_requests=chunk_requests, cursor_id=max_written_id)
+        store.commit()
+        labeled += chunk_saved
+        requests_made += chunk_requests
+        logging.info(f"💾 {labeled}/{len(detected_df)}건 기록 (기록한 최대 id {max_written_id}, LLM 요청 누적 {requests_made}건)")
+
+    cache.evict()
+    elapsed = time.time() - started
+    logging.info(f"🗃️ LLM 판단 캐시: 적중 {cache.hits}건 / 실패 {cache.misses}건")
+    logging.info(f"⏱️ {labeled}건 판단 완료: {elapsed:.1f}초 ({labeled / max(elapsed, 1e-9):.2f}건/초, "
+                 f"LLM 요청 {requests_made}건, 429 감속 {limiter.rate_limited_count}회)")
+    if budget.exhausted:
+        logging.warning(f"💸 실행 예산 소진 (요청 {budget.requests}건 / 추정 토큰 {budget.tokens:,}) -> "
+                        f"남은 항목은 다음 실행에서 우선순위 순으로 이어서 처리합니다.")
+    if labeled == 0:
+        logging.warning("⚠️ 처리할 항목이 있었으나, '정답'이 생성되지 않았습니다.")
+    return 'done' if labeled == len(detected_df) else 'partial'
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
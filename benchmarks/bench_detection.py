@@ -0,0 +1,293 @@
+# ⏱️ (벤치마크) 탐지 정확도 + 처리량 - '가상 은행' 생성기의 정답으로 crawler 탐지(정규식 + NER)를 채점
+# ----------------------------------------------------
+# seed 고정 페이지를 generate_labeled_test_data로 만들고(페이지 + 정답), crawler.submit_page/drain_ner_queue
+# (실제 crawler와 같은 경로: 조각 추출 -> 정규식 -> 조각 묶음 NER 배치)로 탐지합니다.
+# 1. 채점 (정답 = 생성기가 페이지에 넣은 문자열 / 페이지 안에서 값 단위로 중복 제거)
+#    - "맞힘"(공백 무시): 탐지 content가 정답 값 안에 있고 MIN_MATCH_CHARS자 이상 또는 값의 MIN_MATCH_SHARE 이상이거나,
+#      정답 값을 감싸되 MAX_EXTRA_CHARS자 이하만 더 긴 경우
+#      (토큰 1~2개짜리 조각이나, 여러 줄을 한꺼번에 덮는 긴 NER 개체가 정답을 맞힌 것으로 세지 않도록)
+#    - 종류별 재현율: PII 종류(생성기 -> GENERATOR_TYPES)마다 찾은 값 / 전체 값 (정규식 / AI 출처별로도)
+#    - 종류별 정밀도: 탐지 종류마다 유출 값에 맞은 탐지 / 전체 탐지 (나머지는 함정 오탐 / 기타 오탐)
+#    - 함정(safe 생성기)별 오탐률: 탐지가 걸린 함정 값 / 전체 함정 값
+# 2. 처리량: pages/sec, ms per MB(HTML), 최대 RSS(MB), 모델 로드 시간
+# 3. --out으로 JSON 저장, --baseline으로 이전 결과와 비교해 허용 폭보다 나빠지면 종료 코드 1 (CI에서 차단)
+#
+# 실행: python3 benchmarks/bench_detection.py --pages 20 --out detection.json  (--no-ner: 정규식만)
+#       python3 benchmarks/bench_detection.py --pages 20 --baseline detection.json  (회귀 검사)
+#       학생 뇌(distill.py) 비교: teacher로 --out teacher.json 저장 후
+#       --model /root/PII-Guardian/my-ner-student [--second-pass-score 0.9] --baseline teacher.json
+#       (기준 대비 처리량 배수 + 재현율 하락 출력, --second-pass-score: 낮은 확신도 개체만 --second-pass-model로 다시 판단)
+# ----------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test_site'))
+
+import crawler # noqa: E402
+from ner_helper import apply_backend, CascadeNER, NER_BACKENDS # noqa: E402
+from model_registry import load_model # noqa: E402
+
+# 생성기 -> 정답 PII 종류 (REGEX_PATTERNS 이름과 맞춤, 정규식이 없는 종류는 NER 몫)
+GENERATOR_TYPES = {
+    'get_pii_phone': 'PHONE', 'get_pii_ssn': 'RRN', 'get_pii_alien_ssn': 'RRN', 'get_pii_email': 'EMAIL',
+    'get_pii_card': 'CREDIT_CARD', 'get_pii_account': 'ACCOUNT_NUM', 'get_pii_address': 'ADDRESS',
+    'get_pii_split_hard': 'ADDRESS', 'get_pii_passport': 'PASSPORT', 'get_pii_driver_license': 'DRIVER_LICENSE',
+    'get_pii_base64_hard': 'ENCODED', 'get_pii_url_encoded': 'ENCODED',
+    'get_pii_leetspeak': 'OBFUSCATED', 'get_pii_homoglyph_hard': 'OBFUSCATED', 'get_pii_in_structure': 'STRUCTURED',
+}
+
+# 회귀 판정 허용 폭 (--baseline)
+MAX_THROUGHPUT_DROP = 0.10 # pages/sec 10% 이상 감소
+MAX_ACCURACY_DROP = 0.02   # 재현율/정밀도 2%p 이상 감소 (전체 + 종류별)
+MIN_TYPE_SAMPLES = 20      # 종류별 비교는 값이 이만큼 있을 때만 (적으면 흔들림이 커서 제외)
+MAX_EXTRA_CHARS = 10       # 정답 값을 감싼 탐지가 이보다 더 길면 맞힘으로 보지 않음
+MIN_MATCH_CHARS = 6        # 정답 값 안의 탐지는 이 길이 이상이거나
+MIN_MATCH_SHARE = 0.4      # 값 길이의 이 비율 이상이어야 맞힘
+COMPARABLE_ARGS = ('pages', 'lines', 'seed', 'no_ner', 'backend', 'threads') # 다르면 기준 비교가 무의미
+
+
+# --- 1. 고정 코퍼스 (seed 고정) ---
+def make_corpus(num_pages, num_lines, seed):
+    """[(html, 정답 목록), ...]"""
+    import generate_dataset_v3 as gen
+    random.seed(seed)
+    gen.fake.seed_instance(seed)
+    return [gen.generate_labeled_test_data(num_lines=num_lines) for _ in range(num_pages)]
+
+
+# --- 2. 탐지 (crawler와 같은 경로) ---
+class NoNERQueue:
+    """(--no-ner) NER 배치 큐 자리에 넣는 빈 큐"""
+
+    def submit(self, key, text):
+        pass
+
+    def flush(self):
+        return []
+
+def load_ner(model_path, backend):
+    """(파이프라인, 로드 시간(초))"""
+    from transformers import pipeline
+    tokenizer, model, load_seconds = load_model(model_path)
+    model = apply_backend(model, backend)
+    return pipeline("ner", model=model, tokenizer=tokenizer, device=-1, aggregation_strategy="simple"), load_seconds
+
+def detect_pages(pages, ner_pipeline):
+    """페이지별 탐지 결과 목록. (NER은 crawler.crawl_all처럼 여러 페이지의 조각을 모아 배치 추론)"""
+    ner_queue = crawler.make_ner_queue(ner_pipeline) if ner_pipeline is not None else NoNERQueue()
+    results = [[] for _ in pages]
+    for index, html in enumerate(pages):
+        results[index].extend(crawler.submit_page(index, html, ner_queue))
+        if ner_pipeline is not None and ner_queue.is_full():
+            for page_index, ner_leaks in crawler.drain_ner_queue(ner_queue)[0]:
+                results[page_index].extend(ner_leaks)
+    if ner_pipeline is not None:
+        for page_index, ner_leaks in crawler.drain_ner_queue(ner_queue)[0]:
+            results[page_index].extend(ner_leaks)
+    return results
+
+
+# --- 3. 채점 ---
+def normalize(text):
+    return ''.join(str(text).split())
+
+def overlaps(content, value):
+    if not content:
+        return False
+    if content in value:
+        return len(content) >= min(MIN_MATCH_CHARS, MIN_MATCH_SHARE * len(value))
+    return value in content and len(content) - len(value) <= MAX_EXTRA_CHARS
+
+def new_counter(*keys):
+    return {key: 0 for key in keys}
+
+def score(corpus, detections):
+    """정답(corpus의 truth)과 탐지 결과를 비교해 전체 / 종류별 / 함정별 점수를 만듭니다."""
+    recall = {}    # 정답 종류 -> total / found / found_regex / found_ai
+    precision = {} # 탐지 종류 -> detections / true / trap / other
+    traps = {}     # 함정 생성기 -> total / flagged
+    for (_, truth), leaks in zip(corpus, detections):
+        leak_values, trap_values = {}, {}
+        for item in truth:
+            target = leak_values if item['label'] == 'leak' else trap_values
+            target.setdefault(normalize(item['value']), item['generator'])
+        found = {value: set() for value in leak_values}
+        flagged = set()
+        for leak in leaks:
+            content = normalize(leak['content'])
+            stats = precision.setdefault(leak['type'], new_counter('detections', 'true', 'trap', 'other'))
+            stats['detections'] += 1
+            hits = [value for value in leak_values if overlaps(content, value)]
+            if hits:
+                stats['true'] += 1
+                for value in hits:
+                    found[value].add(leak.get('source', 'regex'))
+                continue
+            trap_hits = [value for value in trap_values if overlaps(content, value)]
+            stats['trap' if trap_hits else 'other'] += 1
+            flagged.update(trap_hits)
+        for value, generator in leak_values.items():
+            stats = recall.setdefault(GENERATOR_TYPES.get(generator, generator),
+                                      new_counter('total', 'found', 'found_regex', 'found_ai'))
+            stats['total'] += 1
+            stats['found'] += bool(found[value])
+            stats['found_regex'] += 'regex' in found[value]
+            stats['found_ai'] += 'ai' in found[value]
+        for value, generator in trap_values.items():
+            stats = traps.setdefault(generator, new_counter('total', 'flagged'))
+            stats['total'] += 1
+            stats['flagged'] += value in flagged
+
+    for stats in recall.values():
+        stats['recall'] = round(stats['found'] / stats['total'], 4) if stats['total'] else None
+    for stats in precision.values():
+        stats['precision'] = round(stats['true'] / stats['detections'], 4) if stats['detections'] else None
+    for stats in traps.values():
+        stats['fp_rate'] = round(stats['flagged'] / stats['total'], 4) if stats['total'] else None
+
+    total = sum(stats['total'] for stats in recall.values())
+    found = sum(stats['found'] for stats in recall.values())
+    num_detections = sum(stats['detections'] for stats in precision.values())
+    true_detections = sum(stats['true'] for stats in precision.values())
+    overall_recall = found / total if total else 0.0
+    overall_precision = true_detections / num_detections if num_detections else 0.0
+    f1 = (2 * overall_precision * overall_recall / (overall_precision + overall_recall)
+          if overall_precision + overall_recall else 0.0)
+    overall = {'leak_values': total, 'detections': num_detections, 'recall': round(overall_recall, 4),
+               'precision': round(overall_precision, 4), 'f1': round(f1, 4)}
+    return overall, recall, precision, traps
+
+
+# --- 4. 회귀 검사 ---
+def find_regressions(report, baseline):
+    """baseline 대비 허용 폭보다 나빠진 항목 목록 (문자열)"""
+    regressions = []
+    changed = [key for key in COMPARABLE_ARGS if baseline.get('args', {}).get(key) != report['args'].get(key)]
+    if changed:
+        print(f"⚠️ 기준 결과와 실행 조건이 다릅니다: {', '.join(changed)} (비교가 정확하지 않을 수 있음)")
+    old, new = baseline['throughput']['pages_per_sec'], report['throughput']['pages_per_sec']
+    if old and new < old * (1 - MAX_THROUGHPUT_DROP):
+        regressions.append(f"pages/sec {old} -> {new} (-{1 - new / old:.1%})")
+    for key in ('recall', 'precision'):
+        old, new = baseline['accuracy'][key], report['accuracy'][key]
+        if new < old - MAX_ACCURACY_DROP:
+            regressions.append(f"전체 {key} {old} -> {new}")
+    for section, key, size_key in (('recall_by_type', 'recall', 'total'),
+                                   ('precision_by_type', 'precision', 'detections')):
+        for pii_type, old_stats in baseline.get(section, {}).items():
+            new_stats = report[section].get(pii_type)
+            if old_stats[size_key] < MIN_TYPE_SAMPLES or old_stats[key] is None:
+                continue
+            new_value = new_stats[key] if new_stats and new_stats[key] is not None else 0.0
+            if new_value < old_stats[key] - MAX_ACCURACY_DROP:
+                regressions.append(f"{pii_type} {key} {old_stats[key]} -> {new_value}")
+    return regressions
+
+
+def print_report(report):
+    accuracy, throughput = report['accuracy'], report['throughput']
+    print(f"🎯 전체: 재현율 {accuracy['recall']:.1%} / 정밀도 {accuracy['precision']:.1%} / F1 {accuracy['f1']:.3f} "
+          f"(정답 값 {accuracy['leak_values']:,}개, 탐지 {accuracy['detections']:,}건)")
+    print(f"{'정답 종류':<16} | {'값':>5} | {'재현율':>7} | {'정규식':>5} | {'AI':>5}")
+    for pii_type, stats in sorted(report['recall_by_type'].items()):
+        print(f"{pii_type:<16} | {stats['total']:>5} | {stats['recall']:>7.1%} | "
+              f"{stats['found_regex']:>5} | {stats['found_ai']:>5}")
+    print(f"{'탐지 종류':<16} | {'탐지':>5} | {'정밀도':>7} | {'함정':>5} | {'기타':>5}")
+    for pii_type, stats in sorted(report['precision_by_type'].items()):
+        print(f"{pii_type:<16} | {stats['detections']:>5} | {stats['precision']:>7.1%} | "
+              f"{stats['trap']:>5} | {stats['other']:>5}")
+    print("🪤 함정 오탐률: " + ', '.join(f"{name.replace('get_safe_', '')} {stats['fp_rate']:.0%}"
+                                     for name, stats in sorted(report['traps'].items())))
+    load = throughput['model_load_seconds']
+    if report.get('second_pass'):
+        print(f"🎓 2차 판독: 학생 뇌 개체 {report['second_pass']['student_entities']:,}개 중 "
+              f"{report['second_pass']['second_pass_entities']:,}개를 teacher로 다시 판단")
+    print(f"⚡ {throughput['pages_per_sec']} pages/sec, {throughput['ms_per_mb']} ms/MB, "
+          f"최대 RSS {throughput['peak_rss_mb']} MB" + (f", 모델 로드 {load}초" if load is not None else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="탐지 정확도 + 처리량 벤치마크 ('가상 은행' 정답 사용)")
+    parser.add_argument('--pages', type=int, default=20, help="합성 페이지 수")
+    parser.add_argument('--lines', type=int, default=200, help="페이지당 줄 수")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model', default=crawler.MODEL_PATH, help="NER 모델 경로 (기본: 현재 버전)")
+    parser.add_argument('--backend', choices=NER_BACKENDS, default='fp32')
+    parser.add_argument('--no-ner', action='store_true', help="정규식만 측정")
+    parser.add_argument('--second-pass-score', type=float,
+                        help="(학생 뇌) 확신도가 이보다 낮은 개체만 --second-pass-model로 다시 판단")
+    parser.add_argument('--second-pass-model', default=crawler.MODEL_PATH, help="2차 판독 모델 경로 (기본: 현재 '경력직' 뇌)")
+    parser.add_argument('--threads', type=int, help="torch CPU 스레드 수 (서버 사양 재현용)")
+    parser.add_argument('--out', help="결과 JSON 경로")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON (나빠지면 종료 코드 1)")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.pages, args.lines, args.seed)
+    pages = [html for html, _ in corpus]
+    total_mb = sum(len(html.encode('utf-8')) for html in pages) / (1024 * 1024)
+    print(f"📚 합성 페이지 {len(pages)}개 ({total_mb:.2f} MB), 정답 {sum(len(truth) for _, truth in corpus):,}줄")
+
+    ner_pipeline, load_seconds = None, None
+    if not args.no_ner:
+        if args.threads:
+            import torch
+            torch.set_num_threads(args.threads)
+        ner_pipeline, load_seconds = load_ner(args.model, args.backend)
+        if args.second_pass_score is not None:
+            teacher_pipeline, teacher_load_seconds = load_ner(args.second_pass_model, args.backend)
+            ner_pipeline, load_seconds = (CascadeNER(ner_pipeline, teacher_pipeline, args.second_pass_score),
+                                          load_seconds + teacher_load_seconds)
+        detect_pages(pages[:1], ner_pipeline) # (워밍업: 첫 호출의 지연 초기화 비용 제외)
+        if isinstance(ner_pipeline, CascadeNER):
+            ner_pipeline.reset_stats()
+
+    started = time.perf_counter()
+    detections = detect_pages(pages, ner_pipeline)
+    elapsed = time.perf_counter() - started
+
+    overall, recall, precision, traps = score(corpus, detections)
+    second_pass = None
+    if isinstance(ner_pipeline, CascadeNER):
+        second_pass = {'student_entities': ner_pipeline.student_entities,
+                       'second_pass_entities': ner_pipeline.second_pass_entities}
+    report = {
+        'args': vars(args),
+        'model_version': os.path.basename(os.path.realpath(args.model)) if not args.no_ner else None,
+        'second_pass': second_pass,
+        'accuracy': overall, 'recall_by_type': recall, 'precision_by_type': precision, 'traps': traps,
+        'throughput': {
+            'seconds': round(elapsed, 3), 'pages_per_sec': round(len(pages) / max(elapsed, 1e-9), 2),
+            'ms_per_mb': round(elapsed * 1000 / max(total_mb, 1e-9), 1),
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), # (Linux: KB)
+            'model_load_seconds': round(load_seconds, 3) if load_seconds is not None else None,
+        },
+    }
+    print_report(report)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        old, new = baseline['throughput']['pages_per_sec'], report['throughput']['pages_per_sec']
+        print(f"📊 기준({baseline.get('model_version') or '정규식만'}) 대비: pages/sec {new / max(old, 1e-9):.2f}배, "
+              f"재현율 {report['accuracy']['recall'] - baseline['accuracy']['recall']:+.1%}, "
+              f"정밀도 {report['accuracy']['precision'] - baseline['accuracy']['precision']:+.1%}")
+        regressions = find_regressions(report, baseline)
+        if regressions:
+            print("❌ 기준 결과보다 나빠졌습니다:\n  - " + '\n  - '.join(regressions))
+            sys.exit(1)
+        print(f"✅ 기준 결과({args.baseline}) 대비 회귀 없음")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# ⏱️ (벤치마크) HTML 텍스트 추출 성능 측정
+# ----------------------------------------------------
+# 수 MB짜리 '가상 은행' 페이지에서 '기존 방식'(BeautifulSoup 트리 + get_text + 원본 재스캔)과
+# '조각 추출기'(html_helper.extract_segments, 1회 스트리밍 파싱)를 비교합니다.
+# 1. 추출만: 처리 시간, MB/sec
+# 2. 추출 + 정규식 탐지: 처리 시간, 탐지 건수, 두 방식의 탐지 content 차이 (누락 확인)
+#
+# 실행: python3 benchmarks/bench_html.py --mb 1 4 --repeat 3
+# ----------------------------------------------------
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test_site'))
+
+from regex_helper import find_regex_leaks # noqa: E402
+from html_helper import extract_segments # noqa: E402
+
+
+# --- 1. 고정 코퍼스 (seed 고정) ---
+def make_page(target_mb, seed):
+    """'가상 은행' 생성기 페이지를 target_mb 크기가 될 때까지 이어 붙입니다."""
+    import generate_dataset_v3 as gen
+    random.seed(seed)
+    gen.fake.seed_instance(seed)
+    parts, size = [], 0
+    while size < target_mb * 1024 * 1024:
+        part = gen.generate_random_test_data(num_lines=500)
+        parts.append(part)
+        size += len(part.encode('utf-8'))
+    return '\n'.join(parts)
+
+
+# --- 2. 비교 대상: 기존(v3.10) 방식 ---
+TEXT_NODE_PATTERN = re.compile(r'(?<=>)([^<]+)(?=<)')
+
+def legacy_extract(html_content):
+    """v3.10 crawler.submit_page의 추출 부분 (보이는 텍스트 + 보이는 텍스트를 지운 원본)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    page_text = soup.get_text(separator=' ', strip=True)
+    visible_strings = set(soup.stripped_strings)
+    raw_only = TEXT_NODE_PATTERN.sub(
+        lambda m: '' if m.group(1).strip() in visible_strings else m.group(0), html_content)
+    return page_text, raw_only
+
+def legacy_detect(html_content):
+    """v3.10 방식: 원본 전체 + 보이는 텍스트를 각각 정규식 스캔 (페이지마다 2번)"""
+    page_text, _ = legacy_extract(html_content)
+    return find_regex_leaks(html_content) + find_regex_leaks(page_text)
+
+def segment_detect(html_content):
+    """v3.11 방식: 조각마다 1번 스캔"""
+    leaks, seen = [], set()
+    for segment in extract_segments(html_content):
+        leaks.extend(find_regex_leaks(segment.text, seen))
+    return leaks
+
+
+# --- 3. 측정 ---
+def run_case(name, func, html_content, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(html_content)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    size_mb = len(html_content.encode('utf-8')) / (1024 * 1024)
+    print(f"{name:<16} | {best * 1000:>10.1f} ms | {size_mb / best:>8.2f} MB/s")
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 텍스트 추출 벤치마크 (BeautifulSoup vs 조각 추출기)")
+    parser.add_argument('--mb', type=float, nargs='+', default=[1, 4], help="페이지 크기(MB, 여러 개 지정 가능)")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for target_mb in args.mb:
+        page = make_page(target_mb, args.seed)
+        segments = extract_segments(page)
+        kinds = {}
+        for segment in segments:
+            kinds[segment.kind] = kinds.get(segment.kind, 0) + 1
+        print(f"\n=== 합성 페이지: {len(page.encode('utf-8')) / (1024 * 1024):.2f} MB, 조각 {len(segments):,}개 {kinds} ===")
+
+        print("[추출만]")
+        legacy, _ = run_case('bs4 + raw', legacy_extract, page, args.repeat)
+        streaming, _ = run_case('segments', extract_segments, page, args.repeat)
+        print(f"-> 속도 향상: {legacy / streaming:.1f}x")
+
+        print("[추출 + 정규식 탐지]")
+        legacy, legacy_leaks = run_case('bs4 + raw', legacy_detect, page, args.repeat)
+        streaming, segment_leaks = run_case('segments', segment_detect, page, args.repeat)
+        legacy_contents = {leak['content'] for leak in legacy_leaks}
+        segment_contents = {leak['content'] for leak in segment_leaks}
+        print(f"-> 속도 향상: {legacy / streaming:.1f}x | 탐지 content: 기존 {len(legacy_contents):,} / "
+              f"조각 {len(segment_contents):,} (조각 방식 누락 {len(legacy_contents - segment_contents)}, "
+              f"추가 {len(segment_contents - legacy_contents)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# ⏱️ (벤치마크) 라벨링(autolabeler) 처리량 측정 - 유료 API 대신 로컬 대역 서버(test_site/mock_api.py)
+# ----------------------------------------------------
+# seed 고정된 합성 '의심' 목록(pending)을 임시 저장소에 넣고, autolabeler.main()을 설정별로 실행합니다.
+# 1. 합성 backlog: '가상 은행' 생성기 페이지 -> 정규식 탐지 결과 (--dup-ratio만큼 다른 url로 반복 -> 캐시 적중)
+# 2. 설정 조합: 동시 요청 수(--workers) x 배치 크기(--batch-items)
+# 3. 결과: 처리량(items/sec), LLM 요청 수, 요청 지연 p50/p95/p99, HTTP 재시도 / 429 / 배치 누락 건수,
+#          mock 고정 판단(mock_verdict)과의 일치율 (Triage로 판정된 행 제외)
+# 결과는 JSON으로도 저장할 수 있습니다. (--out)
+#
+# 준비: config.py가 있어야 합니다. (API 주소는 벤치마크가 mock 주소로 바꿔 씀, 키는 아무 값)
+# 실행: python3 benchmarks/bench_labeling.py --items 2000 --workers 1 4 8 --batch-items 1 20 \
+#           --latency-ms 300 --latency-dist lognormal --latency-spread-ms 200 --error-rate 0.02
+# ----------------------------------------------------
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test_site'))
+
+import config # noqa: E402
+import autolabeler # noqa: E402
+import http_helper # noqa: E402
+import mock_api # noqa: E402
+from leak_store import LeakStore # noqa: E402
+from regex_helper import find_regex_leaks # noqa: E402
+
+
+# --- 1. 고정 backlog (seed 고정) ---
+def make_backlog(num_items, dup_ratio, seed):
+    """'가상 은행' 페이지의 정규식 탐지 결과로 의심 내역 num_items건을 만듭니다. (dup_ratio만큼은 다른 url의 반복)"""
+    import generate_dataset_v3 as gen
+    random.seed(seed)
+    gen.fake.seed_instance(seed)
+    unique_target = max(1, int(num_items * (1 - dup_ratio)))
+    leaks, seen, page = [], set(), 0
+    while len(leaks) < unique_target:
+        url = f"http://bench.local/page/{page}"
+        for leak in find_regex_leaks(gen.generate_random_test_data(num_lines=200), seen):
+            leaks.append({**leak, 'url': url})
+        page += 1
+    leaks = leaks[:unique_target]
+    repeats = [{**random.choice(leaks), 'url': f"http://bench.local/mirror/{index}"}
+               for index in range(num_items - unique_target)]
+    return leaks + repeats
+
+def build_store(path, leaks):
+    with LeakStore(path, migrate=False) as store:
+        added = store.add_new_leaks(leaks)
+    return added
+
+
+# --- 2. 측정 ---
+def run_case(template_db, work_dir, workers, batch_items):
+    db_path = os.path.join(work_dir, f"bench_w{workers}_b{batch_items}.db")
+    shutil.copy(template_db, db_path)
+    config.LLM_MAX_WORKERS = workers
+    config.LLM_BATCH_MAX_ITEMS = batch_items
+    autolabeler.LEAK_STORE_FILE = db_path
+    http_helper._client = None # (설정마다 지표를 새로 모음)
+    http_helper.get_client().session.post(config.HCX_API_URL + '/reset')
+
+    started = time.perf_counter()
+    autolabeler.main()
+    elapsed = time.perf_counter() - started
+
+    endpoint = http_helper.get_client().metrics().get(autolabeler.llm_helper.LLM_ENDPOINT, {})
+    server = http_helper.get_client().session.get(config.HCX_API_URL + '/stats').json()
+    with LeakStore(db_path, migrate=False) as store:
+        labeled = store.labeled_leaks(columns=['content', 'llm_label', 'llm_reason'])
+        pending = store.count('pending')
+    asked = labeled[~labeled['llm_reason'].fillna('').str.startswith('[triage:')]
+    agree = sum(label == mock_api.mock_verdict(content) for content, label in zip(asked['content'], asked['llm_label']))
+    return {
+        'workers': workers, 'batch_items': batch_items,
+        'labeled': len(labeled), 'pending': pending, 'seconds': round(elapsed, 2),
+        'items_per_sec': round(len(labeled) / max(elapsed, 1e-9), 1),
+        'llm_requests': endpoint.get('requests', 0), 'http_retries': endpoint.get('retries', 0),
+        'p50_ms': endpoint.get('p50_ms'), 'p95_ms': endpoint.get('p95_ms'), 'p99_ms': endpoint.get('p99_ms'),
+        'rate_limited': server['rate_limited'], 'server_errors': server['errors'], 'dropped': server['dropped'],
+        'llm_items': len(asked), 'agreement': round(agree / len(asked), 4) if len(asked) else None,
+    }
+
+def print_row(result):
+    print(f"{result['workers']:>7} | {result['batch_items']:>5} | {result['items_per_sec']:>9.1f} | "
+          f"{result['llm_requests']:>6} | {result['p50_ms']!s:>7} / {result['p95_ms']!s:>7} / {result['p99_ms']!s:>7} | "
+          f"{result['http_retries']:>5} | {result['rate_limited']:>4} | {result['dropped']:>4} | "
+          f"{result['pending']:>5} | {result['agreement']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="autolabeler 처리량 벤치마크 (로컬 mock API)")
+    parser.add_argument('--items', type=int, default=1000, help="합성 '의심' 항목 수")
+    parser.add_argument('--dup-ratio', type=float, default=0.2, help="다른 url로 반복되는 항목 비율 (캐시 적중)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help="동시 요청 수 (여러 개 지정 가능)")
+    parser.add_argument('--batch-items', type=int, nargs='+', default=[1, 20], help="배치 크기 (1 = 단건)")
+    parser.add_argument('--rpm', type=int, default=6000, help="분당 요청 한도 (limiter)")
+    parser.add_argument('--tpm', type=int, default=10_000_000, help="분당 토큰 한도 (limiter)")
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--latency-dist', choices=mock_api.LATENCY_DISTS, default='lognormal')
+    parser.add_argument('--latency-spread-ms', type=float, default=100)
+    parser.add_argument('--per-item-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--batch-drop-rate', type=float, default=0.0)
+    parser.add_argument('--api-url', help="이미 떠 있는 mock 서버 주소 (없으면 이 프로세스에서 띄움)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR) # (항목별 로그가 표를 가리지 않도록)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = None
+    if args.api_url:
+        config.HCX_API_URL = args.api_url.rstrip('/')
+    else:
+        mock_api.configure(seed=args.seed, latency_ms=args.latency_ms, latency_dist=args.latency_dist,
+                           latency_spread_ms=args.latency_spread_ms, per_item_ms=args.per_item_ms,
+                           error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                           batch_drop_rate=args.batch_drop_rate)
+        server, config.HCX_API_URL = mock_api.serve_in_background()
+    config.LLM_REQUESTS_PER_MIN, config.LLM_TOKENS_PER_MIN = args.rpm, args.tpm
+
+    work_dir = tempfile.mkdtemp(prefix='bench_labeling_')
+    try:
+        template_db = os.path.join(work_dir, 'template.db')
+        added = build_store(template_db, make_backlog(args.items, args.dup_ratio, args.seed))
+        print(f"=== 합성 backlog {added:,}건 (반복 비율 {args.dup_ratio:.0%}), mock {config.HCX_API_URL}: "
+              f"지연 {args.latency_dist} {args.latency_ms:.0f}±{args.latency_spread_ms:.0f}ms "
+              f"(+항목당 {args.per_item_ms:.0f}ms), 503 {args.error_rate:.0%}, 429 {args.rate_limit_rate:.0%}, "
+              f"배치 누락 {args.batch_drop_rate:.0%} ===")
+        print(f"{'workers':>7} | {'batch':>5} | {'items/sec':>9} | {'요청':>6} | "
+              f"{'p50 / p95 / p99 (ms)':>25} | {'재시도':>5} | {'429':>4} | {'누락':>4} | {'남음':>5} | 일치율")
+        results = []
+        for workers in args.workers:
+            for batch_items in args.batch_items:
+                results.append(run_case(template_db, work_dir, workers, batch_items))
+                print_row(results[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if server is not None:
+            server.shutdown()
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.out}")
+
+if __name__ == "__main__":
+    main()
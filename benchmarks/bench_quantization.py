@@ -0,0 +1,130 @@
+# ⏱️ (벤치마크) NER 추론 백엔드 비교 리포트 (fp32 vs int8)
+# ----------------------------------------------------
+# 고정 코퍼스에서 fp32 모델과 int8 동적 양자화 모델을 비교합니다.
+# 1. 개체(entity) 단위 정밀도/재현율: fp32 결과를 기준(reference)으로 int8 결과를 채점
+# 2. (선택) --feedback 으로 feedback_data.csv를 주면 '유출' 정답(content 위치) 기준 정밀도/재현율도 계산
+# 3. 처리량(tokens/sec)과 속도 향상 배수
+# 결과는 JSON으로 저장됩니다. (--out)
+#
+# 실행: python3 benchmarks/bench_quantization.py --model /root/PII-Guardian/my-ner-model --pages 20
+# ----------------------------------------------------
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test_site'))
+
+from ner_helper import apply_backend, run_chunked_ner_batch, NER_BACKENDS # noqa: E402
+
+
+# --- 1. 고정 코퍼스 ---
+def synthetic_corpus(num_pages, seed):
+    """'가상 은행' 생성기로 seed 고정된 페이지를 만듭니다. (정답 없음 -> fp32 기준 비교만)"""
+    import generate_dataset_v3 as gen
+    random.seed(seed)
+    gen.fake.seed_instance(seed)
+    return [gen.generate_random_test_data(num_lines=200) for _ in range(num_pages)], None
+
+def feedback_corpus(path, limit):
+    """feedback_data.csv의 '유출' 행에서 (context, 정답 span) 코퍼스를 만듭니다."""
+    import pandas as pd
+    df = pd.read_csv(path)
+    df = df[df['llm_label'] == '유출'].head(limit)
+    texts, gold = [], set()
+    for doc_index, (context, content) in enumerate(zip(df['context'].astype(str), df['content'].astype(str))):
+        texts.append(context)
+        start = context.find(content)
+        if start != -1:
+            gold.add((doc_index, start, start + len(content)))
+    return texts, gold
+
+
+# --- 2. 채점 ---
+def precision_recall(predicted, reference):
+    tp = len(predicted & reference)
+    precision = tp / len(predicted) if predicted else 0.0
+    recall = tp / len(reference) if reference else 0.0
+    return {'precision': round(precision, 4), 'recall': round(recall, 4),
+            'predicted': len(predicted), 'reference': len(reference)}
+
+def entity_keys(results, with_group=True):
+    keys = set()
+    for doc_index, entities in enumerate(results):
+        for e in entities:
+            keys.add((doc_index, e['start'], e['end'], e['entity_group']) if with_group
+                     else (doc_index, e['start'], e['end']))
+    return keys
+
+
+# --- 3. 측정 ---
+def measure(ner_pipeline, texts, repeat):
+    run_chunked_ner_batch(texts[:1], ner_pipeline) # (워밍업)
+    best, results = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = run_chunked_ner_batch(texts, ner_pipeline)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return results, best
+
+def main():
+    parser = argparse.ArgumentParser(description="NER 추론 백엔드(fp32/int8) 정확도/속도 리포트")
+    parser.add_argument('--model', default='/root/PII-Guardian/my-ner-model', help="fp32 모델 경로")
+    parser.add_argument('--backend', default='int8', choices=[b for b in NER_BACKENDS if b != 'fp32'])
+    parser.add_argument('--feedback', help="feedback_data.csv 경로 (주면 '유출' 행을 코퍼스로 사용)")
+    parser.add_argument('--limit', type=int, default=500, help="--feedback 사용 시 최대 행 수")
+    parser.add_argument('--pages', type=int, default=20, help="합성 페이지 수 (--feedback 없을 때)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threads', type=int, help="torch CPU 스레드 수 (서버 사양 재현용)")
+    parser.add_argument('--out', default='quantization_report.json')
+    args = parser.parse_args()
+
+    import torch
+    from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    if args.feedback:
+        texts, gold = feedback_corpus(args.feedback, args.limit)
+    else:
+        texts, gold = synthetic_corpus(args.pages, args.seed)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    num_tokens = sum(len(ids) for ids in tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids'])
+    print(f"📚 코퍼스: 문서 {len(texts)}개, 토큰 {num_tokens:,}개")
+
+    report = {'model': args.model, 'corpus_docs': len(texts), 'corpus_tokens': num_tokens, 'backends': {}}
+    predictions = {}
+    for backend in ('fp32', args.backend):
+        model = AutoModelForTokenClassification.from_pretrained(args.model)
+        model = apply_backend(model, backend)
+        ner_pipeline = pipeline("ner", model=model, tokenizer=tokenizer, device=-1, aggregation_strategy="simple")
+        results, elapsed = measure(ner_pipeline, texts, args.repeat)
+        predictions[backend] = results
+        entry = {'seconds': round(elapsed, 3), 'tokens_per_sec': round(num_tokens / elapsed, 1)}
+        if gold is not None:
+            entry['vs_gold'] = precision_recall(entity_keys(results, with_group=False), gold)
+        report['backends'][backend] = entry
+        print(f"⚡ {backend:<5} | {elapsed:.2f}s | {entry['tokens_per_sec']:,.0f} tokens/s")
+
+    fp32, quantized = report['backends']['fp32'], report['backends'][args.backend]
+    report['speedup'] = round(fp32['seconds'] / quantized['seconds'], 2)
+    report['agreement_vs_fp32'] = precision_recall(entity_keys(predictions[args.backend]),
+                                                   entity_keys(predictions['fp32']))
+    print(f"📈 속도 향상: {report['speedup']}x | fp32 대비 일치도: {report['agreement_vs_fp32']}")
+    if gold is not None:
+        print(f"🎯 정답 대비: fp32 {fp32['vs_gold']} / {args.backend} {quantized['vs_gold']}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 리포트 저장: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# ⏱️ (벤치마크) 정규식 탐지 엔진 성능 측정
+# ----------------------------------------------------
+# 대용량 합성 페이지에서 '기존 방식'(패턴별 re.finditer + 리스트 선형 중복 검사)과
+# '결합 스캐너'(regex_helper.find_regex_leaks)의 처리량(matches/sec, MB/sec)을 비교합니다.
+#
+# 실행: python3 benchmarks/bench_regex.py --lines 20000 --repeat 3
+# ----------------------------------------------------
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from regex_helper import REGEX_PATTERNS, find_regex_leaks, make_context # noqa: E402
+
+
+# --- 1. 합성 페이지 생성 (외부 라이브러리 없이 재현 가능하도록 seed 고정) ---
+def _digits(rng, n):
+    return ''.join(rng.choice('0123456789') for _ in range(n))
+
+def _random_line(rng):
+    """PII / 함정(오탐 유발) / 일반 텍스트 중 하나를 HTML 한 줄로 생성합니다."""
+    choice = rng.random()
+    if choice < 0.35:
+        pii = rng.choice([
+            lambda: f"010-{_digits(rng, 4)}-{_digits(rng, 4)}",
+            lambda: f"{_digits(rng, 6)}-{rng.choice('1234')}{_digits(rng, 6)}",
+            lambda: '-'.join(_digits(rng, 4) for _ in range(4)),
+            lambda: f"user{_digits(rng, 5)}@example{rng.randint(1, 99)}.com",
+            lambda: f"{_digits(rng, 3)}-{_digits(rng, 6)}-{_digits(rng, 2)}",
+            lambda: f"192.168.{rng.randint(0, 255)}.{rng.randint(0, 255)}",
+            lambda: "sk-" + ''.join(rng.choice('abcdefXYZ0123456789') for _ in range(32)),
+            lambda: f"02-{_digits(rng, 3)}-{_digits(rng, 4)}",
+        ])()
+        return f'<p class="warning">문의 내용: {pii}</p>'
+    if choice < 0.60:
+        trap = rng.choice([
+            lambda: f"ORD-{_digits(rng, 6)}-{_digits(rng, 7)}",
+            lambda: f"PROD-{'-'.join(_digits(rng, 4) for _ in range(4))}",
+            lambda: f"v{_digits(rng, 2)}.{_digits(rng, 3)}.{_digits(rng, 3)}.{_digits(rng, 3)}",
+            lambda: f"Build #{_digits(rng, 9)}",
+        ])()
+        return f'<div data-user-info="{trap}" class="safe">데이터 속성 (F12로 확인)</div>'
+    words = ['고객', '센터', '안내', '서비스', '이용', '약관', 'Lorem', 'ipsum', 'dolor', 'sit', 'amet']
+    return f"<p>{' '.join(rng.choice(words) for _ in range(rng.randint(5, 25)))}</p>"
+
+def make_synthetic_page(num_lines, seed=42):
+    rng = random.Random(seed)
+    return '\n'.join(_random_line(rng) for _ in range(num_lines))
+
+
+# --- 2. 비교 대상: 기존(v3.1) 방식 ---
+def legacy_find_regex_leaks(text):
+    """v3.1 crawler.find_leaks_in_text의 정규식 부분 (패턴별 스캔 + 선형 중복 검사)."""
+    leaks = []
+    for pii_type, pattern in REGEX_PATTERNS.items():
+        for match in re.finditer(pattern, text):
+            is_duplicate = False
+            for existing_leak in leaks:
+                if existing_leak['content'] == match.group(0):
+                    is_duplicate = True
+                    break
+            if not is_duplicate:
+                leaks.append({
+                    'type': pii_type.replace('_GENERAL', ''),
+                    'content': match.group(0),
+                    'context': make_context(text, match.start(), match.end())
+                })
+    return leaks
+
+
+# --- 3. 우선순위 검사: 먼저 시작하는 하위 패턴 매치 안에 든 상위 PII도 제 유형으로 나와야 함 ---
+PRIORITY_CASES = [
+    ("고객 123 900101-1234567", ('RRN', '900101-1234567')),
+    ("카드 123 1234-5678-9012-3456 결제", ('CREDIT_CARD', '1234-5678-9012-3456')),
+    ("대표 02 010-1234-5678", ('PHONE', '010-1234-5678')),
+]
+
+def check_priority_cases():
+    """PRIORITY_CASES를 확인하고 실패한 건수를 반환합니다. (기존 방식도 같은 항목을 찾는지 함께 표시)"""
+    failures = 0
+    for text, expected in PRIORITY_CASES:
+        found = {(leak['type'], leak['content']) for leak in find_regex_leaks(text)}
+        legacy = {(leak['type'], leak['content']) for leak in legacy_find_regex_leaks(text)}
+        ok = expected in found
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text!r} -> {expected} (legacy: {'있음' if expected in legacy else '없음'})")
+    return failures
+
+
+# --- 4. 측정 ---
+def run_case(name, func, text, repeat):
+    best = None
+    leaks = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        leaks = func(text)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    print(f"{name:<10} | {len(leaks):>8} matches | {best * 1000:>10.1f} ms | "
+          f"{len(leaks) / best:>12,.0f} matches/s | {size_mb / best:>8.2f} MB/s")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="정규식 탐지 엔진 벤치마크")
+    parser.add_argument('--lines', type=int, nargs='+', default=[200, 2000, 20000],
+                        help="합성 페이지 줄 수 (여러 개 지정 가능)")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=== 우선순위 검사 ===")
+    failures = check_priority_cases()
+    for num_lines in args.lines:
+        page = make_synthetic_page(num_lines, seed=args.seed)
+        size_kb = len(page.encode('utf-8')) / 1024
+        print(f"\n=== 합성 페이지: {num_lines:,}줄 ({size_kb:,.0f} KB) ===")
+        legacy = run_case('legacy', legacy_find_regex_leaks, page, args.repeat)
+        combined = run_case('combined', find_regex_leaks, page, args.repeat)
+        print(f"-> 속도 향상: {legacy / combined:.1f}x")
+    if failures:
+        sys.exit(f"❌ 우선순위 검사 {failures}건 실패")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# 🛰️ (엔진) 동시 크롤링 스케줄러 - 호스트별 예의(Politeness) 보장
+# ----------------------------------------------------
+# 'crawler.py'가 이 파일을 import하여 여러 URL을 "동시에" 가져옵니다.
+# 1. 전역 동시 요청 수는 스레드 풀 크기(max_workers)로 제한합니다.
+# 2. 같은 호스트에는 (a) 동시에 1개(기본)만, (b) 최소 간격(delay)을 두고 요청합니다.
+#    (기존: 모든 URL 사이에 전역 time.sleep(1) -> 느린 호스트 1개가 전체를 멈춤)
+# 3. 도착한 페이지부터 순서대로 yield 하므로, 호출 측에서 즉시 탐지를 시작할 수 있습니다.
+# ----------------------------------------------------
+
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+MAX_CONCURRENCY = 16      # 전역 동시 요청 수
+PER_HOST_DELAY = 1.0      # 같은 호스트 요청 사이 최소 간격(초) (기존 time.sleep(1)과 동일한 예의)
+PER_HOST_CONCURRENCY = 1  # 같은 호스트에 동시에 보낼 수 있는 요청 수
+
+
+# --- 2. 호스트별 속도 제한기 ---
+class HostRateLimiter:
+    """호스트마다 동시 요청 수와 요청 간 최소 간격을 보장합니다. (스레드 안전)"""
+
+    def __init__(self, delay=PER_HOST_DELAY, concurrency=PER_HOST_CONCURRENCY):
+        self.delay = delay
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._slots = {}     # host -> Semaphore
+        self._next_time = {} # host -> 다음 요청 가능 시각 (monotonic)
+
+    def _slot(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.Semaphore(self.concurrency)
+            return self._slots[host]
+
+    def acquire(self, host):
+        """호스트 슬롯을 얻고, 최소 간격이 지날 때까지 기다립니다."""
+        self._slot(host).acquire()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_time.get(host, 0) - now
+                if wait <= 0:
+                    self._next_time[host] = now + self.delay
+                    return
+            time.sleep(wait)
+
+    def release(self, host):
+        self._slot(host).release()
+
+
+def get_host(url):
+    return urlparse(url).netloc.lower()
+
+def interleave_by_host(urls):
+    """
+    URL 목록을 호스트별 라운드로빈 순서로 재배치합니다.
+    (같은 호스트 URL이 몰려 있으면 워커들이 한 호스트의 대기열에 모두 묶이기 때문)
+    """
+    queues = OrderedDict()
+    for url in urls:
+        queues.setdefault(get_host(url), deque()).append(url)
+
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].popleft())
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+# --- 3. 동시 수집 ---
+def fetch_concurrently(urls, fetch_func, max_workers=MAX_CONCURRENCY, limiter=None):
+    """
+    fetch_func(url)을 스레드 풀에서 동시에 실행하고, 끝난 순서대로 (url, 결과)를 yield 합니다.
+    fetch_func에서 발생한 예외는 로그를 남기고 결과를 None으로 반환합니다.
+    """
+    limiter = limiter or HostRateLimiter()
+
+    def polite_fetch(url):
+        host = get_host(url)
+        limiter.acquire(host)
+        try:
+            return fetch_func(url)
+        finally:
+            limiter.release(host)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(polite_fetch, url): url for url in interleave_by_host(urls)}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield url, future.result()
+            except Exception as e:
+                logger.error(f"❌ [동시 크롤링 에러] {url} 처리 실패: {e}")
+                yield url, None
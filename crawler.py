@@ -1,13 +1,8 @@
-# 🕵️ (봇 1) '신입' 봇. '의심' 내역 수집 -> detected_leaks.csv
-# (v3.1 - Selenium 제거, Requests 복귀, Raw URL 스캔, 문맥(Context) 로직 수정)
+# 🕵️ (봇 1) '신입' 봇. '의심' 내역 수집 -> pii_guardian.db (status='pending')
+# (v3.15 - 결합 정규식 엔진, 슬라이딩 윈도우 NER, 동시 크롤링, NER 배치 큐, 페이지 캐시, 상주 탐지 서비스, int8 백엔드, SQLite 저장소, 조각 단위 HTML 추출, 공용 HTTP 클라이언트, NER 확신도/탐지 출처 기록, 모델 버전 저장소, 학생 뇌 + 2차 판독)
 
-import requests
-from bs4 import BeautifulSoup
-import re
-import pandas as pd
 import os
-import time
-from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
+# (✨ v3.7) transformers(torch)는 load_ner_pipeline 안에서 import 합니다. (상주 탐지 서비스 사용 시 import 비용 없음)
 from urllib.parse import urljoin 
 import logging
 # (✨ Selenium 관련 모듈 모두 삭제)
@@ -15,6 +10,15 @@ import logging
 # 우리 헬퍼 및 설정 파일 임포트
 import config
 import ocr_helper # (OCR은 여전히 비활성화)
+from regex_helper import find_regex_leaks, make_context
+from ner_helper import run_chunked_ner, make_ner_queue, apply_backend, RemoteNER, DETECTOR_URL, NER_BACKEND
+from ner_helper import CascadeNER, NER_MODEL, NER_SECOND_PASS_SCORE # (✨ v3.15) 학생 뇌 + teacher 2차 판독
+from crawl_scheduler import fetch_concurrently, MAX_CONCURRENCY, PER_HOST_DELAY
+from page_cache import PageCache
+from html_helper import extract_segments, pack_segments
+from http_helper import get_client
+from leak_store import LeakStore, LEAK_STORE_FILE
+from model_registry import load_model # (✨ v3.14) 'my-ner-model' 링크 -> 버전 폴더 확정 후 safetensors 로드
 
 # --- 1. 설정값 ---
 BASE_PATH = "/root/PII-Guardian"
@@ -25,22 +29,12 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.StreamHandler()])
 
-CSV_FILE = os.path.join(BASE_PATH, 'detected_leaks.csv')
-FEEDBACK_FILE = os.path.join(BASE_PATH, 'feedback_data.csv')
-MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model')
+MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model') # (✨ v3.14 현재 버전을 가리키는 링크, model_registry)
+STUDENT_MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-student') # (✨ v3.15) 학생 뇌 (distill.py, 현재 버전 링크)
+PAGE_CACHE_FILE = os.path.join(BASE_PATH, 'page_cache.json') # (✨ v3.6) URL별 ETag/본문 해시
 BASE_MODEL = 'klue/roberta-base' 
 
-# (✨ v2.21 정규식)
-REGEX_PATTERNS = {
-    'EMAIL': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-    'PHONE': r'\b\(?(010)\)?[-.)\s]*\d{3,4}[-.\s]*\d{4}\b',
-    'RRN': r'\b\d{6}[- ]*[1-4]\d{6}\b', 
-    'CREDIT_CARD': r'\b\d{4}[- ]*\d{4}[- ]*\d{4}[- ]*\d{4}\b', 
-    'ACCOUNT_NUM': r'\b\d{3}[- ]*\d{2,6}[- ]*\d{2,7}\b', 
-    'API_KEY': r'\b(sk|pk|im-key-prod)-[a-zA-Z0-9_,-]{20,}\b',
-    'INTERNAL_IP': r'\b(192\.168\.\d{1,3}\.\d{1,3})\b|\b(10\.\d{1,3}\.\d{1,3}\.\d{1,3})\b',
-    'PHONE_GENERAL': r'\b\(?(0[2-9][0-9]?)\)?[-.)\s]*\d{3,4}[-.\s]*\d{4}\b|\b(15\d{2}|16\d{2})[-.\s]*\d{4}\b'
-}
+# (✨ v2.21 정규식은 regex_helper.py로 이동 - 결합 스캐너로 1번만 컴파일)
 
 # (✨✨✨ 핵심 수정: GitHub 'Raw' URL로 변경 ✨✨✨)
 # (Selenium이 필요 없는 '진짜' 원본 파일 주소)
@@ -50,8 +44,8 @@ CRAWL_URLS = [
 # (✨ Selenium 드라이버 설정 함수 삭제)
 
 # --- 2. 봇의 '뇌' (AI 모델) 로드 ---
-def load_ner_pipeline():
-    """봇의 '뇌'(NER 모델)를 로드합니다."""
+def read_hf_token():
+    """Hugging Face 토큰 (토큰 파일 -> config.HF_TOKEN 순서, 없으면 None)"""
     token_file_path = "/root/.cache/huggingface/token"
     hf_token = None
     if os.path.exists(token_file_path):
@@ -71,15 +65,31 @@ def load_ner_pipeline():
         hf_token = getattr(config, 'HF_TOKEN', None)
         if hf_token:
              logging.info("✅ config.py에서 HF_TOKEN을 로드했습니다.")
-    
-    if not hf_token:
-        logging.error("❌ [치명적 오류] Hugging Face 토큰을 찾을 수 없어 모델을 로드할 수 없습니다.")
-        return None 
+    return hf_token
+
+def build_pipeline(tokenizer, model):
+    """로드한 모델에 추론 백엔드를 적용하고 NER 파이프라인을 만듭니다."""
+    from transformers import pipeline
+
+    # (✨ v3.8) GPU 없는 서버용 추론 백엔드 (config.NER_BACKEND = 'int8' 이면 동적 양자화)
+    backend = getattr(config, 'NER_BACKEND', NER_BACKEND)
+    if backend != 'fp32':
+        try:
+            model = apply_backend(model, backend)
+            logging.info(f"⚡ NER 추론 백엔드: {backend}")
+        except Exception as e:
+            logging.warning(f"⚠️ NER 백엔드({backend}) 적용 실패. fp32로 계속합니다: {e}")
+        
+    return pipeline("ner", model=model, tokenizer=tokenizer, device=-1, aggregation_strategy="simple")
+
+def load_teacher_pipeline(hf_token):
+    """'경력직' 뇌(my-ner-model) 파이프라인. (없으면 '신입' 뇌 BASE_MODEL, 둘 다 실패하면 None)"""
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
 
     try:
-        tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH, token=hf_token)
-        model = AutoModelForTokenClassification.from_pretrained(MODEL_PATH, token=hf_token)
-        logging.info(f"✅ '경력직' AI 뇌({MODEL_PATH}) 로드 성공!")
+        # (✨ v3.14) 링크가 가리키는 버전 폴더를 먼저 확정 -> 로드 도중 train이 새 버전을 등록해도 한 버전만 읽음
+        tokenizer, model, load_seconds = load_model(MODEL_PATH, token=hf_token)
+        logging.info(f"✅ '경력직' AI 뇌({os.path.realpath(MODEL_PATH)}) 로드 성공! ({load_seconds:.2f}초)")
     except Exception as e: 
         logging.warning(f"⚠️ '경력직' AI 뇌({MODEL_PATH}) 로드 실패. 원인: {e}")
         logging.info(f"➡️ '신입' 뇌({BASE_MODEL})를 로드합니다.")
@@ -89,167 +99,285 @@ def load_ner_pipeline():
         except Exception as e2:
             logging.error(f"❌ [치명적 오류] '신입' 뇌({BASE_MODEL}) 로드에도 실패했습니다: {e2}")
             return None
-        
-    ner_pipeline = pipeline("ner", model=model, tokenizer=tokenizer, device=-1, aggregation_strategy="simple")
-    return ner_pipeline
+    return build_pipeline(tokenizer, model)
+
+def load_student_pipeline(hf_token):
+    """(✨ v3.15) 학생 뇌(my-ner-student) 파이프라인. (아직 없거나 로드 실패면 None)"""
+    if not os.path.exists(os.path.join(STUDENT_MODEL_PATH, 'config.json')):
+        logging.warning(f"⚠️ 학생 뇌({STUDENT_MODEL_PATH})가 아직 없습니다. (python3 distill.py)")
+        return None
+    try:
+        tokenizer, model, load_seconds = load_model(STUDENT_MODEL_PATH, token=hf_token)
+    except Exception as e:
+        logging.warning(f"⚠️ 학생 뇌({STUDENT_MODEL_PATH}) 로드 실패. 원인: {e}")
+        return None
+    logging.info(f"✅ 학생 뇌({os.path.realpath(STUDENT_MODEL_PATH)}) 로드 성공! ({load_seconds:.2f}초)")
+    return build_pipeline(tokenizer, model)
+
+def active_model_path():
+    """지금 설정(config.NER_MODEL)으로 크롤링에 쓰는 뇌의 경로 (학생 뇌가 아직 없으면 '경력직' 뇌)"""
+    if (getattr(config, 'NER_MODEL', NER_MODEL) == 'student'
+            and os.path.exists(os.path.join(STUDENT_MODEL_PATH, 'config.json'))):
+        return STUDENT_MODEL_PATH
+    return MODEL_PATH
+
+def load_ner_pipeline():
+    """
+    봇의 '뇌'(NER 모델)를 로드합니다.
+    (✨ v3.15) config.NER_MODEL = 'student'면 학생 뇌를 쓰고, config.NER_SECOND_PASS_SCORE가 있으면
+               확신도가 그보다 낮은 개체만 '경력직' 뇌로 다시 판단합니다. (CascadeNER)
+    """
+    hf_token = read_hf_token()
+    if not hf_token:
+        logging.error("❌ [치명적 오류] Hugging Face 토큰을 찾을 수 없어 모델을 로드할 수 없습니다.")
+        return None 
+
+    if getattr(config, 'NER_MODEL', NER_MODEL) == 'student':
+        student = load_student_pipeline(hf_token)
+        if student is not None:
+            threshold = getattr(config, 'NER_SECOND_PASS_SCORE', NER_SECOND_PASS_SCORE)
+            if threshold is None:
+                return student
+            teacher = load_teacher_pipeline(hf_token)
+            if teacher is None:
+                logging.warning("⚠️ 2차 판독용 '경력직' 뇌 로드 실패. 학생 뇌만 사용합니다.")
+                return student
+            logging.info(f"🎓 학생 뇌 + 2차 판독(확신도 {threshold} 미만은 '경력직' 뇌로 다시 판단)")
+            return CascadeNER(student, teacher, threshold)
+        logging.info("➡️ '경력직' 뇌로 크롤링합니다.")
+    return load_teacher_pipeline(hf_token)
 
 # --- 3. (✨✨✨ 핵심 수정 v3.1: '문맥' 로직 수정 ✨✨✨) ---
+def ner_results_to_leaks(text, ner_results, packed=None):
+    """
+    NER 결과(개체 목록)를 '의심' 내역 형식으로 변환합니다.
+    (✨ v3.11) packed(PackedSegments)가 있으면 문맥을 "개체가 속한 조각" 안에서 만듭니다.
+    """
+    leaks = []
+    for entity in ner_results:
+        if entity['entity_group'] in ['PS', 'LC', 'OG', 'PII']: 
+            
+            # (✨ 신규) NER 결과에 대해서도 PII 중심의 문맥을 생성합니다.
+            if packed is not None:
+                context_preview = packed.context(entity['start'], entity['end'])
+            else:
+                context_preview = make_context(text, entity['start'], entity['end'])
+
+            leak_type = entity['entity_group']
+            if leak_type == 'PS': leak_type = 'PERSON (AI)'
+            if leak_type == 'LC': leak_type = 'LOCATION (AI)'
+            if leak_type == 'OG': leak_type = 'ORGANIZATION (AI)'
+            if leak_type == 'PII': leak_type = 'PII (Custom AI)'
+            
+            leaks.append({
+                'type': leak_type,
+                'content': entity['word'],
+                'context': context_preview, # (✨ 이제 올바른 문맥이 저장됨)
+                'score': float(entity['score']) if entity.get('score') is not None else None, # (✨ v3.13 NER 확신도)
+                'source': 'ai'
+            })
+    return leaks
+
 def find_leaks_in_text(text, ner_pipeline):
     """주어진 텍스트에서 RegEx와 NER로 PII를 찾습니다."""
     leaks = []
     if not text: 
         return leaks
         
-    # (✨ 수정) 페이지 전체 300자가 아닌, PII 주변의 문맥을 저장합니다.
-    # context_preview = text.strip().replace('\n', ' ').replace('\r', ' ')[0:300] # (버그가 있던 코드 삭제)
-    
-    for pii_type, pattern in REGEX_PATTERNS.items():
-        for match in re.finditer(pattern, text):
-            
-            # (✨ 신규) PII를 중심으로 앞뒤 150자, 총 300자 내외의 문맥을 생성합니다.
-            start = max(0, match.start() - 150)
-            end = min(len(text), match.end() + 150)
-            context_preview = text[start:end].strip().replace('\n', ' ').replace('\r', ' ')
-            
-            is_duplicate = False
-            for existing_leak in leaks:
-                if existing_leak['content'] == match.group(0):
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                leaks.append({
-                    'type': pii_type.replace('_GENERAL', ''),
-                    'content': match.group(0),
-                    'context': context_preview # (✨ 이제 올바른 문맥이 저장됨)
-                })
+    # (✨ v3.2) 결합 정규식으로 1번만 스캔 + set 기반 중복 제거 (regex_helper.py)
+    leaks.extend(find_regex_leaks(text))
             
     try:
-        # (✨ 수정) 페이지 상단 512 토큰이 아닌, 텍스트 전체를 스캔합니다.
-        ner_results = ner_pipeline(text) 
-        
-        for entity in ner_results:
-            if entity['entity_group'] in ['PS', 'LC', 'OG', 'PII']: 
-                
-                # (✨ 신규) NER 결과에 대해서도 PII 중심의 문맥을 생성합니다.
-                start = max(0, entity['start'] - 150)
-                end = min(len(text), entity['end'] + 150)
-                context_preview = text[start:end].strip().replace('\n', ' ').replace('\r', ' ')
-
-                leak_type = entity['entity_group']
-                if leak_type == 'PS': leak_type = 'PERSON (AI)'
-                if leak_type == 'LC': leak_type = 'LOCATION (AI)'
-                if leak_type == 'OG': leak_type = 'ORGANIZATION (AI)'
-                if leak_type == 'PII': leak_type = 'PII (Custom AI)'
-                
-                leaks.append({
-                    'type': leak_type,
-                    'content': entity['word'],
-                    'context': context_preview # (✨ 이제 올바른 문맥이 저장됨)
-                })
+        # (✨ v3.3) 512 토큰 윈도우로 잘라(겹침 포함) 배치 추론 후, 전역 오프셋으로 병합합니다.
+        ner_results = run_chunked_ner(text, ner_pipeline)
+        leaks.extend(ner_results_to_leaks(text, ner_results))
     except Exception as e:
         logging.error(f"❌ [AI 분석 에러] {e}")
             
     return leaks
 
 # --- 4. (✨ 수정) `requests` 기반 크롤링 함수 (OCR 비활성화) ---
-def crawl_web_page(page_url, ner_pipeline):
-    """(기능 1) `requests`로 정적 웹페이지를 크롤링합니다. (OCR은 비활성화)"""
+# (✨ v3.4) '수집(fetch)'과 '분석(analyze)'을 분리: 수집은 여러 스레드에서 동시에, 분석은 도착 순서대로.
+def fetch_page(page_url, page_cache=None):
+    """
+    `requests`로 정적 웹페이지를 가져옵니다. (스레드 풀에서 호출됨)
+    (✨ v3.6) page_cache가 있으면 조건부 요청(If-None-Match / If-Modified-Since)을 보냅니다.
+    (✨ v3.12) 공용 HTTP 클라이언트 사용: 호스트별 연결 재사용, 타임아웃/5xx 재시도, 서킷 브레이커
+    반환: requests.Response (304 Not Modified일 수 있음)
+    """
     logging.info(f"🕵️ [Requests 크롤링] 시작: {page_url}")
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
+    if page_cache is not None:
+        headers.update(page_cache.conditional_headers(page_url))
+    response = get_client().get(page_url, headers=headers, timeout=10)
+    response.raise_for_status()
+    
+    # Raw URL이므로 `response.text`가 순수 HTML입니다.
+    return response
+
+def submit_page(page_key, html_content, ner_queue):
+    """
+    페이지 1개를 처리합니다. 정규식은 즉시 실행하고, NER 조각은 배치 큐(ner_queue)에 넣습니다.
+    반환: 정규식 탐지 결과 (NER 결과는 ner_queue.flush() 때 page_key로 돌아옵니다.)
+    (✨ v3.11) HTML을 1번만 파싱해 조각(보이는 텍스트 / 주석 / 속성값 / script / code)으로 나누고,
+              탐지는 "조각마다 1번" 실행합니다. (기존: 원본 + 보이는 텍스트 = 페이지마다 2번)
+    """
     leaks_found = []
+    segments = extract_segments(html_content)
+
+    # 4-1. 정규식: 조각마다 스캔 (문맥도 그 조각 안에서 생성, 페이지 안 중복은 seen으로 제거)
+    seen = set()
+    for segment in segments:
+        leaks_found.extend(find_regex_leaks(segment.text, seen))
+
+    # 4-2. NER: 같은 종류의 조각을 이어 붙여 윈도우 수를 줄이고, 결과는 조각으로 되돌립니다.
+    for packed in pack_segments(segments):
+        ner_queue.submit((page_key, packed), packed.text)
+
+    # (OCR은 여전히 비활성화)
     
+    return leaks_found
+
+def drain_ner_queue(ner_queue):
+    """
+    배치 큐를 비우고 ([(page_key, NER 탐지 결과), ...], NER 결과를 얻지 못한 page_key 집합)을 반환합니다.
+    (flush가 실패하면 큐에 있던 모든 페이지가 실패 목록으로 돌아갑니다. 호출 측은 그 페이지를 "스캔 완료"로 기록하지 않음)
+    """
+    page_keys = {page_key for page_key, _ in ner_queue.pending_keys()}
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'}
-        response = requests.get(page_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Raw URL이므로 `response.text`가 순수 HTML입니다.
-        html_content = response.text
-        
-        # (✨ 핵심) 4-1. HTML 주석()을 포함한 원본 텍스트 전체 스캔
-        leaks_found.extend(find_leaks_in_text(html_content, ner_pipeline))
-        
-        # (✨ 핵심) 4-2. HTML 태그가 제거된, 눈에 보이는 텍스트 스캔
-        soup = BeautifulSoup(html_content, 'html.parser')
-        page_text = soup.get_text(separator=' ', strip=True)
-        leaks_found.extend(find_leaks_in_text(page_text, ner_pipeline))
+        results = ner_queue.flush()
+    except Exception as e:
+        logging.error(f"❌ [AI 분석 에러] 페이지 {len(page_keys)}개의 NER 결과를 얻지 못했습니다: {e}")
+        return [], page_keys
+    return [(page_key, ner_results_to_leaks(text, entities, packed))
+            for (page_key, packed), text, entities in results], set()
 
-        # (OCR은 여전히 비활성화)
-        
-        return leaks_found
-        
+def analyze_page(html_content, ner_pipeline):
+    """가져온 HTML 1개에서 PII를 찾습니다. (조각 단위)"""
+    ner_queue = make_ner_queue(ner_pipeline)
+    leaks_found = submit_page(None, html_content, ner_queue)
+    for _, ner_leaks in drain_ner_queue(ner_queue)[0]:
+        leaks_found.extend(ner_leaks)
+    return leaks_found
+
+def crawl_web_page(page_url, ner_pipeline):
+    """(기능 1) `requests`로 정적 웹페이지를 크롤링합니다. (OCR은 비활성화)"""
+    try:
+        return analyze_page(fetch_page(page_url).text, ner_pipeline)
     except Exception as e:
         logging.error(f"❌ [Requests 크롤링 에러] {page_url} 처리 실패: {e}")
         return []
 
+def crawl_all(urls, ner_pipeline, page_cache=None):
+    """
+    (✨ v3.4) 여러 URL을 동시에 수집하고, 도착한 페이지부터 바로 분석합니다.
+    (호스트별 예의(1초 간격, 동시 1개)는 crawl_scheduler가 보장합니다.)
+    (✨ v3.5) NER은 여러 페이지의 조각을 모아 배치로 추론합니다. (NERBatchQueue)
+    (✨ v3.6) page_cache가 있으면 304 / 본문 해시 동일 페이지는 건너뛰고, 바뀐 블록만 스캔합니다.
+              캐시 기록은 그 페이지의 정규식 + NER 결과를 모두 받은 뒤에만 합니다. (분석 실패 페이지는 다음 실행에서 다시 스캔)
+    """
+    total_leaks = []
+    ner_queue = make_ner_queue(ner_pipeline)
+    skipped = 0
+    pending_updates = {} # url -> page_cache.update 인자 (NER 결과를 받으면 기록)
+
+    def add_leaks(url, leaks):
+        for leak in leaks:
+            leak['url'] = url 
+            leak['repo'] = 'web-crawl'
+        total_leaks.extend(leaks)
+
+    def drain():
+        ner_results, failed_urls = drain_ner_queue(ner_queue)
+        for page_url, ner_leaks in ner_results:
+            add_leaks(page_url, ner_leaks)
+        for page_url, update in pending_updates.items():
+            if page_url not in failed_urls:
+                page_cache.update(page_url, **update)
+        if failed_urls and page_cache is not None:
+            logging.warning(f"⚠️ [페이지 캐시] NER 실패 페이지 {len(failed_urls)}개는 기록하지 않습니다. (다음 실행에서 다시 스캔)")
+        pending_updates.clear()
+
+    for url, response in fetch_concurrently(urls, lambda page_url: fetch_page(page_url, page_cache)):
+        if response is None:
+            continue
+
+        html_content = response.text
+        if page_cache is not None:
+            if response.status_code == 304:
+                page_cache.update(url)
+                skipped += 1
+                continue
+            html_to_scan = page_cache.changed_content(url, html_content)
+            update = dict(html_content=html_content, etag=response.headers.get('ETag'),
+                          last_modified=response.headers.get('Last-Modified'))
+            if html_to_scan is None:
+                page_cache.update(url, **update)
+                skipped += 1
+                continue
+            html_content = html_to_scan
+
+        try:
+            add_leaks(url, submit_page(url, html_content, ner_queue))
+        except Exception as e:
+            logging.error(f"❌ [페이지 분석 에러] {url} 처리 실패: {e}")
+            continue
+        if page_cache is not None:
+            pending_updates[url] = update
+        if ner_queue.is_full():
+            drain()
+
+    # 남은 조각 마저 추론
+    drain()
+
+    if skipped:
+        logging.info(f"♻️ [페이지 캐시] 변경 없는 페이지 {skipped}개는 탐지를 건너뛰었습니다.")
+    return total_leaks
+
 # --- 5. (주석 처리) 깃허브 검색 함수 ---
 # (생략)
 
-# --- 6. CSV 저장 함수 ---
-def get_existing_keys(file_path):
-    """CSV 파일에서 (content, url) 키 세트를 로드합니다."""
-    if not os.path.exists(file_path):
-        return set()
-    try:
-        df = pd.read_csv(file_path)
-        if df.empty:
-            return set()
-        df['url'] = df['url'].fillna('N/A')
-        return set(zip(df['content'], df['url']))
-    except pd.errors.EmptyDataError:
-        return set()
-    except Exception as e:
-        logging.warning(f"⚠️ {file_path} 로드 중 오류: {e}")
-        return set()
-
-def save_to_csv(all_leaks):
-    """탐지된 모든 내역을 '의심' 목록(CSV)에 '추가'합니다."""
+# --- 6. 저장 함수 ---
+def save_leaks(all_leaks):
+    """탐지된 모든 내역 중 "처음 보는" 것만 '의심' 목록(저장소, status='pending')에 '추가'합니다."""
     if not all_leaks:
         return
-            
-    new_df = pd.DataFrame(all_leaks)
-    new_df['url'] = new_df['url'].fillna('N.A')
-    
-    processed_keys = get_existing_keys(FEEDBACK_FILE)
-    pending_keys = get_existing_keys(CSV_FILE)
-    all_known_keys = processed_keys.union(pending_keys)
-    
-    is_truly_new = new_df.apply(lambda row: (row['content'], row['url']) not in all_known_keys, axis=1)
     
-    # (✨ 수정) 중복 제거 (find_leaks_in_text가 2번 호출되므로)
-    final_new_df = new_df[is_truly_new].drop_duplicates(subset=['content', 'url'])
+    # (✨ v3.10) CSV 대신 저장소(pii_guardian.db)에 저장합니다.
+    # (중복 검사(leak_keys 인덱스)와 저장이 한 트랜잭션 -> 저장 실패 시 함께 롤백)
+    with LeakStore(LEAK_STORE_FILE) as store:
+        added = store.add_new_leaks(all_leaks)
 
-    if final_new_df.empty:
+    if added == 0:
         logging.info("✅ 새로 발견된 '의심' 내역이 없습니다. (모두 기존 목록에 존재)")
         return
-
-    logging.info(f"✨ {len(final_new_df)}건의 '진짜 신규' 내역을 {CSV_FILE}에 추가합니다.")
-    final_new_df.to_csv(CSV_FILE, mode='a', header=not os.path.exists(CSV_FILE), index=False, encoding='utf-8-sig')
+    logging.info(f"✨ {added}건의 '진짜 신규' 내역을 {LEAK_STORE_FILE}에 추가했습니다.")
 
 # --- 7. 메인 실행 ---
 if __name__ == "__main__":
     logging.info("🤖 1. '신입' 봇(Crawler) 작동 시작...")
     
-    logging.info("🧠 봇의 AI 뇌(NER 모델)를 로드하는 중...")
-    ner_brain = load_ner_pipeline() # <-- 변수명이 'ner_brain'
-    if ner_brain is None:
-        logging.error("❌ AI 뇌 로드에 실패하여 '신입' 봇을 종료합니다.")
-        exit()
-    logging.info("🧠 AI 뇌 로드 완료.")
+    # (✨ v3.7) 상주 탐지 서비스(detector_server.py)가 떠 있으면 "이미 로드된" 뇌를 빌려 씁니다. (콜드 스타트 제거)
+    detector_url = getattr(config, 'DETECTOR_URL', DETECTOR_URL)
+    remote_brain = RemoteNER(detector_url)
+    if remote_brain.is_alive():
+        logging.info(f"🧠 상주 탐지 서비스({detector_url})의 AI 뇌를 사용합니다. (모델 로드 생략)")
+        ner_brain = remote_brain
+    else:
+        logging.info("🧠 봇의 AI 뇌(NER 모델)를 로드하는 중...")
+        ner_brain = load_ner_pipeline() # <-- 변수명이 'ner_brain'
+        if ner_brain is None:
+            logging.error("❌ AI 뇌 로드에 실패하여 '신입' 봇을 종료합니다.")
+            exit()
+        logging.info("🧠 AI 뇌 로드 완료.")
 
     # (✨ Selenium 드라이버 로드 코드 삭제)
     
-    total_leaks_found = []
-    
-    # (✨ `requests` 기반 크롤링으로 변경)
-    logging.info(f"🛰️ [Requests 크롤링] {len(CRAWL_URLS)}개의 URL을 스캔합니다. (OCR 비활성화)")
-    for url in CRAWL_URLS:
-        leaks = crawl_web_page(url, ner_brain) 
-        for leak in leaks:
-            leak['url'] = url 
-            leak['repo'] = 'web-crawl'
-        total_leaks_found.extend(leaks)
-        time.sleep(1) # (사이트 부하 방지)
+    # (✨ v3.4 `requests` 기반 "동시" 크롤링으로 변경 - 전역 time.sleep(1) 대신 호스트별 속도 제한)
+    logging.info(f"🛰️ [Requests 크롤링] {len(CRAWL_URLS)}개의 URL을 스캔합니다. "
+                 f"(동시 {MAX_CONCURRENCY}개, 호스트별 {PER_HOST_DELAY}초 간격, OCR 비활성화)")
+    page_cache = PageCache(PAGE_CACHE_FILE) # (✨ v3.6) 변경 없는 페이지는 건너뜀
+    total_leaks_found = crawl_all(CRAWL_URLS, ner_brain, page_cache)
 
     # (✨ Selenium 드라이버 종료 코드 삭제)
 
@@ -257,9 +385,13 @@ if __name__ == "__main__":
             
     # 최종 결과 저장 (로그 추가)
     if total_leaks_found:
-        logging.info(f"✅ 총 {len(total_leaks_found)}개의 PII를 탐지했습니다. CSV 저장을 시작합니다.")
-        save_to_csv(total_leaks_found)
+        logging.info(f"✅ 총 {len(total_leaks_found)}개의 PII를 탐지했습니다. 저장을 시작합니다.")
+        save_leaks(total_leaks_found)
     else:
-        logging.info("✅ PII 탐지 결과: 0건. CSV 파일을 생성하지 않습니다.") 
+        logging.info("✅ PII 탐지 결과: 0건. 저장할 내역이 없습니다.") 
+
+    # (✨ v3.6) 탐지 결과를 저장한 "뒤에" 캐시를 저장합니다. (중간에 죽으면 다음 실행에서 다시 스캔)
+    page_cache.save()
+    get_client().log_metrics() # (✨ v3.12) 호스트별 요청/에러/지연 시간
     
     logging.info("🤖 1. '신입' 봇(Crawler) 작동 완료.")
\ No newline at end of file
@@ -1,7 +1,7 @@
 # 📊 (핵심) 'AI 팩토리 중앙 관제소' (모니터링 전용)
-# (v2.0 - 수동 제어 버튼 삭제, 스케줄 뷰어 추가, 저장 버튼 삭제)
+# (v2.1 - CSV 대신 SQLite 저장소 읽기 전용 조회)
 # ----------------------------------------------------
-# 1. 봇이 생성한 데이터(CSV)를 확인
+# 1. 봇이 생성한 데이터(저장소)를 확인
 # 2. 봇이 남긴 로그(LOG)를 실시간으로 확인
 # 3. 봇의 자동 실행 스케줄(Crontab)을 확인
 # ----------------------------------------------------
@@ -11,19 +11,22 @@ import pandas as pd
 import os
 import subprocess # (제거 대상)
 import time
+from leak_store import LeakStore # (✨ v2.1) CSV 대신 저장소 조회
 
 # --- 1. 경로 설정 (NCP 서버의 절대 경로) ---
 BASE_PATH = "/root/PII-Guardian" 
 # (수동 실행 스크립트 경로 제거)
 
-DETECTED_FILE = os.path.join(BASE_PATH, "detected_leaks.csv")
-FEEDBACK_FILE = os.path.join(BASE_PATH, "feedback_data.csv")
+# (✨ v2.1) CSV 대신 저장소(pii_guardian.db)를 "읽기 전용"으로 조회합니다.
+LEAK_STORE_FILE = os.path.join(BASE_PATH, "pii_guardian.db")
+VIEWER_ROW_LIMIT = 1000 # 데이터 뷰어에 표시할 최대 행 수 (최신순)
 README_FILE = os.path.join(BASE_PATH, "README.md")
 
 LOG_FILES = {
     "Crawler Log (신입 봇)": os.path.join(BASE_PATH, "crawler.log"),
     "Labeler Log (전문가 봇)": os.path.join(BASE_PATH, "autolabeler.log"),
-    "Train Log (학습기)": os.path.join(BASE_PATH, "train.log")
+    "Train Log (학습기)": os.path.join(BASE_PATH, "train.log"),
+    "Detector Log (탐지 서비스)": os.path.join(BASE_PATH, "detector.log")
 }
 
 # --- 2. 봇 실행 함수 (✨ v2.0: 삭제) ---
@@ -44,15 +47,24 @@ def read_log_file(log_path):
     except Exception as e:
         return f"로그 읽기 오류: {e}"
 
-# --- 4. 데이터 읽기 함수 (기존과 동일) ---
+# --- 4. 데이터 읽기 함수 (✨ v2.1: 저장소 조회) ---
 @st.cache_data(ttl=10) # 10초마다 데이터 새로고침
-def load_csv(file_path):
-    if os.path.exists(file_path):
-        try:
-            return pd.read_csv(file_path)
-        except pd.errors.EmptyDataError:
-            return pd.DataFrame() # 빈 파일일 경우
-    return pd.DataFrame()
+def load_counts():
+    """상태별 건수 (pending, labeled)"""
+    if not os.path.exists(LEAK_STORE_FILE):
+        return 0, 0
+    with LeakStore(LEAK_STORE_FILE, read_only=True) as store:
+        return store.count('pending'), store.count('labeled')
+
+@st.cache_data(ttl=10)
+def load_leaks(status):
+    """상태별 최신 행 (읽기 전용, 최대 VIEWER_ROW_LIMIT행)"""
+    if not os.path.exists(LEAK_STORE_FILE):
+        return pd.DataFrame()
+    with LeakStore(LEAK_STORE_FILE, read_only=True) as store:
+        if status == 'pending':
+            return store.query("status = 'pending'", order_by='id DESC', limit=VIEWER_ROW_LIMIT)
+        return store.labeled_leaks(limit=VIEWER_ROW_LIMIT, newest_first=True)
 
 # --- (신규) README 마크다운 로드 (기존과 동일) ---
 @st.cache_data
@@ -86,18 +98,17 @@ with tab_status:
     
     # 실시간 현황판 (기존과 동일)
     col_metric1, col_metric2 = st.columns(2)
-    df_detected = load_csv(DETECTED_FILE)
-    df_feedback = load_csv(FEEDBACK_FILE)
+    pending_count, labeled_count = load_counts()
     
     col_metric1.metric(
         label="🕵️ 처리 대기 ('신입' 봇 발견)", 
-        value=f"{len(df_detected)} 건",
-        help="crawler.py가 발견하여 detected_leaks.csv에 쌓인 '의심' 목록입니다."
+        value=f"{pending_count} 건",
+        help="crawler.py가 발견하여 저장소에 쌓인 '의심' 목록(status='pending')입니다."
     )
     col_metric2.metric(
         label="✅ 누적 처리 완료 ('전문가' 봇 판단)", 
-        value=f"{len(df_feedback)} 건",
-        help="autolabeler.py가 HyperCLOVA에 물어보고 feedback_data.csv에 누적한 '정답' 목록입니다."
+        value=f"{labeled_count} 건",
+        help="autolabeler.py가 HyperCLOVA에 물어보고 저장소에 누적한 '정답' 목록(status='labeled')입니다."
     )
     
     if st.button("현황판 새로고침 🔄"):
@@ -147,10 +158,10 @@ with tab_data_viewer:
         st.cache_data.clear()
         st.rerun()
         
-    st.subheader(f"✅ '누적 정답' 목록 ({FEEDBACK_FILE})")
+    st.subheader(f"✅ '누적 정답' 목록 ({LEAK_STORE_FILE}, 최신 {VIEWER_ROW_LIMIT}건)")
     
     # (✨✨✨ v2.0: 'st.data_editor' -> 'st.dataframe'으로 변경하여 읽기 전용으로)
-    df_feedback_readonly = load_csv(FEEDBACK_FILE)
+    df_feedback_readonly = load_leaks('labeled')
     st.dataframe(df_feedback_readonly, use_container_width=True)
 
     # (✨✨✨ v2.0: '변경사항 저장' 버튼 삭제) ---
@@ -158,8 +169,8 @@ with tab_data_viewer:
 
     st.divider()
     
-    st.subheader(f"📝 '처리 대기' 목록 ({DETECTED_FILE}) - (읽기 전용)")
-    df_detected_readonly = load_csv(DETECTED_FILE)
+    st.subheader(f"📝 '처리 대기' 목록 ({LEAK_STORE_FILE}, 최신 {VIEWER_ROW_LIMIT}건) - (읽기 전용)")
+    df_detected_readonly = load_leaks('pending')
     st.dataframe(df_detected_readonly, use_container_width=True)
 
 
@@ -0,0 +1,231 @@
+# 🛰️ (서비스) 상주 탐지 서비스 - '따뜻한(warm)' AI 뇌로 PII를 탐지합니다.
+# ----------------------------------------------------
+# 1. NER 모델을 "한 번만" 로드해 메모리에 유지합니다. (cron마다 반복되던 콜드 스타트 제거)
+# 2. 로컬 HTTP API (텍스트 입력 -> 탐지 결과 출력)
+#    - POST /detect {"texts": [...]} -> {"leaks": [[...], ...]}    (정규식 + NER)
+#    - POST /ner    {"texts": [...]} -> {"entities": [[...], ...]} (NER만, crawler.py의 RemoteNER가 사용)
+#    - GET  /health
+# 3. 동시에 들어온 요청을 잠깐 모아 한 번의 배치로 추론합니다. (DetectorWorker)
+# 4. 모델 폴더(my-ner-model)가 바뀌면(train.py 재학습 완료) 자동으로 다시 로드합니다.
+#    (✨ 추가) my-ner-model이 버전 링크(model_registry)면 "가리키는 버전"이 바뀔 때 바로 다시 로드합니다. (저장 완료 대기 없음)
+#    (✨ 추가) config.NER_MODEL = 'student'면 학생 뇌(my-ner-student, distill.py) 링크와 '경력직' 뇌 링크를 함께 봅니다.
+#             (서비스 시작 뒤에 나온 학생 뇌도, 2차 판독용 '경력직' 뇌의 새 버전도 다시 로드)
+#
+# 실행: python3 detector_server.py  (crawler.py는 서비스가 떠 있으면 자동으로 사용)
+# ----------------------------------------------------
+
+import os
+import queue
+import threading
+import time
+import logging
+from flask import Flask, request, jsonify
+
+import config
+import crawler # (load_ner_pipeline, 정규식/NER 결과 변환 함수 재사용)
+from ner_helper import NERBatchQueue
+
+# --- 1. 설정값 ---
+DETECTOR_HOST = '127.0.0.1'
+DETECTOR_PORT = getattr(config, 'DETECTOR_PORT', 8765)
+BATCH_WAIT_SECONDS = 0.05   # 첫 요청 이후 다른 요청을 기다려 배치에 합치는 시간
+MAX_BATCH_TEXTS = 256       # 배치 1개에 합칠 최대 텍스트 수
+MODEL_CHECK_INTERVAL = 10   # 모델 폴더 변경 확인 주기(초)
+MODEL_SETTLE_SECONDS = 30   # 마지막 파일 수정 후 이만큼 지나야 다시 로드 (저장 중인 모델 로드 방지)
+
+
+def get_model_signature(model_path):
+    """
+    모델 폴더의 (파일 이름, 수정 시각) 목록. 폴더가 없으면 None.
+    (✨ 추가) 버전 링크면 가리키는 버전 폴더 경로 (버전 폴더는 저장이 끝난 뒤에만 링크됨)
+    """
+    if os.path.islink(model_path):
+        return os.path.realpath(model_path) if os.path.isdir(model_path) else None
+    if not os.path.isdir(model_path):
+        return None
+    return tuple(sorted((entry.name, entry.stat().st_mtime)
+                        for entry in os.scandir(model_path) if entry.is_file()))
+
+
+def watched_model_paths():
+    """지금 설정으로 로드되는 뇌 폴더 목록 (학생 뇌 모드면 학생 뇌 + 2차 판독/대체용 '경력직' 뇌)"""
+    if getattr(config, 'NER_MODEL', crawler.NER_MODEL) == 'student':
+        return [crawler.STUDENT_MODEL_PATH, crawler.MODEL_PATH]
+    return [crawler.MODEL_PATH]
+
+
+def get_models_signature():
+    """{뇌 폴더: 시그니처} (지켜보는 폴더 중 하나라도 바뀌면 값이 달라짐)"""
+    return {path: get_model_signature(path) for path in watched_model_paths()}
+
+
+# --- 2. 배치 추론 워커 ---
+class DetectorWorker(threading.Thread):
+    """요청 큐에서 작업을 모아 배치로 추론하고, 모델이 바뀌면 다시 로드하는 백그라운드 스레드"""
+
+    def __init__(self, loader=crawler.load_ner_pipeline):
+        super().__init__(daemon=True)
+        self.model_path = crawler.active_model_path()
+        self.loader = loader
+        self.jobs = queue.Queue()
+        self.ner_pipeline = None
+        self.model_signature = None
+        self.loaded_at = None
+        self._last_check = 0
+
+    def load_model(self):
+        signature = get_models_signature()
+        ner_pipeline = self.loader()
+        if ner_pipeline is None:
+            logging.error("❌ [탐지 서비스] AI 뇌 로드 실패. 기존 뇌를 계속 사용합니다.")
+            return
+        self.ner_pipeline = ner_pipeline
+        self.model_signature = signature
+        self.model_path = crawler.active_model_path()
+        self.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        logging.info(f"🧠 [탐지 서비스] AI 뇌 로드 완료 ({self.loaded_at})")
+
+    def reload_if_changed(self):
+        """
+        모델 폴더가 바뀌었고, 저장이 끝난 것으로 보이면 다시 로드합니다.
+        (매번 설정과 링크를 다시 확인 -> 시작 뒤에 나온 학생 뇌, '경력직' 뇌의 새 버전도 반영)
+        """
+        now = time.time()
+        if now - self._last_check < MODEL_CHECK_INTERVAL:
+            return
+        self._last_check = now
+
+        signature = get_models_signature()
+        if all(sig is None for sig in signature.values()) or signature == self.model_signature:
+            return
+        previous = self.model_signature or {}
+        changed = [path for path, sig in signature.items() if sig != previous.get(path)]
+        for path in changed:
+            sig = signature[path]
+            newest_mtime = max((mtime for _, mtime in sig), default=0) if isinstance(sig, tuple) else 0
+            if now - newest_mtime < MODEL_SETTLE_SECONDS:
+                return # (아직 train.py/distill.py가 저장 중일 수 있음)
+        logging.info(f"🔄 [탐지 서비스] 모델 폴더 변경 감지({', '.join(changed)}). AI 뇌를 다시 로드합니다.")
+        self.load_model()
+
+    def submit(self, texts):
+        """텍스트 목록을 큐에 넣고, 배치 추론이 끝날 때까지 기다려 개체 목록을 반환합니다."""
+        job = {'texts': texts, 'done': threading.Event(), 'result': None, 'error': None}
+        self.jobs.put(job)
+        job['done'].wait()
+        if job['error']:
+            raise RuntimeError(job['error'])
+        return job['result']
+
+    def _collect_batch(self):
+        """첫 작업이 오면 BATCH_WAIT_SECONDS 동안 더 모아서 반환합니다."""
+        batch = [self.jobs.get()]
+        num_texts = len(batch[0]['texts'])
+        deadline = time.monotonic() + BATCH_WAIT_SECONDS
+        while num_texts < MAX_BATCH_TEXTS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self.jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(job)
+            num_texts += len(job['texts'])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                self.reload_if_changed()
+                ner_queue = NERBatchQueue(self.ner_pipeline)
+                for job_index, job in enumerate(batch):
+                    job['result'] = [[] for _ in job['texts']]
+                    for text_index, text in enumerate(job['texts']):
+                        ner_queue.submit((job_index, text_index), text)
+                for (job_index, text_index), _, entities in ner_queue.flush():
+                    batch[job_index]['result'][text_index] = [to_json_entity(e) for e in entities]
+            except Exception as e:
+                logging.error(f"❌ [탐지 서비스] 배치 추론 에러: {e}")
+                for job in batch:
+                    job['error'] = str(e)
+            finally:
+                for job in batch:
+                    job['done'].set()
+
+
+def to_json_entity(entity):
+    """파이프라인 결과(numpy float 포함)를 JSON으로 보낼 수 있는 형태로 바꿉니다."""
+    return {
+        'entity_group': entity['entity_group'],
+        'score': float(entity['score']),
+        'word': entity['word'],
+        'start': int(entity['start']),
+        'end': int(entity['end'])
+    }
+
+
+# --- 3. HTTP API ---
+app = Flask(__name__)
+worker = DetectorWorker()
+
+def get_texts():
+    payload = request.get_json(silent=True) or {}
+    texts = payload.get('texts')
+    if texts is None and 'text' in payload:
+        texts = [payload['text']]
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return None
+    return texts
+
+def active_model_version():
+    """지금 쓰는 뇌가 버전 링크면 그 버전 이름 (아니면 None)"""
+    signature = (worker.model_signature or {}).get(worker.model_path)
+    return os.path.basename(signature) if isinstance(signature, str) else None
+
+@app.route('/health')
+def health():
+    return jsonify({
+        'status': 'ok',
+        'model_loaded': worker.ner_pipeline is not None,
+        'model_path': worker.model_path,
+        'model_version': active_model_version(),
+        'loaded_at': worker.loaded_at,
+        'queue_size': worker.jobs.qsize()
+    })
+
+@app.route('/ner', methods=['POST'])
+def ner():
+    texts = get_texts()
+    if texts is None:
+        return jsonify({'error': '"texts"(문자열 리스트)가 필요합니다.'}), 400
+    try:
+        return jsonify({'entities': worker.submit(texts)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/detect', methods=['POST'])
+def detect():
+    texts = get_texts()
+    if texts is None:
+        return jsonify({'error': '"texts"(문자열 리스트)가 필요합니다.'}), 400
+    try:
+        entities_per_text = worker.submit(texts)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    leaks = []
+    for text, entities in zip(texts, entities_per_text):
+        leaks.append(crawler.find_regex_leaks(text) + crawler.ner_results_to_leaks(text, entities))
+    return jsonify({'leaks': leaks})
+
+
+if __name__ == '__main__':
+    logging.info("🛰️ 상주 탐지 서비스 시작... AI 뇌를 로드합니다.")
+    worker.load_model()
+    if worker.ner_pipeline is None:
+        logging.error("❌ AI 뇌 로드에 실패하여 탐지 서비스를 종료합니다.")
+        exit()
+    worker.start()
+    app.run(host=DETECTOR_HOST, port=DETECTOR_PORT, threaded=True)
@@ -0,0 +1,369 @@
+# 🧪 (봇 3-1) '증류' 봇. '경력직' 뇌(teacher)의 판단을 작은 '학생' 뇌(student)에 옮겨 담기 -> my-ner-student
+# ----------------------------------------------------
+# 'train.py'가 새 뇌를 등록한 뒤 남은 시간 안에서 이어서 실행합니다. (단독 실행: python3 distill.py)
+# (기존: crawler가 모든 페이지를 klue/roberta-base(12층, hidden 768) 전체로 CPU 추론 -> 페이지당 지연의 대부분.
+#        하지만 실제로 학습하는 과제는 O / B-PII / I-PII 태그 3개뿐)
+# 1. 학생 뇌: teacher 설정에서 층 수(STUDENT_LAYERS)와 hidden 크기(STUDENT_HIDDEN_SIZE)만 줄인 같은 구조
+#    - 토크나이저/어휘는 teacher 것을 그대로 씁니다. (crawler의 윈도우 분할, 2차 판독 구간이 그대로 맞음)
+#    - 임베딩은 teacher 단어 임베딩의 주성분(SVD) 방향으로 줄여서 시작합니다. (층은 무작위 초기화)
+#    - 현재 학생 뇌가 같은 모양이면 거기서 이어서 학습합니다.
+# 2. 코퍼스: 저장소(pii_guardian.db)에 쌓인 크롤링 문맥 (라벨/상태 무관, 최신 DISTILL_MAX_ROWS개, 같은 문맥은 1번)
+#    - 검증용 '유출' 행(id % HOLDOUT_EVERY = 0, train.py와 같은 분할)의 문맥은 빼고 평가에만 씁니다.
+# 3. soft label: teacher의 토큰별 logits를 한 번 추론해 둡니다.
+#    loss = T² x KL(teacher / T || student / T)  (+ '유출' 정답이 있는 문맥은 DISTILL_HARD_WEIGHT x 정답 태그 CE)
+# 4. 평가: 검증 세트에서 teacher와 학생의 개체 F1 / 재현율을 재고, 재현율 하락이 MAX_STUDENT_RECALL_DROP 이하일 때만
+#    'my-ner-student' 링크를 새 학생으로 바꿉니다. (넘으면 버전 등록만, 검증 세트가 작아 잴 수 없어도 등록만)
+# 5. 학생 뇌 버전 저장소: my-ner-student-versions/ (model_registry, metadata.json에 teacher 버전 / 재현율 / 추론 지연)
+#    teacher 버전이 그대로면 다시 증류하지 않습니다. (--force로 강제)
+#
+# 크롤링에 쓰려면 config.NER_MODEL = 'student' (+ 선택: config.NER_SECOND_PASS_SCORE = 0.9 -> 낮은 확신도 개체만 teacher로)
+# ----------------------------------------------------
+
+import copy
+import os
+import shutil
+import time
+import datetime
+import logging
+
+import torch
+import torch.nn.functional as F
+from datasets import Dataset
+from transformers import AutoModelForTokenClassification, TrainingArguments, EarlyStoppingCallback
+
+import config
+from leak_store import LeakStore, LEAK_STORE_FILE
+from train import ( # (teacher와 같은 토큰화 / 태그 규칙 / 검증 분할)
+    tag_spans, label2id, MAX_LENGTH, HOLDOUT_EVERY, VALIDATION_MAX_ROWS, VALIDATION_MIN_ROWS,
+    EARLY_STOPPING_PATIENCE, EARLY_STOPPING_THRESHOLD, REPLAY_SEED
+)
+from train_batching import TokenBudgetBatchSampler, TokenBudgetCollator, TokenBudgetTrainer, TRAIN_MAX_BATCH_TOKENS
+from train_eval import DeadlineCallback, compute_metrics, argmax_logits, METRIC_NAME
+from model_registry import ModelRegistry, load_model, measure_latency
+
+# --- 1. 설정값 ---
+BASE_PATH = "/root/PII-Guardian"
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    handlers=[logging.StreamHandler()])
+
+MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model')                        # 🧠 teacher ('경력직' 뇌 현재 버전 링크)
+STUDENT_MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-student')              # 🎓 학생 뇌 (현재 버전 링크)
+STUDENT_VERSIONS_DIR = os.path.join(BASE_PATH, 'my-ner-student-versions')
+CHECKPOINT_DIR = os.path.join(BASE_PATH, 'distill-checkpoints')             # 학습 중간 과정 (끝나면 삭제)
+CORPUS_COLUMNS = ['id', 'content', 'context', 'llm_label']
+
+# 학생 뇌 크기 / 증류 예산 (config.py에서 덮어쓸 수 있음)
+STUDENT_LAYERS = 4                # teacher 12층 -> 4층
+STUDENT_HIDDEN_SIZE = 384         # teacher 768 -> 384 (attention head는 64차원씩)
+STUDENT_REGISTRY_KEEP = 3         # 남길 학생 버전 수
+DISTILL_MAX_ROWS = 5000           # 코퍼스 최대 문맥 수 (최신 행부터)
+DISTILL_TEMPERATURE = 2.0         # soft label 온도 (높을수록 teacher의 "덜 확신한" 태그 정보까지 전달)
+DISTILL_HARD_WEIGHT = 0.5         # '유출' 정답 태그 CE의 가중치 (0이면 soft label만)
+DISTILL_EPOCHS = 3
+DISTILL_MAX_STEPS = 1500          # 1회 최대 학습 스텝
+DISTILL_LEARNING_RATE = 1e-4      # (층이 무작위 초기화라 fine-tuning보다 크게)
+DISTILL_EVAL_STEPS = 100
+DISTILL_DEADLINE_MINUTES = 60     # 단독 실행 시 시작 후 이 시간 안에 끝냄 (train.py에서 부르면 train의 마감 시각)
+DISTILL_MIN_MINUTES = 10          # 마감까지 이보다 적게 남았으면 이번에는 증류하지 않음
+MAX_STUDENT_RECALL_DROP = 0.05    # teacher 대비 검증 재현율 하락 허용 폭 (넘으면 현재 학생 뇌로 바꾸지 않음)
+
+
+# --- 2. 학생 뇌 만들기 ---
+def student_config(teacher_config, num_layers, hidden_size):
+    """teacher 설정에서 층 수 / hidden 크기만 줄인 설정 (어휘, 태그 정의, 위치 임베딩 길이는 그대로)"""
+    student = copy.deepcopy(teacher_config)
+    student.num_hidden_layers = num_layers
+    student.hidden_size = hidden_size
+    student.num_attention_heads = max(1, hidden_size // 64)
+    student.intermediate_size = hidden_size * 4
+    return student
+
+def init_student(teacher, num_layers, hidden_size):
+    """새 학생 뇌. 임베딩은 teacher 단어 임베딩의 주성분 hidden_size개 방향으로 투영해서 시작합니다."""
+    student = AutoModelForTokenClassification.from_config(student_config(teacher.config, num_layers, hidden_size))
+    teacher_embeddings = getattr(teacher.base_model, 'embeddings', None)
+    student_embeddings = getattr(student.base_model, 'embeddings', None)
+    if teacher_embeddings is None or student_embeddings is None or hidden_size > teacher.config.hidden_size:
+        return student
+    with torch.no_grad():
+        words = teacher_embeddings.word_embeddings.weight.float()
+        basis = torch.linalg.svd(words - words.mean(dim=0), full_matrices=False).Vh[:hidden_size].T
+        for name in ('word_embeddings', 'position_embeddings', 'token_type_embeddings'):
+            source, target = getattr(teacher_embeddings, name, None), getattr(student_embeddings, name, None)
+            if source is not None and target is not None and source.weight.shape[0] == target.weight.shape[0]:
+                target.weight.copy_(source.weight.float() @ basis)
+    return student
+
+def load_or_init_student(teacher, num_layers, hidden_size):
+    """(학생 뇌, 이어서 학습 여부): 현재 학생 뇌가 같은 모양(층/hidden/어휘/태그)이면 그것을, 아니면 새로 만듭니다."""
+    if os.path.exists(os.path.join(STUDENT_MODEL_PATH, 'config.json')):
+        try:
+            _, student, _ = load_model(STUDENT_MODEL_PATH)
+            shape = (student.config.num_hidden_layers, student.config.hidden_size,
+                     student.config.vocab_size, student.config.label2id)
+            if shape == (num_layers, hidden_size, teacher.config.vocab_size, teacher.config.label2id):
+                logging.info(f"🎓 현재 학생 뇌({os.path.realpath(STUDENT_MODEL_PATH)})에서 이어서 증류합니다.")
+                return student, True
+            logging.info("🎓 현재 학생 뇌와 모양이 달라 새로 만듭니다.")
+        except Exception as e:
+            logging.warning(f"⚠️ 현재 학생 뇌({STUDENT_MODEL_PATH}) 로드 실패({e}). 새로 만듭니다.")
+    return init_student(teacher, num_layers, hidden_size), False
+
+def count_parameters(model):
+    return sum(parameter.numel() for parameter in model.parameters())
+
+
+# --- 3. 코퍼스 + soft label ---
+def find_span(context, content):
+    start = context.find(content) if context and content else -1
+    return (start, start + len(content)) if start != -1 else None
+
+def load_corpus(holdout_every, limit):
+    """(코퍼스 DataFrame, 검증 DataFrame) - 코퍼스에서 검증 문맥은 빼고, 같은 문맥은 '유출' 행을 우선해 1번만"""
+    with LeakStore(LEAK_STORE_FILE) as store:
+        corpus_df = store.query("context IS NOT NULL AND context != ''", columns=CORPUS_COLUMNS,
+                                order_by='id DESC', limit=limit)
+        holdout_df = store.holdout_leaks(holdout_every, columns=CORPUS_COLUMNS,
+                                         limit=getattr(config, 'VALIDATION_MAX_ROWS', VALIDATION_MAX_ROWS))
+    corpus_df = corpus_df[~corpus_df['context'].isin(set(holdout_df['context']))]
+    corpus_df = (corpus_df.assign(gold=corpus_df['llm_label'].eq('유출'))
+                 .sort_values('gold', ascending=False, kind='stable')
+                 .drop_duplicates('context'))
+    return corpus_df, holdout_df
+
+def build_dataset(contexts, spans, tokenizer):
+    """spans[i]: 정답 PII 위치 (start, end) 또는 None (정답 없음 -> 태그 CE에서 제외, soft label만)"""
+    encoded = tag_spans(contexts, [span or (0, 0) for span in spans], tokenizer)
+    encoded['labels'] = [labels if span else [-100] * len(labels) for labels, span in zip(encoded['labels'], spans)]
+    return Dataset.from_dict(encoded)
+
+def add_teacher_logits(teacher, dataset, pad_token_id, max_tokens):
+    """teacher를 한 번 추론해 샘플마다 토큰별 logits(길이 x 태그 수)를 'teacher_logits' 열로 붙입니다."""
+    collator = TokenBudgetCollator(pad_token_id)
+    sampler = TokenBudgetBatchSampler([len(ids) for ids in dataset['input_ids']], max_tokens=max_tokens, shuffle=False)
+    rows = dataset.to_list()
+    logits = [None] * len(rows)
+    teacher.eval()
+    with torch.inference_mode():
+        for indices in sampler.batches():
+            batch = collator([rows[index] for index in indices])
+            batch.pop('labels')
+            output = teacher(**{key: value.to(teacher.device) for key, value in batch.items()}).logits.float().cpu()
+            for position, index in enumerate(indices):
+                logits[index] = output[position, :len(rows[index]['input_ids'])].numpy().round(4).tolist()
+    return dataset.add_column('teacher_logits', logits)
+
+
+# --- 4. 증류 Trainer ---
+class DistillCollator(TokenBudgetCollator):
+    """TokenBudgetCollator + teacher_logits 패딩 (평가 샘플처럼 teacher_logits가 없으면 그대로)"""
+
+    def __call__(self, features):
+        if 'teacher_logits' not in features[0]:
+            return super().__call__(features)
+        batch = super().__call__([{key: value for key, value in feature.items() if key != 'teacher_logits'}
+                                  for feature in features])
+        width = batch['input_ids'].shape[1]
+        padding = [0.0] * len(features[0]['teacher_logits'][0])
+        batch['teacher_logits'] = torch.tensor([feature['teacher_logits'] + [padding] * (width - len(feature['teacher_logits']))
+                                                for feature in features])
+        return batch
+
+class DistillTrainer(TokenBudgetTrainer):
+    """loss = T² x KL(teacher || student) (패딩 제외 토큰 평균) + hard_weight x 정답 태그 CE"""
+
+    def __init__(self, *args, temperature=DISTILL_TEMPERATURE, hard_weight=DISTILL_HARD_WEIGHT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.hard_weight = hard_weight
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        teacher_logits = inputs.pop('teacher_logits', None)
+        if teacher_logits is None: # (검증 세트: 정답 태그 CE)
+            return super().compute_loss(model, inputs, return_outputs=return_outputs, **kwargs)
+        labels = inputs.pop('labels')
+        outputs = model(**inputs)
+        mask = inputs['attention_mask'].bool()
+        t = self.temperature
+        loss = F.kl_div(F.log_softmax(outputs.logits[mask] / t, dim=-1), F.softmax(teacher_logits[mask] / t, dim=-1),
+                        reduction='batchmean') * t * t
+        if self.hard_weight and (labels != -100).any():
+            loss = loss + self.hard_weight * F.cross_entropy(outputs.logits.view(-1, outputs.logits.size(-1)),
+                                                             labels.view(-1), ignore_index=-100)
+        return (loss, outputs) if return_outputs else loss
+
+def evaluate_model(trainer, model):
+    """trainer의 검증 세트로 다른 모델(teacher)을 평가합니다. 반환: {'entity_f1', 'entity_recall', ...}"""
+    original, trainer.model = trainer.model, model.to(trainer.args.device)
+    try:
+        scores = trainer.evaluate()
+    finally:
+        trainer.model = original
+    return {key[len('eval_'):]: round(value, 4) for key, value in scores.items() if key.startswith('eval_entity_')}
+
+
+# --- 5. 메인 실행 ---
+def main(deadline=None, force=False):
+    logging.info("🤖 3-1. '증류' 봇 작동 시작...")
+    if deadline is None:
+        minutes = getattr(config, 'DISTILL_DEADLINE_MINUTES', DISTILL_DEADLINE_MINUTES)
+        deadline = time.time() + minutes * 60 if minutes else None
+    if deadline is not None and deadline - time.time() < getattr(config, 'DISTILL_MIN_MINUTES', DISTILL_MIN_MINUTES) * 60:
+        logging.info(f"⏰ 마감({datetime.datetime.fromtimestamp(deadline).strftime('%H:%M')})까지 시간이 부족해 "
+                     f"이번에는 증류하지 않습니다.")
+        return
+
+    # 1. teacher (현재 '경력직' 뇌) - 이미 이 버전으로 증류했으면 건너뜀
+    student_registry = ModelRegistry(STUDENT_MODEL_PATH, STUDENT_VERSIONS_DIR,
+                                     keep=getattr(config, 'STUDENT_REGISTRY_KEEP', STUDENT_REGISTRY_KEEP))
+    teacher_version = os.path.basename(os.path.realpath(MODEL_PATH))
+    current_student = student_registry.current_version()
+    if (not force and current_student
+            and student_registry.metadata(current_student).get('teacher_version') == teacher_version):
+        logging.info(f"✅ 현재 학생 뇌({current_student})가 이미 teacher {teacher_version}에서 증류되었습니다.")
+        return
+    try:
+        tokenizer, teacher, _ = load_model(MODEL_PATH)
+    except Exception as e:
+        logging.error(f"❌ teacher({MODEL_PATH}) 로드 실패. 증류를 중단합니다: {e}")
+        return
+    if teacher.config.label2id != label2id:
+        logging.error(f"❌ teacher의 태그 정의가 다릅니다({teacher.config.label2id}). 증류를 중단합니다.")
+        return
+
+    # 2. 코퍼스 + 검증 세트
+    holdout_every = getattr(config, 'HOLDOUT_EVERY', HOLDOUT_EVERY)
+    try:
+        corpus_df, holdout_df = load_corpus(holdout_every, getattr(config, 'DISTILL_MAX_ROWS', DISTILL_MAX_ROWS))
+    except Exception as e:
+        logging.error(f"❌ 저장소 로드 중 에러: {e}")
+        return
+    if corpus_df.empty:
+        logging.info("✅ 증류할 크롤링 문맥이 없습니다.")
+        return
+    spans = [find_span(context, content) if gold else None
+             for context, content, gold in zip(corpus_df['context'], corpus_df['content'].fillna('').astype(str),
+                                               corpus_df['gold'])]
+    train_dataset = build_dataset(corpus_df['context'].tolist(), spans, tokenizer)
+    holdout_spans = [(context, find_span(context, content)) for context, content in
+                     zip(holdout_df['context'].fillna('').astype(str), holdout_df['content'].fillna('').astype(str))]
+    holdout_spans = [(context, span) for context, span in holdout_spans if span]
+    eval_dataset = None
+    if len(holdout_spans) >= getattr(config, 'VALIDATION_MIN_ROWS', VALIDATION_MIN_ROWS):
+        eval_dataset = build_dataset([context for context, _ in holdout_spans],
+                                     [span for _, span in holdout_spans], tokenizer)
+    else:
+        logging.warning(f"⚠️ 검증 샘플이 {len(holdout_spans)}개뿐이라 재현율 하락을 잴 수 없습니다. "
+                        f"학생 뇌는 등록만 하고 현재 학생 뇌로 바꾸지 않습니다.")
+
+    max_tokens = getattr(config, 'TRAIN_MAX_BATCH_TOKENS', TRAIN_MAX_BATCH_TOKENS) or MAX_LENGTH * 2
+    started = time.perf_counter()
+    train_dataset = add_teacher_logits(teacher, train_dataset, tokenizer.pad_token_id, max_tokens)
+    logging.info(f"🧑‍🏫 teacher({teacher_version}) soft label: 문맥 {len(train_dataset)}개 "
+                 f"(정답 태그 포함 {sum(span is not None for span in spans)}개), {time.perf_counter() - started:.1f}초")
+
+    # 3. 학생 뇌 학습 (train.py와 같은 토큰 수 예산 배치 / 검증 F1 / 조기 종료 / 마감 시각)
+    num_layers = getattr(config, 'STUDENT_LAYERS', STUDENT_LAYERS)
+    hidden_size = getattr(config, 'STUDENT_HIDDEN_SIZE', STUDENT_HIDDEN_SIZE)
+    student, warm_started = load_or_init_student(teacher, num_layers, hidden_size)
+    logging.info(f"🎓 학생 뇌: {num_layers}층, hidden {hidden_size}, 파라미터 {count_parameters(student) / 1e6:.1f}M "
+                 f"(teacher {teacher.config.num_hidden_layers}층, hidden {teacher.config.hidden_size}, "
+                 f"{count_parameters(teacher) / 1e6:.1f}M)")
+
+    batch_sampler = TokenBudgetBatchSampler([len(ids) for ids in train_dataset['input_ids']],
+                                            max_tokens=max_tokens, seed=REPLAY_SEED)
+    steps_per_epoch = len(batch_sampler)
+    max_steps = min(getattr(config, 'DISTILL_MAX_STEPS', DISTILL_MAX_STEPS), steps_per_epoch * DISTILL_EPOCHS)
+    eval_steps = max(1, min(getattr(config, 'DISTILL_EVAL_STEPS', DISTILL_EVAL_STEPS), steps_per_epoch))
+    if eval_dataset is not None:
+        eval_args = dict(eval_strategy="steps", eval_steps=eval_steps, save_strategy="best",
+                         load_best_model_at_end=True, metric_for_best_model=METRIC_NAME, greater_is_better=True,
+                         per_device_eval_batch_size=8)
+    else:
+        eval_args = dict(save_strategy="no")
+    training_args = TrainingArguments(
+        output_dir=CHECKPOINT_DIR,
+        max_steps=max_steps,
+        remove_unused_columns=False,    # (teacher_logits는 collator / compute_loss가 사용)
+        learning_rate=getattr(config, 'DISTILL_LEARNING_RATE', DISTILL_LEARNING_RATE),
+        logging_steps=10,
+        report_to="none",
+        save_total_limit=2,
+        **eval_args
+    )
+    deadline_callback = DeadlineCallback(deadline)
+    callbacks = [deadline_callback]
+    if eval_dataset is not None:
+        callbacks.append(EarlyStoppingCallback(
+            early_stopping_patience=getattr(config, 'EARLY_STOPPING_PATIENCE', EARLY_STOPPING_PATIENCE),
+            early_stopping_threshold=EARLY_STOPPING_THRESHOLD))
+    trainer = DistillTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=eval_dataset,
+        data_collator=DistillCollator(tokenizer.pad_token_id),
+        compute_metrics=compute_metrics if eval_dataset is not None else None,
+        preprocess_logits_for_metrics=argmax_logits if eval_dataset is not None else None,
+        callbacks=callbacks,
+        train_batch_sampler=batch_sampler,
+        temperature=getattr(config, 'DISTILL_TEMPERATURE', DISTILL_TEMPERATURE),
+        hard_weight=getattr(config, 'DISTILL_HARD_WEIGHT', DISTILL_HARD_WEIGHT),
+    )
+
+    teacher_scores = evaluate_model(trainer, teacher) if eval_dataset is not None else {}
+    logging.info(f"🔥 학생 뇌 증류 시작... (에포크당 {steps_per_epoch}배치, 최대 {max_steps}스텝"
+                 f"{', 마감 ' + datetime.datetime.fromtimestamp(deadline).strftime('%H:%M') if deadline else ''})")
+    train_started = time.perf_counter()
+    trainer.train()
+    train_seconds = time.perf_counter() - train_started
+    student_scores = evaluate_model(trainer, trainer.model) if eval_dataset is not None else {}
+    stopped_by = 'max_steps'
+    if deadline_callback.stopped_at_step is not None:
+        stopped_by = 'deadline'
+    elif eval_dataset is not None and trainer.state.global_step < max_steps:
+        stopped_by = 'early_stopping'
+
+    # 4. 재현율 하락 확인 -> 등록 (+ 허용 폭 안이면 현재 학생 뇌로)
+    recall_drop = None
+    if teacher_scores and student_scores:
+        recall_drop = round(teacher_scores['entity_recall'] - student_scores['entity_recall'], 4)
+        logging.info(f"🎯 검증 재현율: teacher {teacher_scores['entity_recall']:.4f} -> 학생 {student_scores['entity_recall']:.4f} "
+                     f"(F1 {teacher_scores[METRIC_NAME]:.4f} -> {student_scores[METRIC_NAME]:.4f})")
+    max_drop = getattr(config, 'MAX_STUDENT_RECALL_DROP', MAX_STUDENT_RECALL_DROP)
+    promote = recall_drop is not None and recall_drop <= max_drop
+    if recall_drop is not None and not promote:
+        logging.warning(f"⚠️ 재현율 하락({recall_drop:.4f})이 허용 폭({max_drop})을 넘어 현재 학생 뇌를 그대로 둡니다. "
+                        f"(버전은 등록)")
+
+    sample_texts = (holdout_df if not holdout_df.empty else corpus_df)['context'].dropna().tolist() # (추론 지연 측정용)
+    teacher_latency = measure_latency(teacher, tokenizer, sample_texts)
+    metadata = {
+        'teacher_version': teacher_version, 'warm_started': warm_started,
+        'layers': num_layers, 'hidden_size': hidden_size, 'parameters': count_parameters(trainer.model),
+        'teacher_parameters': count_parameters(teacher),
+        'corpus_rows': len(train_dataset), 'eval_rows': len(eval_dataset) if eval_dataset is not None else 0,
+        'temperature': trainer.temperature, 'hard_weight': trainer.hard_weight,
+        **student_scores, **{f'teacher_{key}': value for key, value in teacher_scores.items()},
+        'recall_drop': recall_drop,
+        'teacher_latency_p50_ms': teacher_latency.get('latency_p50_ms'),
+        'steps': trainer.state.global_step, 'train_seconds': round(train_seconds, 1),
+        'stopped_by': stopped_by,
+    }
+    version = student_registry.publish(trainer.model, tokenizer, metadata, sample_texts=sample_texts, promote=promote)
+    shutil.rmtree(CHECKPOINT_DIR, ignore_errors=True)
+
+    student_latency = student_registry.metadata(version).get('latency_p50_ms')
+    if student_latency and teacher_latency.get('latency_p50_ms'):
+        logging.info(f"⚡ 추론 지연 p50: teacher {teacher_latency['latency_p50_ms']}ms -> 학생 {student_latency}ms "
+                     f"({teacher_latency['latency_p50_ms'] / student_latency:.1f}배 빠름)")
+    logging.info("🤖 3-1. '증류' 봇 작동 완료.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="'증류' 봇: 현재 NER 모델(teacher)로 작은 학생 모델 학습")
+    parser.add_argument('--force', action='store_true', help="이미 같은 teacher로 증류했어도 다시 증류합니다.")
+    args = parser.parse_args()
+    main(force=args.force)
@@ -0,0 +1,164 @@
+# 🧾 (엔진) 스트리밍 HTML 조각(Segment) 추출기
+# ----------------------------------------------------
+# 'crawler.py'가 이 파일을 import하여 HTML을 "한 번만" 훑고, 종류별 텍스트 조각을 얻습니다.
+# (기존: BeautifulSoup 트리를 통째로 만든 뒤 get_text()만 쓰고, 원본 HTML은 따로 한 번 더 스캔
+#        -> 페이지마다 탐지 2회, 문맥(context)도 태그가 섞인 원본에서 잘림)
+# 1. 표준 라이브러리 HTMLParser로 1회 스트리밍 파싱합니다. (트리를 만들지 않음)
+# 2. 조각 종류: text(눈에 보이는 텍스트) / comment(주석) / attribute(data-*, alt 등 속성값)
+#               / script(<script> 본문) / code(<pre>, <code> 블록)
+# 3. 조각마다 원본 HTML 기준 오프셋(start, end)을 함께 기록합니다.
+# 4. pack_segments: 같은 종류의 조각을 이어 붙여 NER 윈도우 수를 줄이고,
+#    NER 결과 위치를 원래 조각으로 되돌려 "그 조각 안에서" 문맥을 만듭니다.
+# ----------------------------------------------------
+
+import bisect
+from collections import namedtuple
+from html.parser import HTMLParser
+
+from regex_helper import make_context
+
+# kind: 조각 종류, text: 내용, start/end: 원본 HTML 기준 오프셋, source: 태그 또는 태그[속성]
+Segment = namedtuple('Segment', ['kind', 'text', 'start', 'end', 'source'])
+
+SEGMENT_KINDS = ('text', 'comment', 'attribute', 'script', 'code')
+
+# PII가 들어갈 일이 거의 없는(레이아웃/스타일용) 속성은 건너뜁니다.
+SKIP_ATTRIBUTES = {'class', 'style', 'id', 'lang', 'charset', 'rel', 'type', 'width', 'height',
+                   'target', 'role', 'dir', 'tabindex'}
+SKIP_CONTENT_TAGS = {'style'}     # 본문을 버리는 태그
+CODE_TAGS = {'pre', 'code', 'textarea'}
+# 값 없이 써도 되는 속성. 이 밖의 "값 없는 속성"은 따옴표가 깨진 태그로 보고 태그 원문 전체를 조각으로 냅니다.
+# (예: alt="QR: {"user": 1}" -> 파서는 alt="QR: {" 까지만 값으로 봄)
+BOOLEAN_ATTRIBUTES = {'hidden', 'disabled', 'checked', 'selected', 'readonly', 'required', 'async',
+                      'defer', 'multiple', 'autofocus', 'novalidate', 'open', 'controls', 'nowrap'}
+
+
+class SegmentExtractor(HTMLParser):
+    """HTML을 1회 파싱하며 Segment 목록을 만듭니다."""
+
+    def __init__(self, html_content):
+        super().__init__(convert_charrefs=True)
+        self.html_content = html_content
+        # (줄 번호, 열) -> 절대 오프셋 변환용 줄 시작 위치 표
+        self._line_starts = [0]
+        index = html_content.find('\n')
+        while index != -1:
+            self._line_starts.append(index + 1)
+            index = html_content.find('\n', index + 1)
+        self.segments = []
+        self._open = None      # 아직 끝 위치가 정해지지 않은 (kind, text, start, source)
+        self._stack = []       # 열린 태그 (script/style/pre/code 판단용)
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def _close_open(self):
+        """직전 조각의 끝 위치를 '지금 위치'로 확정합니다."""
+        if self._open is not None:
+            kind, text, start, source = self._open
+            self.segments.append(Segment(kind, text, start, self._offset(), source))
+            self._open = None
+
+    def _current_kind(self):
+        for tag in reversed(self._stack):
+            if tag == 'script':
+                return 'script', tag
+            if tag in SKIP_CONTENT_TAGS:
+                return None, tag
+            if tag in CODE_TAGS:
+                return 'code', tag
+        return 'text', self._stack[-1] if self._stack else ''
+
+    def handle_starttag(self, tag, attrs):
+        self._close_open()
+        tag_start = self._offset()
+        tag_text = self.get_starttag_text() or ''
+        if any(value is None and name not in BOOLEAN_ATTRIBUTES for name, value in attrs):
+            self.segments.append(Segment('attribute', tag_text, tag_start, tag_start + len(tag_text), f"{tag}[*]"))
+            attrs = []
+        for name, value in attrs:
+            if not value or name in SKIP_ATTRIBUTES or not value.strip():
+                continue
+            position = tag_text.find(value)
+            start = tag_start + position if position != -1 else tag_start
+            end = start + len(value) if position != -1 else tag_start + len(tag_text)
+            self.segments.append(Segment('attribute', value.strip(), start, end, f"{tag}[{name}]"))
+        if tag not in ('br', 'hr', 'img', 'input', 'meta', 'link', 'source', 'wbr'):
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if self._stack and self._stack[-1] == tag:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        self._close_open()
+        if tag in self._stack:
+            # (닫히지 않은 안쪽 태그까지 함께 정리)
+            while self._stack:
+                if self._stack.pop() == tag:
+                    break
+
+    def handle_data(self, data):
+        self._close_open()
+        if not data.strip():
+            return
+        kind, source = self._current_kind()
+        if kind is not None:
+            self._open = (kind, data.strip(), self._offset(), source)
+
+    def handle_comment(self, data):
+        self._close_open()
+        if data.strip():
+            self._open = ('comment', data.strip(), self._offset(), '<!-- -->')
+
+    def close(self):
+        super().close()
+        if self._open is not None:
+            kind, text, start, source = self._open
+            self.segments.append(Segment(kind, text, start, len(self.html_content), source))
+            self._open = None
+
+
+def extract_segments(html_content):
+    """HTML을 1회 파싱하여 Segment 목록을 반환합니다. (원본 순서)"""
+    extractor = SegmentExtractor(html_content)
+    extractor.feed(html_content)
+    extractor.close()
+    return extractor.segments
+
+
+# --- 2. 조각 묶음 (NER 배치용) ---
+class PackedSegments:
+    """같은 종류의 조각을 줄바꿈으로 이어 붙인 텍스트와, 위치 -> 원래 조각 역추적 정보"""
+
+    def __init__(self, kind, segments):
+        self.kind = kind
+        self.segments = segments
+        self.offsets = [] # 이어 붙인 텍스트 안에서 각 조각의 시작 위치
+        parts, position = [], 0
+        for segment in segments:
+            self.offsets.append(position)
+            parts.append(segment.text)
+            position += len(segment.text) + 1
+        self.text = '\n'.join(parts)
+
+    def locate(self, position):
+        """이어 붙인 텍스트의 위치 -> (조각, 조각 안에서의 위치)"""
+        index = bisect.bisect_right(self.offsets, position) - 1
+        return self.segments[index], position - self.offsets[index]
+
+    def context(self, start, end):
+        """NER 결과 위치(start, end)의 문맥을 "그 조각 안에서" 만듭니다."""
+        segment, local_start = self.locate(start)
+        local_end = min(len(segment.text), local_start + (end - start))
+        return make_context(segment.text, local_start, local_end)
+
+
+def pack_segments(segments):
+    """조각을 종류별로 묶어 [PackedSegments, ...]를 반환합니다."""
+    by_kind = {}
+    for segment in segments:
+        by_kind.setdefault(segment.kind, []).append(segment)
+    return [PackedSegments(kind, by_kind[kind]) for kind in SEGMENT_KINDS if kind in by_kind]
@@ -0,0 +1,226 @@
+# 🌐 (엔진) 공용 HTTP 클라이언트 - 연결 재사용 + 재시도(지수 백오프) + 서킷 브레이커 + 지표
+# ----------------------------------------------------
+# crawler(페이지 수집) / llm_helper(CLOVA Studio) / ocr_helper(CLOVA OCR)가 이 파일을 import하여
+# 모든 외부 요청을 하나의 클라이언트로 보냅니다.
+# (기존: 모듈 함수 requests.post/get을 항목마다 호출 -> 매번 새 TCP/TLS 연결, 타임아웃 1번이면 바로 '오류')
+# 1. requests.Session + 연결 풀(keep-alive)을 모든 스레드가 함께 씁니다.
+# 2. 연결 실패 / 타임아웃 / 5xx는 지터(jitter)를 섞은 지수 백오프로 최대 HTTP_RETRIES번 재시도합니다.
+#    (429는 재시도하지 않고 호출 측(label_scheduler)에 그대로 돌려줍니다. 전역 감속은 그쪽 담당)
+# 3. 엔드포인트별 서킷 브레이커: 연속 실패가 CIRCUIT_FAILURE_THRESHOLD번이면 CIRCUIT_RESET_SECONDS 동안
+#    요청을 보내지 않고 즉시 CircuitOpenError를 냅니다. (이후 1건만 시험 삼아 보내 회복 여부 확인)
+# 4. 엔드포인트별 요청/에러/재시도 횟수와 지연 시간(p50/p95/p99) 지표를 모읍니다. (log_metrics)
+#
+# 로컬 테스트: python3 test_site/mock_api.py --error-rate 0.3  (config.py의 HCX_API_URL/OCR_API_URL을 mock으로)
+# ----------------------------------------------------
+
+import random
+import threading
+import time
+import logging
+from collections import deque
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+HTTP_POOL_SIZE = 16               # 호스트별 유지 연결 수 (crawl_scheduler.MAX_CONCURRENCY와 맞춤)
+HTTP_RETRIES = 3                  # 재시도 횟수 (첫 시도 제외)
+BACKOFF_BASE = 0.5                # 첫 재시도 대기(초), 이후 2배씩
+BACKOFF_MAX = 8.0                 # 재시도 대기 상한(초)
+RETRY_STATUS = {500, 502, 503, 504}
+CIRCUIT_FAILURE_THRESHOLD = 5     # 연속 실패 N번이면 차단
+CIRCUIT_RESET_SECONDS = 30.0      # 차단 유지 시간(초)
+LATENCY_SAMPLES = 1000            # 엔드포인트별로 보관하는 최근 지연 시간 수
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려(차단 중) 요청을 보내지 않았을 때 발생합니다."""
+
+
+# --- 2. 서킷 브레이커 ---
+class CircuitBreaker:
+    """closed(정상) -> open(차단) -> half-open(시험 1건) -> closed / open"""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = 'half-open'
+                self._trial_in_flight = False
+            if self.state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """실패를 기록하고, 이번 실패로 차단이 시작되었으면 True를 반환합니다."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+# --- 3. 지표 ---
+class EndpointMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0  # 서킷 차단으로 보내지 않은 요청
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def add(self, field, latency=None):
+        with self._lock:
+            if field:
+                setattr(self, field, getattr(self, field) + 1)
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {'requests': self.requests, 'errors': self.errors, 'retries': self.retries,
+                'rejected': self.rejected, 'p50_ms': percentile(0.50), 'p95_ms': percentile(0.95),
+                'p99_ms': percentile(0.99)}
+
+
+# --- 4. 클라이언트 ---
+def backoff_delay(attempt):
+    """attempt(0부터)번째 재시도 전 대기 시간: 지수 증가 + 지터(0.5~1.5배)"""
+    return min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+def endpoint_of(url):
+    return urlparse(url).netloc.lower()
+
+
+class HttpClient:
+    """공용 세션 + 엔드포인트별 서킷 브레이커/지표. (스레드 안전)"""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._metrics = {}
+
+    def _endpoint_state(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker()
+                self._metrics[endpoint] = EndpointMetrics()
+            return self._breakers[endpoint], self._metrics[endpoint]
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        """
+        요청을 보내고 requests.Response를 반환합니다. (429/4xx는 그대로 반환, raise_for_status는 호출 측 몫)
+        - endpoint: 서킷 브레이커/지표를 묶는 이름 (기본: 호스트)
+        - 연결 실패 / 타임아웃 / 5xx는 재시도하고, 끝내 실패하면 마지막 예외(또는 5xx 응답)를 돌려줍니다.
+        - 그 밖의 예외(ChunkedEncodingError 등)는 재시도 없이 실패로 기록하고 그대로 올립니다.
+        - 차단 중이면 CircuitOpenError
+        """
+        endpoint = endpoint or endpoint_of(url)
+        breaker, metrics = self._endpoint_state(endpoint)
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                metrics.add('rejected')
+                raise CircuitOpenError(f"{endpoint} 서킷 차단 중 ({breaker.reset_seconds:.0f}초 후 재시도)")
+            if attempt:
+                metrics.add('retries')
+            metrics.add('requests')
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.add('errors', time.perf_counter() - started)
+                self._on_failure(endpoint, breaker)
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"🔁 [HTTP 재시도] {endpoint} {attempt + 1}/{self.retries}: {e.__class__.__name__}")
+                time.sleep(backoff_delay(attempt))
+                continue
+            except Exception:
+                # (재시도하지 않는 에러도 실패로 기록 -> half-open 시험 요청이 "진행 중"으로 남아 영구 차단되지 않도록)
+                metrics.add('errors', time.perf_counter() - started)
+                self._on_failure(endpoint, breaker)
+                raise
+
+            latency = time.perf_counter() - started
+            if response.status_code in RETRY_STATUS:
+                metrics.add('errors', latency)
+                self._on_failure(endpoint, breaker)
+                if attempt == self.retries:
+                    return response
+                logger.warning(f"🔁 [HTTP 재시도] {endpoint} {attempt + 1}/{self.retries}: {response.status_code}")
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            metrics.add(None, latency)
+            breaker.record_success() # (429 등 4xx도 "서버는 살아 있음")
+            return response
+
+    def _on_failure(self, endpoint, breaker):
+        if breaker.record_failure():
+            logger.error(f"⛔ [서킷 차단] {endpoint}: 연속 {breaker.failures}회 실패 -> "
+                         f"{breaker.reset_seconds:.0f}초 동안 요청을 보내지 않습니다.")
+
+    def get(self, url, endpoint=None, **kwargs):
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def metrics(self):
+        with self._lock:
+            return {endpoint: metrics.summary() for endpoint, metrics in self._metrics.items()}
+
+    def log_metrics(self):
+        for endpoint, summary in self.metrics().items():
+            logger.info(f"📊 [HTTP 지표] {endpoint}: 요청 {summary['requests']}건, 에러 {summary['errors']}건, "
+                        f"재시도 {summary['retries']}건, 차단 {summary['rejected']}건, "
+                        f"p50 {summary['p50_ms']}ms / p95 {summary['p95_ms']}ms")
+
+
+# --- 5. 공용 클라이언트 (프로세스당 1개) ---
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
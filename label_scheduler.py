@@ -0,0 +1,255 @@
+# 🚦 (엔진) 동시 LLM 라벨링 스케줄러 - 토큰 버킷 속도 제한 + 429 적응형 감속
+# ----------------------------------------------------
+# 'autolabeler.py'가 이 파일을 import하여 여러 '의심' 항목을 "동시에" LLM에게 물어봅니다.
+# (기존: 1건씩 순서대로 호출 + 매번 time.sleep(1) -> 5,000건이면 2시간 이상, 쿼터가 남아도 느림)
+# 1. 동시에 보내는 요청 수는 스레드 풀 크기(max_workers)로 제한합니다.
+# 2. 분당 요청 수(requests/min)와 분당 토큰 수(tokens/min)를 각각 토큰 버킷으로 제한합니다.
+# 3. 429(Too Many Requests)를 받으면 모든 워커가 잠시 멈추고(Retry-After), 속도를 절반으로 낮춘 뒤
+#    성공이 이어지면 조금씩 원래 속도로 되돌립니다. (해당 항목은 재시도)
+# 4. 결과는 "입력 순서 그대로" 반환합니다. (마감 시각이 지나 시작하지 못한 항목은 None)
+# 5. API 서킷이 차단(http_helper.CircuitOpenError)된 동안의 항목도 None으로 남깁니다. ('오류'로 확정하지 않음)
+# 6. (✨ 추가) 실행당 예산(RunBudget): LLM 요청 수 / 추정 토큰 수 상한. 다 쓰면 남은 항목은 None (다음 실행으로)
+# 7. (✨ 추가) 우선순위(prioritize): 불확실한 항목(NER 확신도 낮음) + 새로운 유형을 먼저,
+#    이미 라벨링한 항목과 거의 같은(near-duplicate) 항목은 맨 뒤로 -> 예산이 모자라도 학습에 쓸모 큰 항목부터 라벨링
+# ----------------------------------------------------
+
+import hashlib
+import re
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_helper import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 (config.py에서 덮어쓸 수 있음: LLM_MAX_WORKERS 등) ---
+LLM_MAX_WORKERS = 4              # 동시에 보내는 LLM 요청 수
+LLM_REQUESTS_PER_MIN = 60        # 분당 요청 수 한도
+LLM_TOKENS_PER_MIN = 120000      # 분당 토큰 수 한도 (입력 + 최대 출력 추정치)
+RATE_LIMIT_RETRIES = 5           # 429를 받은 항목의 최대 재시도 횟수
+DEFAULT_RETRY_AFTER = 5.0        # 429 응답에 Retry-After가 없을 때 멈추는 시간(초)
+MIN_RATE_SCALE = 0.1             # 감속 하한 (설정 속도의 10%)
+RATE_RECOVERY_STEP = 0.05        # 성공 1건마다 회복하는 속도 비율
+LABEL_MAX_LLM_REQUESTS = None    # 실행당 LLM 요청 수 상한 (None = 무제한)
+LABEL_MAX_LLM_TOKENS = None      # 실행당 추정 토큰 수 상한 (None = 무제한)
+REGEX_UNCERTAINTY = 0.5          # 확신도가 없는 정규식 탐지의 불확실성 (NER은 1 - 확신도)
+NOVELTY_WEIGHT = 1.0             # 우선순위에서 '새로움'의 가중치
+
+
+class RateLimitedError(Exception):
+    """judge 함수가 429(속도 제한)를 받았을 때 발생시키는 예외. retry_after: 서버가 알려준 대기 시간(초)"""
+
+    def __init__(self, message='', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# --- 2. 토큰 버킷 ---
+class TokenBucket:
+    """분당 rate_per_min 만큼 채워지는 버킷. (스레드 안전)"""
+
+    def __init__(self, rate_per_min, capacity=None):
+        self.rate_per_min = rate_per_min
+        self.capacity = capacity or rate_per_min
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_min / 60.0)
+        self._updated = now
+
+    def set_rate(self, rate_per_min):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate_per_min = rate_per_min
+
+    def wait_time(self, amount):
+        """amount만큼 꺼낼 수 있으면 꺼내고 0을, 아니면 기다려야 할 시간(초)을 반환합니다."""
+        amount = min(amount, self.capacity) # (버킷보다 큰 요청은 버킷이 가득 찰 때 통과)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0
+            return (amount - self._tokens) * 60.0 / self.rate_per_min
+
+
+class LLMRateLimiter:
+    """
+    요청 수 + 토큰 수 버킷을 함께 관리하고, 429를 받으면 전체 속도를 낮춥니다. (AIMD)
+    - on_rate_limited(): 모든 워커 일시 정지(retry_after) + 속도 절반
+    - on_success(): 속도를 조금씩 원래대로 회복
+    """
+
+    def __init__(self, requests_per_min=LLM_REQUESTS_PER_MIN, tokens_per_min=LLM_TOKENS_PER_MIN):
+        self.requests_per_min = requests_per_min
+        self.tokens_per_min = tokens_per_min
+        self.request_bucket = TokenBucket(requests_per_min)
+        self.token_bucket = TokenBucket(tokens_per_min)
+        self.scale = 1.0
+        self.rate_limited_count = 0
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def _apply_scale(self):
+        self.request_bucket.set_rate(self.requests_per_min * self.scale)
+        self.token_bucket.set_rate(self.tokens_per_min * self.scale)
+
+    def _wait_pause(self):
+        while True:
+            with self._lock:
+                pause = self._pause_until - time.monotonic()
+            if pause <= 0:
+                return
+            time.sleep(pause)
+
+    def acquire(self, tokens):
+        """요청 1건(추정 토큰 수 tokens)을 보낼 수 있을 때까지 기다립니다."""
+        for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)):
+            while True:
+                self._wait_pause()
+                wait = bucket.wait_time(amount)
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+
+    def on_rate_limited(self, retry_after=None):
+        with self._lock:
+            self.rate_limited_count += 1
+            now = time.monotonic()
+            pause = retry_after if retry_after else DEFAULT_RETRY_AFTER
+            # (이미 멈춰 있는 동안 도착한 429는 "같은 폭주"의 응답이므로 속도를 또 낮추지 않음)
+            if now >= self._pause_until:
+                self.scale = max(MIN_RATE_SCALE, self.scale * 0.5)
+                self._apply_scale()
+            self._pause_until = max(self._pause_until, now + pause)
+        logger.warning(f"⏳ [LLM 속도 제한] 429 수신 -> {pause:.1f}초 대기, 속도 {self.scale:.0%}로 감속")
+
+    def on_success(self):
+        with self._lock:
+            if self.scale < 1.0:
+                self.scale = min(1.0, self.scale + RATE_RECOVERY_STEP)
+                self._apply_scale()
+
+
+# --- 3. 동시 라벨링 ---
+class RunBudget:
+    """실행 1번에 쓸 수 있는 LLM 요청 수 / 추정 토큰 수. (None = 무제한, 스레드 안전)"""
+
+    def __init__(self, max_requests=LABEL_MAX_LLM_REQUESTS, max_tokens=LABEL_MAX_LLM_TOKENS):
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.requests = 0
+        self.tokens = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def try_spend(self, tokens):
+        """요청 1건(tokens)을 예산에서 뺍니다. 예산을 넘으면 빼지 않고 False"""
+        with self._lock:
+            if ((self.max_requests is not None and self.requests + 1 > self.max_requests) or
+                    (self.max_tokens is not None and self.tokens + tokens > self.max_tokens)):
+                self.exhausted = True
+                return False
+            self.requests += 1
+            self.tokens += tokens
+            return True
+
+
+def label_concurrently(items, judge_func, estimate_tokens=None, max_workers=LLM_MAX_WORKERS,
+                       limiter=None, deadline=None, budget=None):
+    """
+    judge_func(item)을 스레드 풀에서 동시에 실행하고, "입력 순서 그대로" 결과 목록을 반환합니다.
+    - estimate_tokens(item): 요청 1건의 추정 토큰 수 (분당 토큰 한도용, 없으면 0)
+    - judge_func가 RateLimitedError를 던지면 감속 후 같은 항목을 재시도합니다.
+    - 그 밖의 예외는 {'label': '오류', 'reason': ...}로 기록합니다.
+    - deadline(time.time() 기준)이 지나면 아직 시작하지 않은 항목은 건너뜁니다. (결과 None)
+    - CircuitOpenError(API 차단 중)인 항목도 결과 None
+    - budget(RunBudget)을 다 쓰면 남은 항목은 결과 None (429 재시도도 요청 1건으로 계산)
+    """
+    limiter = limiter or LLMRateLimiter()
+    results = [None] * len(items)
+
+    def paced_judge(item):
+        tokens = estimate_tokens(item) if estimate_tokens else 0
+        for _ in range(RATE_LIMIT_RETRIES + 1):
+            if deadline is not None and time.time() >= deadline:
+                return None
+            if budget is not None and not budget.try_spend(tokens):
+                return None # (이번 실행 예산 소진 -> 다음 실행에서 처리)
+            limiter.acquire(tokens)
+            try:
+                result = judge_func(item)
+            except RateLimitedError as e:
+                limiter.on_rate_limited(e.retry_after)
+                continue
+            except CircuitOpenError:
+                return None # (API 장애로 차단 중 -> 다음 실행에서 다시 처리)
+            limiter.on_success()
+            return result
+        return {'label': '오류', 'reason': f'속도 제한(429) {RATE_LIMIT_RETRIES}회 재시도 실패'}
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(paced_judge, item): index for index, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logger.error(f"❌ [LLM 처리 에러] {e}")
+                results[index] = {'label': '오류', 'reason': str(e)}
+            if done % 100 == 0:
+                elapsed = time.monotonic() - started
+                logger.info(f"📈 [LLM 라벨링] {done}/{len(items)}건 완료 ({done / elapsed:.1f}건/초)")
+
+    return results
+
+
+# --- 4. 라벨링 우선순위 ---
+DIGITS_PATTERN = re.compile(r'\d')
+LETTERS_PATTERN = re.compile(r'[A-Za-z]+')
+SPACES_PATTERN = re.compile(r'\s+')
+
+def near_duplicate_signature(pii_type, content, context):
+    """
+    PII 종류 + PII의 "모양"(숫자 -> 0, 영문 -> a) + PII를 지우고 숫자를 가린 문맥의 해시.
+    (같은 페이지 틀에서 번호만 바뀐 항목들은 같은 서명 -> 하나만 라벨링해도 학습 신호가 비슷함)
+    """
+    content = str(content)
+    shape = LETTERS_PATTERN.sub('a', DIGITS_PATTERN.sub('0', content))
+    template = DIGITS_PATTERN.sub('0', str(context).replace(content, ' '))
+    template = SPACES_PATTERN.sub(' ', template).strip().lower()
+    return hashlib.sha1(f"{pii_type}|{shape}|{template}".encode('utf-8')).hexdigest()[:16]
+
+def uncertainty_of(source, ner_score):
+    """NER 탐지는 (1 - 확신도), 확신도가 없는 정규식 탐지는 REGEX_UNCERTAINTY"""
+    if source == 'ai' and ner_score is not None and ner_score == ner_score: # (NaN 제외)
+        return 1.0 - float(ner_score)
+    return REGEX_UNCERTAINTY
+
+def prioritize(rows, labeled_signatures=(), novelty_weight=NOVELTY_WEIGHT):
+    """
+    rows(type, content, context, source, ner_score 속성)를 라벨링 우선순위 순서로 정렬해 반환합니다.
+    우선순위 = 불확실성 + novelty_weight x 새로움
+      - 새로움: 이미 라벨링한 서명이면 0, 아니면 1 / (이번 목록에서 같은 서명이 앞서 나온 횟수 + 1)
+    (같은 우선순위는 원래 순서(id 순) 유지)
+    """
+    labeled_signatures = set(labeled_signatures)
+    seen = {}
+    scored = []
+    for index, row in enumerate(rows):
+        signature = near_duplicate_signature(row.type, row.content, row.context)
+        if signature in labeled_signatures:
+            novelty = 0.0
+        else:
+            novelty = 1.0 / (seen.get(signature, 0) + 1)
+            seen[signature] = seen.get(signature, 0) + 1
+        priority = uncertainty_of(getattr(row, 'source', None), getattr(row, 'ner_score', None)) + novelty_weight * novelty
+        scored.append((-priority, index, row))
+    scored.sort(key=lambda item: (item[0], item[1]))
+    return [row for _, _, row in scored]
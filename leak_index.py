@@ -0,0 +1,65 @@
+# 🔑 (엔진) 영구 중복 제거 인덱스 - (content, url) 키 저장소
+# ----------------------------------------------------
+# 'leak_store.py'가 이 파일을 import하여 "이미 본 적 있는" 의심 내역을 걸러냅니다.
+# (기존: 저장할 때마다 feedback_data.csv + detected_leaks.csv 전체를 pandas로 다시 읽고,
+#        행마다 DataFrame.apply 람다로 검사 -> 누적 이력에 비례해 느려짐)
+# 1. SQLite 테이블(leak_keys)에 (content, url)을 기본 키(PRIMARY KEY)로 저장합니다.
+#    -> 조회/추가 1건당 비용이 이력 크기와 거의 무관합니다. (B-tree 인덱스)
+# 2. 저장소(LeakStore)와 같은 DB 연결을 공유하여, "중복 검사 + 저장"이 한 트랜잭션으로 묶입니다.
+# 3. 인덱스가 비어 있으면 저장소가 leaks 테이블에서 다시 만듭니다. (python3 leak_store.py --rebuild-index)
+# ----------------------------------------------------
+
+import sqlite3
+
+
+class LeakIndex:
+    """
+    (content, url) 키 인덱스.
+    - LeakIndex(path): 자체 연결을 엽니다. with 블록 단위로 트랜잭션이 묶입니다.
+    - LeakIndex(conn=...): 다른 객체(LeakStore)의 연결을 빌려 씁니다. (커밋/종료는 연결 주인이 담당)
+    """
+
+    def __init__(self, path=None, conn=None):
+        self._owns_conn = conn is None
+        self.conn = conn if conn is not None else sqlite3.connect(path)
+        if self._owns_conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leak_keys ("
+            " content TEXT NOT NULL, url TEXT NOT NULL, PRIMARY KEY (content, url)"
+            ") WITHOUT ROWID"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._owns_conn:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+            self.conn.close()
+        return False
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM leak_keys").fetchone()[0]
+
+    def contains(self, content, url):
+        row = self.conn.execute("SELECT 1 FROM leak_keys WHERE content = ? AND url = ?",
+                                (str(content), str(url))).fetchone()
+        return row is not None
+
+    def add_if_new(self, content, url):
+        """키를 추가하고, "새로 추가되었으면" True를 반환합니다. (조회 + 추가를 한 번에)"""
+        cursor = self.conn.execute("INSERT OR IGNORE INTO leak_keys (content, url) VALUES (?, ?)",
+                                   (str(content), str(url)))
+        return cursor.rowcount == 1
+
+    def add_many(self, keys):
+        """(content, url) 키들을 한 번에 추가합니다. (재구축용)"""
+        self.conn.executemany("INSERT OR IGNORE INTO leak_keys (content, url) VALUES (?, ?)",
+                              ((str(content), str(url)) for content, url in keys))
+
+    def clear(self):
+        self.conn.execute("DELETE FROM leak_keys")
@@ -0,0 +1,382 @@
+# 🗄️ (엔진) 의심/정답 저장소 - CSV In/Outbox를 대체하는 SQLite(WAL) 데이터베이스
+# ----------------------------------------------------
+# crawler / autolabeler / train / dashboard가 이 파일을 import하여 데이터를 주고받습니다.
+# (기존: detected_leaks.csv / feedback_data.csv를 append하고, 모든 봇이 매번 "전체 파일"을 다시 읽고,
+#        autolabeler가 파일을 통째로 삭제 -> 이력이 쌓일수록 I/O가 커지고, 작업 중 추가된 행이 사라짐)
+# 1. 모든 의심 내역은 leaks 테이블 1개에 쌓이고, 상태(status)로 단계를 구분합니다.
+#       pending(라벨 대기) -> labeled(LLM 판단 완료) -> trained_at 기록(학습 완료)
+# 2. 읽는 쪽은 필요한 "조건"(라벨 대기 / 미학습 '유출' / 최근 N시간)과 "열"만 골라 읽습니다. (인덱스 사용)
+# 3. 단계 간 인계는 id 기준 트랜잭션으로 처리합니다. (작업 도중 새로 들어온 행은 건드리지 않음)
+# 4. 기존 CSV/trained.log가 있으면 최초 1회 자동으로 가져오고, 원본은 *.migrated로 이름을 바꿉니다.
+# 5. (✨ 추가) autolabeler 실행(run) 단위 점유(claim) + 진행 기록(label_runs)
+#    - 실행마다 run_id로 'pending' 행을 점유하고, 점유한 행에만 라벨을 기록합니다. (작업 중 추가된 행은 건드리지 않음)
+#    - 작은 묶음마다 커밋하고 진행 커서(마지막으로 기록한 id)와 heartbeat를 남깁니다.
+#    - 끝난 실행 / heartbeat가 끊긴(비정상 종료) 실행이 점유한 행은 다음 실행이 이어받습니다.
+# 6. (✨ 추가) crawler가 남긴 탐지 출처(source: 'regex' / 'ai')와 NER 확신도(ner_score) -> 라벨링 우선순위에 사용
+# 7. (✨ 추가) train 검증 세트: id % holdout_every = 0인 '유출' 행은 학습하지 않고 평가에만 씁니다. (실행마다 같은 분할)
+#
+# 관리: python3 leak_store.py [--rebuild-index] [--export-csv <폴더>]  (상태별 건수 출력)
+# ----------------------------------------------------
+
+import os
+import sqlite3
+import datetime
+import logging
+import pandas as pd
+
+from leak_index import LeakIndex
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+BASE_PATH = "/root/PII-Guardian"
+LEAK_STORE_FILE = os.path.join(BASE_PATH, 'pii_guardian.db')
+
+# (마이그레이션 대상) 기존 파일 경로
+DETECTED_FILE = os.path.join(BASE_PATH, 'detected_leaks.csv')
+FEEDBACK_FILE = os.path.join(BASE_PATH, 'feedback_data.csv')
+TRAINED_LOG_FILE = os.path.join(BASE_PATH, 'trained.log')
+
+# (✨ 추가) 실행 heartbeat가 이 시간(분) 넘게 끊기면 비정상 종료로 보고 점유를 풀어줍니다.
+CLAIM_STALE_MINUTES = 15
+
+LEAK_COLUMNS = ['type', 'content', 'context', 'url', 'repo']
+ALL_COLUMNS = ['id'] + LEAK_COLUMNS + ['detected_at', 'status', 'llm_label', 'llm_reason',
+                                       'labeled_at', 'trained_at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaks (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    type        TEXT,
+    content     TEXT NOT NULL,
+    context     TEXT,
+    url         TEXT NOT NULL,
+    repo        TEXT,
+    detected_at TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    llm_label   TEXT,
+    llm_reason  TEXT,
+    labeled_at  TEXT,
+    trained_at  TEXT,
+    claimed_by  TEXT,
+    claimed_at  TEXT,
+    ner_score   REAL,
+    source      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leaks_status ON leaks (status, id);
+CREATE INDEX IF NOT EXISTS idx_leaks_detected_at ON leaks (detected_at);
+CREATE INDEX IF NOT EXISTS idx_leaks_untrained ON leaks (llm_label, trained_at);
+"""
+
+# (✨ 추가) 예전 DB에는 없는 열 -> 열 때 ALTER TABLE로 추가합니다.
+UPGRADE_COLUMNS = {'claimed_by': 'TEXT', 'claimed_at': 'TEXT', 'ner_score': 'REAL', 'source': 'TEXT'}
+
+RUN_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_leaks_claimed ON leaks (claimed_by, status);
+CREATE TABLE IF NOT EXISTS label_runs (
+    run_id       TEXT PRIMARY KEY,
+    started_at   TEXT NOT NULL,
+    heartbeat_at TEXT NOT NULL,
+    finished_at  TEXT,
+    status       TEXT NOT NULL DEFAULT 'running',
+    claimed      INTEGER NOT NULL DEFAULT 0,
+    labeled      INTEGER NOT NULL DEFAULT 0,
+    llm_requests INTEGER NOT NULL DEFAULT 0,
+    cursor_id    INTEGER
+);
+"""
+
+
+def holdout_filter(holdout_every, held_out):
+    """id 기준 고정 검증 분할 조건 (holdout_every = 0이면 분할 없음)"""
+    if not holdout_every:
+        return ""
+    return f" AND id % {int(holdout_every)} {'=' if held_out else '!='} 0"
+
+def now_str():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class LeakStore:
+    """pii_guardian.db 접근 객체. with 블록이 하나의 트랜잭션입니다. (예외 시 롤백)"""
+
+    def __init__(self, path=LEAK_STORE_FILE, read_only=False, migrate=True):
+        self.path = path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self.index = None
+            return
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL") # (읽는 봇/대시보드가 쓰는 봇을 막지 않음)
+        self.conn.executescript(SCHEMA)
+        self.upgrade_schema()
+        self.index = LeakIndex(conn=self.conn)
+        if migrate:
+            self.migrate_csv()
+        if self.index.count() == 0 and self.count() > 0:
+            self.rebuild_index()
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+        return False
+
+    def commit(self):
+        """with 블록 도중에 지금까지의 변경을 커밋합니다. (긴 작업을 작은 묶음으로 나눠 기록할 때)"""
+        self.conn.commit()
+
+    def upgrade_schema(self):
+        """예전 DB에 없는 열(UPGRADE_COLUMNS)과 label_runs 테이블을 추가합니다."""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(leaks)")}
+        for column, column_type in UPGRADE_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE leaks ADD COLUMN {column} {column_type}")
+        self.conn.executescript(RUN_SCHEMA)
+
+    # --- 2. 쓰기 (단계별 인계) ---
+    def add_new_leaks(self, leaks):
+        """
+        (crawler) 중복 인덱스에 없는 의심 내역만 'pending'으로 추가하고, 추가된 건수를 반환합니다.
+        (중복 검사와 저장이 같은 트랜잭션이므로, 저장 실패 시 인덱스도 함께 롤백됩니다.)
+        """
+        detected_at = now_str()
+        rows = []
+        for leak in leaks:
+            content, url = leak.get('content'), leak.get('url') or 'N.A'
+            if self.index.add_if_new(content, url):
+                rows.append((leak.get('type'), str(content), leak.get('context'), str(url),
+                             leak.get('repo'), detected_at, leak.get('score'), leak.get('source')))
+        self.conn.executemany(
+            "INSERT INTO leaks (type, content, context, url, repo, detected_at, ner_score, source)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        return len(rows)
+
+    def save_labels(self, labels, run_id=None):
+        """
+        (autolabeler) [(id, llm_label, llm_reason), ...]를 기록하고 'labeled'로 옮깁니다. 기록한 건수를 반환합니다.
+        - run_id: 주면 그 실행이 점유한 'pending' 행에만 기록합니다. (다른 실행이 이어받은 행은 건너뜀)
+        """
+        labeled_at = now_str()
+        if run_id is None:
+            return self.conn.executemany(
+                "UPDATE leaks SET llm_label = ?, llm_reason = ?, labeled_at = ?, status = 'labeled' WHERE id = ?",
+                ((label, reason, labeled_at, leak_id) for leak_id, label, reason in labels)
+            ).rowcount
+        return self.conn.executemany(
+            "UPDATE leaks SET llm_label = ?, llm_reason = ?, labeled_at = ?, status = 'labeled', claimed_by = NULL"
+            " WHERE id = ? AND claimed_by = ? AND status = 'pending'",
+            ((label, reason, labeled_at, leak_id, run_id) for leak_id, label, reason in labels)
+        ).rowcount
+
+    def mark_trained(self, ids):
+        """(train) 학습에 사용한 행에 학습 시각을 기록합니다."""
+        trained_at = now_str()
+        self.conn.executemany("UPDATE leaks SET trained_at = ? WHERE id = ?",
+                              ((trained_at, leak_id) for leak_id in ids))
+
+    # --- 2-1. (✨ 추가) autolabeler 실행 단위 점유 / 진행 기록 ---
+    def start_run(self, run_id, stale_minutes=CLAIM_STALE_MINUTES):
+        """
+        실행을 등록하고, heartbeat가 끊긴 이전 실행은 'aborted'로 표시합니다.
+        반환: 이어받을 이전 실행 목록 [{'run_id', 'labeled', 'cursor_id'}, ...]
+        """
+        now = now_str()
+        stale_before = (datetime.datetime.now() - datetime.timedelta(minutes=stale_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+        aborted = [{'run_id': row[0], 'labeled': row[1], 'cursor_id': row[2]} for row in self.conn.execute(
+            "SELECT run_id, labeled, cursor_id FROM label_runs WHERE status = 'running' AND heartbeat_at < ?",
+            (stale_before,))]
+        self.conn.execute("UPDATE label_runs SET status = 'aborted', finished_at = ?"
+                          " WHERE status = 'running' AND heartbeat_at < ?", (now, stale_before))
+        self.conn.execute("INSERT INTO label_runs (run_id, started_at, heartbeat_at) VALUES (?, ?, ?)",
+                          (run_id, now, now))
+        return aborted
+
+    def claim_pending(self, run_id, limit=None):
+        """
+        아무도 점유하지 않은(또는 끝나거나 중단된 실행이 점유했던) 'pending' 행을 run_id로 점유합니다.
+        점유한 건수를 반환합니다. (start_run 이후 호출)
+        """
+        sql = ("UPDATE leaks SET claimed_by = ?, claimed_at = ? WHERE id IN ("
+               " SELECT id FROM leaks WHERE status = 'pending' AND (claimed_by IS NULL OR claimed_by NOT IN"
+               "  (SELECT run_id FROM label_runs WHERE status = 'running'))"
+               " ORDER BY id")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        claimed = self.conn.execute(sql + ")", (run_id, now_str())).rowcount
+        self.conn.execute("UPDATE label_runs SET claimed = ? WHERE run_id = ?", (claimed, run_id))
+        return claimed
+
+    def claimed_leaks(self, run_id, columns=None):
+        """run_id가 점유한 'pending' 행 (id 순)"""
+        return self.query("status = 'pending' AND claimed_by = ?", (run_id,), columns=columns)
+
+    def update_run(self, run_id, labeled=0, llm_requests=0, cursor_id=None):
+        """진행 기록: 라벨/요청 건수를 더하고, 이번 실행에서 기록한 최대 id(cursor_id)와 heartbeat를 갱신합니다."""
+        self.conn.execute(
+            "UPDATE label_runs SET labeled = labeled + ?, llm_requests = llm_requests + ?,"
+            " cursor_id = COALESCE(?, cursor_id), heartbeat_at = ? WHERE run_id = ?",
+            (labeled, llm_requests, cursor_id, now_str(), run_id)
+        )
+
+    def finish_run(self, run_id, status='done'):
+        """실행을 끝내고, 라벨을 못 붙인 점유 행은 풀어서 다음 실행이 바로 가져가게 합니다. 푼 건수를 반환합니다."""
+        released = self.conn.execute("UPDATE leaks SET claimed_by = NULL, claimed_at = NULL"
+                                     " WHERE claimed_by = ? AND status = 'pending'", (run_id,)).rowcount
+        self.conn.execute("UPDATE label_runs SET status = ?, finished_at = ?, heartbeat_at = ? WHERE run_id = ?",
+                          (status, now_str(), now_str(), run_id))
+        return released
+
+    def last_runs(self, limit=5):
+        """최근 autolabeler 실행 기록 (DataFrame)"""
+        return pd.read_sql_query("SELECT * FROM label_runs ORDER BY started_at DESC LIMIT ?",
+                                 self.conn, params=(limit,))
+
+    # --- 3. 읽기 (조건 + 필요한 열만) ---
+    def query(self, where='1 = 1', params=(), columns=None, order_by='id', limit=None):
+        """leaks 테이블에서 조건(where)과 열(columns)을 골라 DataFrame으로 읽습니다."""
+        columns = columns or ALL_COLUMNS
+        unknown = set(columns) - set(ALL_COLUMNS) - set(UPGRADE_COLUMNS)
+        if unknown:
+            raise ValueError(f"알 수 없는 열: {unknown}")
+        sql = f"SELECT {', '.join(columns)} FROM leaks WHERE {where} ORDER BY {order_by}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def pending_leaks(self, columns=None, limit=None):
+        """라벨 대기(pending) 행"""
+        return self.query("status = 'pending'", columns=columns, limit=limit)
+
+    def labeled_leaks(self, columns=None, limit=None, newest_first=False):
+        """LLM 판단이 끝난(labeled) 행"""
+        return self.query("status = 'labeled'", columns=columns, limit=limit,
+                          order_by='id DESC' if newest_first else 'id')
+
+    def untrained_leaks(self, columns=None, holdout_every=0):
+        """'유출'로 판단되었지만 아직 학습하지 않은 행 (holdout_every: 검증용으로 떼어 둔 행 제외)"""
+        return self.query("llm_label = '유출' AND trained_at IS NULL" + holdout_filter(holdout_every, False),
+                          columns=columns)
+
+    def count_untrained(self, holdout_every=0):
+        return self.conn.execute("SELECT COUNT(*) FROM leaks WHERE llm_label = '유출' AND trained_at IS NULL"
+                                 + holdout_filter(holdout_every, False)).fetchone()[0]
+
+    def trained_leak_ids_by_type(self, holdout_every=0):
+        """(train 재현 버퍼) 이미 학습한 '유출' 행의 id를 PII 종류별로 {type: [id, ...]}"""
+        ids_by_type = {}
+        for pii_type, leak_id in self.conn.execute(
+                "SELECT type, id FROM leaks WHERE llm_label = '유출' AND trained_at IS NOT NULL"
+                + holdout_filter(holdout_every, False)):
+            ids_by_type.setdefault(pii_type, []).append(leak_id)
+        return ids_by_type
+
+    def holdout_leaks(self, holdout_every, columns=None, limit=None):
+        """(train 검증 세트) id % holdout_every = 0인 '유출' 행 (학습에는 쓰지 않음, 최신 순)"""
+        if not holdout_every:
+            return pd.DataFrame(columns=columns or ALL_COLUMNS)
+        return self.query("llm_label = '유출'" + holdout_filter(holdout_every, True), columns=columns,
+                          order_by='id DESC', limit=limit)
+
+    def leaks_by_ids(self, ids, columns=None, chunk_size=900):
+        """id 목록의 행 (SQLite 변수 개수 제한 때문에 나눠서 읽음)"""
+        ids = list(ids)
+        frames = [self.query(f"id IN ({', '.join('?' * len(ids[i:i + chunk_size]))})", ids[i:i + chunk_size],
+                             columns=columns) for i in range(0, len(ids), chunk_size)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns or ALL_COLUMNS)
+
+    def recent_leaks(self, hours=24, columns=None):
+        """최근 N시간 안에 탐지된 행"""
+        since = (datetime.datetime.now() - datetime.timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+        return self.query("detected_at >= ?", (since,), columns=columns)
+
+    def count(self, status=None):
+        if status is None:
+            return self.conn.execute("SELECT COUNT(*) FROM leaks").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM leaks WHERE status = ?", (status,)).fetchone()[0]
+
+    # --- 4. 관리 ---
+    def rebuild_index(self):
+        """leaks 테이블의 (content, url)로 중복 인덱스를 다시 만듭니다."""
+        self.index.clear()
+        self.index.add_many(self.conn.execute("SELECT content, url FROM leaks").fetchall())
+        logger.info(f"🔑 중복 제거 인덱스를 재구축했습니다. (키 {self.index.count()}개)")
+
+    def migrate_csv(self, detected_file=DETECTED_FILE, feedback_file=FEEDBACK_FILE,
+                    trained_log_file=TRAINED_LOG_FILE):
+        """기존 CSV In/Outbox와 trained.log를 저장소로 가져오고, 원본은 *.migrated로 이름을 바꿉니다."""
+        if not (os.path.exists(detected_file) or os.path.exists(feedback_file)):
+            return
+
+        trained_ids = set()
+        if os.path.exists(trained_log_file):
+            with open(trained_log_file, 'r', encoding='utf-8') as f:
+                trained_ids = set(line.strip() for line in f)
+
+        imported = 0
+        for csv_path, is_feedback in ((feedback_file, True), (detected_file, False)):
+            if not os.path.exists(csv_path):
+                continue
+            try:
+                df = pd.read_csv(csv_path)
+            except pd.errors.EmptyDataError:
+                df = pd.DataFrame()
+            now = now_str()
+            for row in df.to_dict('records'):
+                url = row.get('url') if isinstance(row.get('url'), str) else 'N/A'
+                content = str(row.get('content'))
+                if not self.index.add_if_new(content, url):
+                    continue
+                llm_label = row.get('llm_label') if is_feedback else None
+                trained_at = now if is_feedback and f"{content}|{url}" in trained_ids else None
+                self.conn.execute(
+                    "INSERT INTO leaks (type, content, context, url, repo, detected_at, status,"
+                    " llm_label, llm_reason, labeled_at, trained_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row.get('type'), content, row.get('context'), url, row.get('repo'), now,
+                     'labeled' if is_feedback else 'pending', llm_label,
+                     row.get('llm_reason') if is_feedback else None, now if is_feedback else None, trained_at)
+                )
+                imported += 1
+        self.conn.commit()
+
+        for path in (detected_file, feedback_file, trained_log_file):
+            if os.path.exists(path):
+                os.replace(path, path + '.migrated')
+        logger.info(f"📦 기존 CSV에서 {imported}건을 저장소({self.path})로 가져왔습니다. (원본은 *.migrated)")
+
+    def export_csv(self, out_dir):
+        """사람이 보거나 백업하기 위한 CSV 내보내기 (pending / labeled)"""
+        os.makedirs(out_dir, exist_ok=True)
+        self.pending_leaks().to_csv(os.path.join(out_dir, 'detected_leaks.csv'), index=False, encoding='utf-8-sig')
+        self.labeled_leaks().to_csv(os.path.join(out_dir, 'feedback_data.csv'), index=False, encoding='utf-8-sig')
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="PII-Guardian 저장소(pii_guardian.db) 관리")
+    parser.add_argument('--rebuild-index', action='store_true', help="중복 제거 인덱스를 다시 만듭니다.")
+    parser.add_argument('--export-csv', metavar='DIR', help="pending/labeled 행을 CSV로 내보냅니다.")
+    args = parser.parse_args()
+
+    with LeakStore() as store:
+        if args.rebuild_index:
+            store.rebuild_index()
+        if args.export_csv:
+            store.export_csv(args.export_csv)
+            logger.info(f"💾 CSV 내보내기 완료: {args.export_csv}")
+        logger.info(f"🗄️ {store.path}: 전체 {store.count()}건 "
+                    f"(pending {store.count('pending')}, labeled {store.count('labeled')})")
+        for run in store.last_runs().to_dict('records'):
+            logger.info(f"    🏷️ 라벨링 실행 {run['run_id']}: {run['status']}, 점유 {run['claimed']}건 / "
+                        f"라벨 {run['labeled']}건 / LLM 요청 {run['llm_requests']}건 (기록한 최대 id {run['cursor_id']})")
@@ -1,13 +1,20 @@
 # 🤖 (AI) HyperCLOVA API 호출 도우미
-# (v2.2 - Prompt Engineering + 로그 중복 제거)
+# (v2.5 - Prompt Engineering + 로그 중복 제거 + 429 속도 제한 신호 + 다건 배치 판단 + 공용 HTTP 클라이언트)
 # ----------------------------------------------------
 # 'autolabeler.py'가 이 파일을 import하여 LLM의 판단을 받습니다.
+# (✨ v2.3) 429 응답은 '오류'로 삼키지 않고 RateLimitedError로 알려, label_scheduler가 감속/재시도합니다.
+# (✨ v2.4) get_llm_judgments_batch: N건을 요청 1건으로 묶어 긴 SYSTEM_PROMPT를 1번만 보냅니다.
+# (✨ v2.5) 요청은 http_helper 공용 클라이언트로 보냅니다. (연결 재사용, 타임아웃/5xx 재시도, 서킷 브레이커)
 # ----------------------------------------------------
 
 import requests
 import json
 import config # (우리의 비밀 키 로드)
 import logging # (✨ 신규)
+from label_scheduler import RateLimitedError
+from http_helper import get_client, CircuitOpenError
+
+LLM_ENDPOINT = 'clova-studio' # (http_helper 서킷 브레이커/지표 이름)
 
 # (✨ 신규) autolabeler와 같은 로거를 사용합니다.
 logger = logging.getLogger(__name__)
@@ -41,13 +48,77 @@ SYSTEM_PROMPT = """
 JSON 형식으로만 답하세요: {"label": "유출/공개", "reason": "이유"}
 """
 
-def get_llm_judgment(context, pii_content):
+LLM_MAX_TOKENS = 100   # 답변 최대 토큰 수 (항목 1건당)
+CHARS_PER_TOKEN = 2    # 토큰 수 추정용 (한글/영문 혼합 기준 보수적으로)
+MODEL_NAME = "HCX-005"
+
+# (✨ v2.4) 여러 항목을 한 번에 판단할 때 SYSTEM_PROMPT 뒤에 붙이는 지침 (답변 형식만 바뀜)
+BATCH_INSTRUCTIONS = """
+[여러 항목 판단]
+여러 개의 [항목]이 각각 [id], [문맥], [탐지된 PII]로 전달될 수 있습니다.
+각 항목을 "서로 독립적으로" 위 기준에 따라 판단하고, 모든 id에 대해 빠짐없이 답하세요.
+JSON 형식으로만 답하세요: {"results": [{"id": 1, "label": "유출/공개", "reason": "이유"}, ...]}
+"""
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + BATCH_INSTRUCTIONS
+VALID_LABELS = {'유출', '공개'}
+
+# 배치 크기 예산 (config.py에서 덮어쓸 수 있음)
+LLM_BATCH_MAX_ITEMS = 20             # 한 요청에 넣는 최대 항목 수
+LLM_MAX_OUTPUT_TOKENS = 4096         # 모델의 최대 답변 토큰 수 (항목당 LLM_MAX_TOKENS씩 필요)
+LLM_CONTEXT_TOKENS = 32000           # 입력 + 답변 토큰 예산
+
+def build_user_message(context, pii_content):
+    return f"[문맥]: \"...{context}...\"\n[탐지된 PII]: \"{pii_content}\""
+
+def build_batch_message(pairs):
+    return "\n\n".join(f"[항목]\n[id]: {item_id}\n{build_user_message(context, pii_content)}"
+                        for item_id, (context, pii_content) in enumerate(pairs, start=1))
+
+def count_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def estimate_tokens(context, pii_content):
+    """요청 1건의 토큰 수 추정치 (시스템 프롬프트 + 질문 + 최대 답변) - 분당 토큰 한도용"""
+    return count_tokens(SYSTEM_PROMPT + build_user_message(context, pii_content)) + LLM_MAX_TOKENS
+
+def estimate_batch_tokens(pairs):
+    """배치 요청 1건의 토큰 수 추정치"""
+    return count_tokens(BATCH_SYSTEM_PROMPT + build_batch_message(pairs)) + LLM_MAX_TOKENS * len(pairs)
+
+def plan_batches(pairs, max_items=LLM_BATCH_MAX_ITEMS, max_output_tokens=LLM_MAX_OUTPUT_TOKENS,
+                 context_tokens=LLM_CONTEXT_TOKENS):
     """
-    HyperCLOVA X (CLOVA Studio) API를 호출하여
-    탐지된 PII가 '유출'인지 '공개'인지 판단합니다.
+    (context, pii_content) 목록을 배치로 나눕니다. 반환: [[index, ...], ...]
+    한 배치는 (a) max_items개 이하, (b) 답변 토큰(항목당 LLM_MAX_TOKENS)이 max_output_tokens 이하,
+    (c) 입력 + 답변 추정 토큰이 context_tokens 이하가 되도록 채웁니다.
+    """
+    max_items = max(1, min(max_items, max_output_tokens // LLM_MAX_TOKENS))
+    fixed_tokens = count_tokens(BATCH_SYSTEM_PROMPT)
+    batches, current, current_tokens = [], [], fixed_tokens
+    for index, (context, pii_content) in enumerate(pairs):
+        item_tokens = count_tokens(build_user_message(context, pii_content)) + 10 + LLM_MAX_TOKENS
+        if current and (len(current) >= max_items or current_tokens + item_tokens > context_tokens):
+            batches.append(current)
+            current, current_tokens = [], fixed_tokens
+        current.append(index)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_retry_after(response):
+    """429 응답의 Retry-After(초) 헤더를 읽습니다. (없거나 형식이 다르면 None)"""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def post_chat_completion(system_prompt, user_message, max_tokens, timeout=30):
+    """
+    HyperCLOVA X (CLOVA Studio) chat-completions를 호출하고, 답변(JSON)을 dict로 반환합니다.
+    429(속도 제한)는 RateLimitedError, 그 밖의 실패는 예외를 그대로 발생시킵니다.
+    (타임아웃/5xx 재시도와 서킷 차단(CircuitOpenError)은 http_helper가 처리합니다.)
     """
-    
-    MODEL_NAME = "HCX-005"
     API_URL = config.HCX_API_URL.rstrip('/') + f'/v3/chat-completions/{MODEL_NAME}'
     
     headers = {
@@ -59,35 +130,45 @@ def get_llm_judgment(context, pii_content):
         "messages": [
             {
                 "role": "system",
-                "content": SYSTEM_PROMPT
+                "content": system_prompt
             },
             {
                 "role": "user",
-                "content": f"[문맥]: \"...{context}...\"\n[탐지된 PII]: \"{pii_content}\""
+                "content": user_message
             }
         ],
         "response_format": {
             "type": "json_object" # JSON으로 답하도록 강제
         },
-        "max_tokens": 100,
+        "max_tokens": max_tokens,
         "temperature": 0.1 # 일관된 답변을 위해 온도를 낮춤
     }
 
+    response = get_client().post(API_URL, endpoint=LLM_ENDPOINT, headers=headers, data=json.dumps(data), timeout=timeout)
+    if response.status_code == 429:
+        raise RateLimitedError("HyperCLOVA 429 Too Many Requests", parse_retry_after(response))
     try:
-        response = requests.post(API_URL, headers=headers, data=json.dumps(data), timeout=30)
         response.raise_for_status()
-        
         result = response.json()
-        
-        # --- (✨ 핵심 수정) ---
         # v3 응답 구조가 'choices'가 아닌 'result' 키를 사용합니다.
         json_content = result['result']['message']['content']
-        # --- (수정 끝) ---
-        
-        llm_answer = json.loads(json_content)
-        
+        return json.loads(json_content)
+    except Exception:
+        logger.error(f"    (응답: {response.text[:500]})")
+        raise
+
+def get_llm_judgment(context, pii_content):
+    """
+    HyperCLOVA X (CLOVA Studio) API를 호출하여
+    탐지된 PII가 '유출'인지 '공개'인지 판단합니다.
+    (✨ v2.3) 429(속도 제한)를 받으면 RateLimitedError를 발생시킵니다. (그 밖의 에러는 '오류' 라벨)
+    """
+    try:
+        llm_answer = post_chat_completion(SYSTEM_PROMPT, build_user_message(context, pii_content), LLM_MAX_TOKENS)
         return llm_answer # {"label": "...", "reason": "..."}
         
+    except (RateLimitedError, CircuitOpenError):
+        raise # (label_scheduler가 감속 후 재시도 / 차단 중이면 'pending'으로 남김)
     except requests.exceptions.ReadTimeout:
         # (✨ 수정) print -> logger.error
         logger.error("❌ [LLM API 에러] HyperCLOVA 타임아웃")
@@ -95,6 +176,47 @@ def get_llm_judgment(context, pii_content):
     except Exception as e:
         # (✨ 수정) print -> logger.error
         logger.error(f"❌ [LLM API 에러] {e}")
-        if 'response' in locals():
-            logger.error(f"    (응답: {response.text})")
-        return {"label": "오류", "reason": str(e)}
\ No newline at end of file
+        return {"label": "오류", "reason": str(e)}
+
+def get_llm_judgments_batch(pairs):
+    """
+    (✨ v2.4) 여러 (context, pii_content)를 요청 1건으로 판단합니다. (SYSTEM_PROMPT를 1번만 보냄)
+    반환: pairs와 같은 순서의 목록. 답변에 없거나 형식이 잘못된 항목은 None (호출 측에서 단건으로 다시 물어봄)
+    429(속도 제한)를 받으면 RateLimitedError를 발생시킵니다.
+    """
+    verdicts = [None] * len(pairs)
+    try:
+        llm_answer = post_chat_completion(BATCH_SYSTEM_PROMPT, build_batch_message(pairs),
+                                          LLM_MAX_TOKENS * len(pairs), timeout=30 + 5 * len(pairs))
+    except (RateLimitedError, CircuitOpenError):
+        raise
+    except Exception as e:
+        logger.error(f"❌ [LLM API 에러] 배치 {len(pairs)}건: {e}")
+        return verdicts
+
+    results = llm_answer.get('results') if isinstance(llm_answer, dict) else llm_answer
+    if not isinstance(results, list):
+        logger.warning(f"⚠️ [LLM 배치] 'results' 배열이 없는 답변 -> {len(pairs)}건 모두 단건으로 다시 묻습니다.")
+        return verdicts
+    seen_ids = set()
+    for entry in results:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            item_id = int(entry.get('id'))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= item_id <= len(pairs):
+            continue # (id 범위 밖은 버림)
+        if item_id in seen_ids:
+            # (같은 id에 답이 2번 이상 -> 어느 쪽도 믿지 않고 단건으로 다시 물어봄)
+            verdicts[item_id - 1] = None
+            continue
+        seen_ids.add(item_id)
+        label = entry.get('label')
+        if label in VALID_LABELS: # (알 수 없는 라벨은 버림)
+            verdicts[item_id - 1] = {'label': label, 'reason': str(entry.get('reason', 'N/A'))}
+    missing = sum(v is None for v in verdicts)
+    if missing:
+        logger.warning(f"⚠️ [LLM 배치] {len(pairs)}건 중 {missing}건이 누락/형식 오류 -> 단건으로 다시 묻습니다.")
+    return verdicts
@@ -0,0 +1,260 @@
+# 🗃️ (엔진) 모델 저장소(registry) - 버전별 폴더 + 'current' 포인터(심볼릭 링크) 원자적 교체 + 보관 개수 제한
+# ----------------------------------------------------
+# 'train.py'가 새 뇌를 등록(publish)하고, 'crawler.py' / 'detector_server.py'가 현재 뇌를 읽습니다.
+# (기존: train이 my-ner-model 폴더에 직접 저장 -> 저장 도중 시작한 crawler가 반쯤 쓰인 모델을 읽을 수 있고,
+#        되돌리기(rollback)가 없으며, 체크포인트가 계속 쌓임)
+# 1. 버전 폴더: my-ner-model-versions/v20260101-030000/ (저장이 끝난 뒤 이름을 바꿔 넣으므로 완성된 폴더만 보임)
+#    - 등록 후에는 절대 고치지 않습니다. (immutable)
+#    - 가중치는 safetensors (메모리 매핑 로드 -> 콜드 스타트 단축)
+#    - metadata.json: 학습 데이터 해시, 검증 점수, 로드 시간, 추론 지연(ms), 부모 버전 등
+# 2. 'current' 포인터 = my-ner-model (버전 폴더를 가리키는 심볼릭 링크)
+#    - 임시 링크를 만든 뒤 os.replace로 바꿔 끼우므로, 읽는 쪽은 항상 "이전 버전" 또는 "새 버전" 하나만 봅니다.
+#    - 읽는 쪽은 resolve()로 실제 버전 폴더를 한 번 확정한 뒤 그 폴더에서 토크나이저/모델을 읽습니다.
+# 3. 등록 전에 저장된 폴더에서 다시 로드해 봅니다. (로드 실패 = 등록 안 함, 로드 시간/추론 지연 측정)
+# 4. 최근 MODEL_REGISTRY_KEEP개 버전만 남깁니다. (현재 버전은 항상 남김)
+# 5. 기존 my-ner-model(일반 폴더) / my-ner-model.prev는 최초 1회 버전으로 가져옵니다. (pytorch_model.bin -> safetensors)
+#
+# 관리: python3 model_registry.py [--rollback [VERSION]] [--promote VERSION] [--measure-load [VERSION]]
+#       (버전 목록 + 현재 버전 출력, --student: 학생 뇌(distill.py) 저장소를 관리)
+# ----------------------------------------------------
+
+import datetime
+import json
+import os
+import shutil
+import statistics
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+BASE_PATH = "/root/PII-Guardian"
+MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model')            # 'current' 포인터 (심볼릭 링크)
+MODEL_VERSIONS_DIR = os.path.join(BASE_PATH, 'my-ner-model-versions')
+STUDENT_MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-student')  # 학생 뇌 'current' 포인터 (distill.py)
+STUDENT_VERSIONS_DIR = os.path.join(BASE_PATH, 'my-ner-student-versions')
+MODEL_REGISTRY_KEEP = 5        # 남길 버전 수 (현재 버전 포함)
+METADATA_FILE = 'metadata.json'
+LATENCY_SAMPLE_TEXTS = 32      # 추론 지연 측정에 쓰는 문맥 수
+SAFETENSORS_FILES = ('model.safetensors', 'model.safetensors.index.json')
+LEGACY_DIRS = ('checkpoints',) # 기존 my-ner-model 안에 쌓이던 체크포인트 (가져오지 않음)
+
+
+def now_version():
+    return datetime.datetime.now().strftime('v%Y%m%d-%H%M%S')
+
+def has_safetensors(path):
+    return any(os.path.exists(os.path.join(path, name)) for name in SAFETENSORS_FILES)
+
+
+# --- 2. 로드 ---
+def load_model(path, **kwargs):
+    """
+    (tokenizer, model, 로드 시간(초))를 반환합니다. safetensors가 있으면 메모리 매핑으로 읽습니다.
+    path가 'current' 포인터면 먼저 실제 버전 폴더로 확정합니다. (읽는 도중 교체되어도 같은 버전)
+    """
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+    path = os.path.realpath(path)
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(path, **kwargs)
+    model = AutoModelForTokenClassification.from_pretrained(
+        path, use_safetensors=True if has_safetensors(path) else None, **kwargs)
+    model.eval()
+    return tokenizer, model, time.perf_counter() - started
+
+def measure_latency(model, tokenizer, texts):
+    """문맥 1개씩 추론했을 때의 지연 시간 중앙값 / p95 (ms)"""
+    import torch
+    timings = []
+    with torch.inference_mode():
+        for text in texts[:LATENCY_SAMPLE_TEXTS]:
+            inputs = tokenizer(text, truncation=True, max_length=512, return_tensors='pt').to(model.device)
+            started = time.perf_counter()
+            model(**inputs)
+            timings.append((time.perf_counter() - started) * 1000)
+    if not timings:
+        return {}
+    timings.sort()
+    return {'latency_p50_ms': round(statistics.median(timings), 2),
+            'latency_p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)}
+
+
+# --- 3. 저장소 ---
+class ModelRegistry:
+    """버전 폴더(versions_dir) + 'current' 포인터(current_path, 심볼릭 링크)"""
+
+    def __init__(self, current_path=MODEL_PATH, versions_dir=MODEL_VERSIONS_DIR, keep=MODEL_REGISTRY_KEEP):
+        self.current_path = current_path
+        self.versions_dir = versions_dir
+        self.keep = keep
+
+    def version_path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        """등록된 버전 목록 (오래된 순, 저장 중인 임시 폴더 제외)"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir)
+                      if not name.startswith('.') and os.path.isdir(self.version_path(name)))
+
+    def current_version(self):
+        """'current' 포인터가 가리키는 버전 (포인터가 없거나 버전 폴더가 아니면 None)"""
+        if not os.path.islink(self.current_path):
+            return None
+        target = os.path.realpath(self.current_path)
+        if os.path.dirname(target) != os.path.realpath(self.versions_dir):
+            return None
+        return os.path.basename(target)
+
+    def metadata(self, version):
+        try:
+            with open(os.path.join(self.version_path(version), METADATA_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def publish(self, model, tokenizer, metadata=None, sample_texts=(), promote=True):
+        """
+        새 버전을 등록합니다. (임시 폴더 저장 -> 다시 로드해 검증/측정 -> 이름 바꿔 넣기 -> current 교체 -> 정리)
+        반환: 버전 이름
+        """
+        # (기존 방식 폴더를 먼저 버전으로 가져옴 -> 새 버전보다 오래된 이름 + 새 버전의 parent가 되어 rollback 가능)
+        self.adopt_legacy()
+        version = self._save_version(model, tokenizer, metadata, sample_texts)
+        if promote:
+            self.promote(version)
+        return version
+
+    def _save_version(self, model, tokenizer, metadata=None, sample_texts=()):
+        """버전 폴더를 저장하고 버전 이름을 반환합니다. (current는 그대로)"""
+        version = now_version()
+        while os.path.exists(self.version_path(version)):
+            time.sleep(1)
+            version = now_version()
+        staging_path = self.version_path(f".staging-{version}")
+        shutil.rmtree(staging_path, ignore_errors=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        try:
+            model.save_pretrained(staging_path) # (transformers 기본: model.safetensors)
+            tokenizer.save_pretrained(staging_path) # (중요) 토크나이저도 함께 저장
+
+            loaded_tokenizer, loaded_model, load_seconds = load_model(staging_path)
+            metadata = {
+                'version': version,
+                'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'parent': self.current_version(),
+                'format': 'safetensors' if has_safetensors(staging_path) else 'pytorch',
+                'load_seconds': round(load_seconds, 3),
+                **measure_latency(loaded_model, loaded_tokenizer, list(sample_texts)),
+                **(metadata or {}),
+            }
+            with open(os.path.join(staging_path, METADATA_FILE), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            os.replace(staging_path, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        logger.info(f"🗃️ 모델 버전 {version} 등록 (로드 {metadata['load_seconds']:.2f}초, "
+                    f"추론 p50 {metadata.get('latency_p50_ms', '-')}ms)")
+        return version
+
+    def promote(self, version):
+        """'current' 포인터를 version으로 원자적으로 바꿉니다. (임시 링크 + os.replace)"""
+        if version not in self.versions():
+            raise ValueError(f"등록되지 않은 버전입니다: {version}")
+        self.adopt_legacy()
+        temp_link = f"{self.current_path}.link-{os.getpid()}"
+        if os.path.lexists(temp_link):
+            os.remove(temp_link)
+        os.symlink(os.path.relpath(self.version_path(version), os.path.dirname(self.current_path)), temp_link)
+        os.replace(temp_link, self.current_path)
+        logger.info(f"✅ 현재 뇌: {version} ({self.current_path})")
+        self.prune()
+
+    def rollback(self, version=None):
+        """현재 버전의 부모(없으면 바로 이전 버전) 또는 지정한 version으로 되돌립니다. 반환: 되돌린 버전"""
+        if version is None:
+            current, versions = self.current_version(), self.versions()
+            parent = self.metadata(current).get('parent') if current else None
+            older = [name for name in versions if current is None or name < current]
+            version = parent if parent in versions else (older[-1] if older else None)
+            if version is None:
+                raise ValueError("되돌릴 이전 버전이 없습니다.")
+        self.promote(version)
+        return version
+
+    def prune(self):
+        """최근 keep개 버전만 남깁니다. (현재 버전은 항상 남김) 지운 버전 목록을 반환합니다."""
+        current = self.current_version()
+        removable = [name for name in self.versions() if name != current]
+        removed = removable[:max(0, len(removable) - (self.keep - (1 if current else 0)))]
+        for name in removed:
+            shutil.rmtree(self.version_path(name), ignore_errors=True)
+        if removed:
+            logger.info(f"🧹 오래된 모델 버전 {len(removed)}개를 지웠습니다. ({', '.join(removed)})")
+        return removed
+
+    def adopt_legacy(self):
+        """
+        기존 방식의 모델 폴더(current_path가 일반 폴더, current_path + '.prev')를 버전으로 가져옵니다.
+        (가중치는 safetensors로 다시 저장, 안에 쌓인 checkpoints는 버림)
+        """
+        if os.path.isdir(self.current_path + '.prev') and not os.path.islink(self.current_path + '.prev'):
+            self._adopt(self.current_path + '.prev', promote=False)
+        if os.path.isdir(self.current_path) and not os.path.islink(self.current_path):
+            self._adopt(self.current_path, promote=True)
+
+    def _adopt(self, path, promote):
+        try:
+            tokenizer, model, _ = load_model(path)
+            version = self._save_version(model, tokenizer, {'source': f'legacy:{os.path.basename(path)}'})
+        except Exception as e:
+            logger.error(f"❌ 기존 모델 폴더({path}) 가져오기 실패. 그대로 둡니다: {e}")
+            raise
+        legacy_path = f"{path}.legacy-{os.getpid()}"
+        os.replace(path, legacy_path)
+        if promote: # (폴더를 치운 직후 바로 링크로 채움)
+            temp_link = f"{path}.link-{os.getpid()}"
+            os.symlink(os.path.relpath(self.version_path(version), os.path.dirname(path)), temp_link)
+            os.replace(temp_link, path)
+        shutil.rmtree(legacy_path, ignore_errors=True) # (LEGACY_DIRS 체크포인트 포함)
+        logger.info(f"📥 기존 모델 폴더({path})를 버전 {version}으로 가져왔습니다.")
+        return version
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="NER 모델 버전 관리")
+    parser.add_argument('--rollback', nargs='?', const='', metavar='VERSION',
+                        help="이전 버전(또는 지정 버전)으로 되돌립니다.")
+    parser.add_argument('--promote', metavar='VERSION', help="지정 버전을 현재 뇌로 바꿉니다.")
+    parser.add_argument('--measure-load', nargs='?', const='', metavar='VERSION',
+                        help="현재(또는 지정) 버전의 로드 시간을 잽니다.")
+    parser.add_argument('--student', action='store_true', help="학생 뇌(my-ner-student) 저장소를 관리합니다.")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(STUDENT_MODEL_PATH, STUDENT_VERSIONS_DIR) if args.student else ModelRegistry()
+    registry.adopt_legacy()
+    if args.rollback is not None:
+        registry.rollback(args.rollback or None)
+    if args.promote:
+        registry.promote(args.promote)
+    if args.measure_load is not None:
+        path = registry.version_path(args.measure_load) if args.measure_load else registry.current_path
+        _, _, load_seconds = load_model(path)
+        logger.info(f"⏱️ {os.path.basename(os.path.realpath(path))} 로드 {load_seconds:.2f}초 "
+                    f"(safetensors: {has_safetensors(os.path.realpath(path))})")
+
+    current = registry.current_version()
+    for name in registry.versions():
+        meta = registry.metadata(name)
+        logger.info(f"{'👉' if name == current else '  '} {name}  F1 {meta.get('entity_f1', '-')}  "
+                    f"학습 {meta.get('train_rows', '-')}행  로드 {meta.get('load_seconds', '-')}초  "
+                    f"추론 p50 {meta.get('latency_p50_ms', '-')}ms  {meta.get('source', '')}"
+                    + (f"teacher {meta['teacher_version']} (재현율 하락 {meta.get('recall_drop', '-')})"
+                       if 'teacher_version' in meta else ''))
@@ -0,0 +1,308 @@
+# 🧠 (AI) NER 추론 도우미 - 슬라이딩 윈도우(Chunked) 추론
+# ----------------------------------------------------
+# 'crawler.py'가 이 파일을 import하여 긴 문서를 NER 모델로 스캔합니다.
+# 1. 문서를 토큰 기준으로 겹치는(overlap) 윈도우로 자릅니다. (512 토큰 한계 회피)
+# 2. 모든 윈도우를 "한 번의 배치"로 파이프라인에 넣습니다.
+# 3. 윈도우별 start/end를 문서 전체 기준 오프셋으로 되돌리고,
+#    겹침 구간에서 중복 탐지된 개체를 하나로 병합합니다.
+# 4. NERBatchQueue: 여러 페이지의 조각을 모아 배치 단위로 추론하고, 결과를 원래 조각으로 돌려줍니다.
+# 5. RemoteNER: 상주 탐지 서비스(detector_server.py)의 "이미 로드된" 모델에 추론을 위임합니다.
+# 6. (✨ 신규) apply_backend: GPU 없는 서버용 int8 동적 양자화 백엔드
+# 7. (✨ 신규) CascadeNER: 작은 '학생' 뇌(distill.py)로 먼저 추론하고, 확신도가 낮은 개체만 '경력직' 뇌로 다시 봅니다.
+# ----------------------------------------------------
+
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+# (참고) 윈도우를 잘라 다시 토크나이즈하면 경계에서 토큰 수가 조금 늘 수 있어 512보다 여유를 둡니다.
+NER_WINDOW_TOKENS = 400 # 윈도우 1개의 최대 토큰 수
+NER_STRIDE_TOKENS = 100 # 인접 윈도우끼리 겹치는 토큰 수
+NER_BATCH_SIZE = 8      # 파이프라인 1회 호출 시 배치 크기 (패딩은 배치 안에서만 발생)
+NER_QUEUE_FLUSH_WINDOWS = NER_BATCH_SIZE * 4 # 배치 큐에 이만큼 윈도우가 쌓이면 추론 실행
+
+# (✨ 신규) 상주 탐지 서비스 설정
+DETECTOR_URL = 'http://127.0.0.1:8765' # detector_server.py 기본 주소
+REMOTE_NER_TIMEOUT = 120               # 서비스 1회 요청 타임아웃(초)
+REMOTE_QUEUE_FLUSH_TEXTS = 32          # 이만큼 조각이 쌓이면 서비스로 전송
+
+# (✨ 신규) CPU 추론 백엔드 - config.NER_BACKEND로 변경 가능
+NER_BACKENDS = ('fp32', 'int8')
+NER_BACKEND = 'fp32'
+
+# (✨ 신규) 크롤링에 쓸 뇌 - config.NER_MODEL / config.NER_SECOND_PASS_SCORE로 변경 가능
+NER_MODELS = ('teacher', 'student')
+NER_MODEL = 'teacher'             # 'student'면 distill.py가 만든 학생 뇌 (없으면 'teacher')
+NER_SECOND_PASS_SCORE = None      # (학생 뇌) 확신도가 이보다 낮은 개체는 teacher로 다시 판단 (None이면 2차 판독 없음, 예: 0.9)
+SECOND_PASS_CONTEXT_CHARS = 100   # 2차 판독 때 개체 앞뒤로 함께 보내는 문자 수
+
+
+# --- 2. 윈도우 분할 ---
+def split_into_windows(text, tokenizer, window_tokens=NER_WINDOW_TOKENS, stride_tokens=NER_STRIDE_TOKENS):
+    """
+    텍스트를 토큰 기준의 겹치는 윈도우로 나눕니다.
+    반환: [(char_start, char_end), ...] (원문 text 기준 문자 오프셋)
+    """
+    if not text:
+        return []
+    if stride_tokens >= window_tokens:
+        raise ValueError("stride_tokens는 window_tokens보다 작아야 합니다.")
+
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    offsets = encoding['offset_mapping']
+    if len(offsets) <= window_tokens:
+        return [(0, len(text))]
+
+    windows = []
+    step = window_tokens - stride_tokens
+    for token_start in range(0, len(offsets), step):
+        token_end = min(token_start + window_tokens, len(offsets))
+        windows.append((offsets[token_start][0], offsets[token_end - 1][1]))
+        if token_end == len(offsets):
+            break
+    return windows
+
+
+# --- 3. 겹침 구간 병합 ---
+def merge_entities(entities, text):
+    """
+    전역 오프셋으로 변환된 개체 목록에서, 겹치는 같은 그룹의 개체를 하나로 합칩니다.
+    (윈도우 경계에서 잘린 개체는 옆 윈도우의 온전한 개체와 합쳐집니다.)
+    """
+    merged = []
+    for entity in sorted(entities, key=lambda e: (e['start'], -e['end'])):
+        last = merged[-1] if merged else None
+        if last and last['entity_group'] == entity['entity_group'] and entity['start'] < last['end']:
+            if entity['end'] > last['end']:
+                last['end'] = entity['end']
+                last['word'] = text[last['start']:last['end']]
+            last['score'] = max(last['score'], entity['score'])
+            continue
+        merged.append(dict(entity))
+    return merged
+
+
+# --- 4. (✨ 신규) 페이지 간 배치 추론 큐 ---
+class NERBatchQueue:
+    """
+    여러 페이지의 텍스트 조각(segment)을 모아 두었다가, 윈도우 단위 배치로 한꺼번에 추론합니다.
+    결과는 submit 때 받은 key(예: (url, 'visible'))로 원래 페이지/조각에 되돌려 줍니다.
+    """
+
+    def __init__(self, ner_pipeline, batch_size=NER_BATCH_SIZE, flush_windows=NER_QUEUE_FLUSH_WINDOWS,
+                 window_tokens=NER_WINDOW_TOKENS, stride_tokens=NER_STRIDE_TOKENS):
+        self.ner_pipeline = ner_pipeline
+        self.batch_size = batch_size
+        self.flush_windows = flush_windows
+        self.window_tokens = window_tokens
+        self.stride_tokens = stride_tokens
+        self._pending = [] # (key, text, [(char_start, char_end), ...])
+        self._pending_windows = 0
+
+    def submit(self, key, text):
+        """텍스트 조각을 큐에 넣습니다. (빈 텍스트는 무시)"""
+        windows = split_into_windows(text, self.ner_pipeline.tokenizer, self.window_tokens, self.stride_tokens)
+        if not windows:
+            return
+        self._pending.append((key, text, windows))
+        self._pending_windows += len(windows)
+
+    def __len__(self):
+        return self._pending_windows
+
+    def pending_keys(self):
+        """아직 추론하지 않은 조각의 key 목록 (flush 실패 시 어떤 조각의 결과가 없는지 알리기 위함)"""
+        return [key for key, _, _ in self._pending]
+
+    def is_full(self):
+        """쌓인 윈도우가 flush_windows 이상이면 True (호출 측에서 flush 시점 판단용)"""
+        return self._pending_windows >= self.flush_windows
+
+    def flush(self):
+        """
+        쌓인 모든 윈도우를 배치 추론하고 [(key, text, entities), ...]를 반환합니다.
+        (길이순 정렬 후 배치를 만들어, 배치 내 패딩 낭비를 줄입니다.)
+        """
+        pending, self._pending, self._pending_windows = self._pending, [], 0
+        chunks = [] # (segment_index, char_start, chunk_text)
+        for segment_index, (_, text, windows) in enumerate(pending):
+            for char_start, char_end in windows:
+                chunks.append((segment_index, char_start, text[char_start:char_end]))
+        if not chunks:
+            return []
+
+        chunks.sort(key=lambda chunk: len(chunk[2]))
+        outputs = self.ner_pipeline([chunk_text for _, _, chunk_text in chunks], batch_size=self.batch_size)
+
+        per_segment = [[] for _ in pending]
+        for (segment_index, char_start, _), entities in zip(chunks, outputs):
+            for entity in entities:
+                per_segment[segment_index].append({
+                    **entity,
+                    'start': entity['start'] + char_start,
+                    'end': entity['end'] + char_start
+                })
+
+        logger.debug(f"🧩 [NER 배치 큐] 조각 {len(pending)}개 -> 윈도우 {len(chunks)}개 추론 (배치 {self.batch_size})")
+        return [(key, text, merge_entities(entities, text))
+                for (key, text, _), entities in zip(pending, per_segment)]
+
+
+# --- 5. (✨ 신규) 상주 탐지 서비스(detector_server.py) 클라이언트 ---
+class RemoteNER:
+    """
+    이미 모델을 메모리에 올려 둔 상주 탐지 서비스에 NER을 위임합니다.
+    (크롤러가 매번 torch/transformers를 import하고 모델을 다시 로드하는 비용을 없앱니다.)
+    """
+
+    def __init__(self, base_url, timeout=REMOTE_NER_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def is_alive(self):
+        """서비스가 떠 있고 모델이 로드되어 있으면 True"""
+        try:
+            response = requests.get(f"{self.base_url}/health", timeout=2)
+            return response.ok and response.json().get('model_loaded', False)
+        except Exception:
+            return False
+
+    def ner_batch(self, texts):
+        """텍스트 목록을 서비스로 보내고, 같은 순서의 개체 리스트 목록을 받습니다."""
+        response = requests.post(f"{self.base_url}/ner", json={'texts': texts}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['entities']
+
+
+class RemoteNERQueue:
+    """NERBatchQueue와 같은 인터페이스로, 쌓인 조각을 서비스에 한 번에 보냅니다. (배치는 서비스가 처리)"""
+
+    def __init__(self, remote, flush_texts=REMOTE_QUEUE_FLUSH_TEXTS):
+        self.remote = remote
+        self.flush_texts = flush_texts
+        self._pending = [] # (key, text)
+
+    def submit(self, key, text):
+        if text:
+            self._pending.append((key, text))
+
+    def __len__(self):
+        return len(self._pending)
+
+    def pending_keys(self):
+        return [key for key, _ in self._pending]
+
+    def is_full(self):
+        return len(self._pending) >= self.flush_texts
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        outputs = self.remote.ner_batch([text for _, text in pending])
+        return [(key, text, entities) for (key, text), entities in zip(pending, outputs)]
+
+
+def make_ner_queue(ner_backend, **kwargs):
+    """ner_backend(로컬 파이프라인 또는 RemoteNER)에 맞는 배치 큐를 만듭니다."""
+    if isinstance(ner_backend, RemoteNER):
+        return RemoteNERQueue(ner_backend)
+    return NERBatchQueue(ner_backend, **kwargs)
+
+
+# --- 6. (✨ 신규) CPU 추론 백엔드 (fp32 / int8) ---
+def apply_backend(model, backend=NER_BACKEND):
+    """
+    로드한 모델에 추론 백엔드를 적용합니다.
+    - 'fp32': 그대로 사용 (기본값)
+    - 'int8': Linear 레이어를 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화 / CPU 전용)
+    """
+    if backend == 'fp32':
+        return model
+    if backend == 'int8':
+        import torch
+        model.eval()
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"지원하지 않는 NER 백엔드입니다: {backend} (지원: {NER_BACKENDS})")
+
+
+# --- 7. (✨ 신규) 학생 뇌 + 2차 판독 ---
+class CascadeNER:
+    """
+    학생 뇌(student 파이프라인)로 모든 윈도우를 추론하고, score < threshold인 개체만
+    주변 문맥(앞뒤 context_chars자)을 잘라 teacher 파이프라인으로 다시 판단합니다.
+    - 그 구간의 낮은 확신도 개체는 teacher 결과로 바꿉니다. (teacher가 아무것도 못 찾으면 버림)
+    - NERBatchQueue가 파이프라인 자리에 그대로 씁니다. (tokenizer + 호출 인터페이스가 같음)
+    """
+
+    def __init__(self, student, teacher, threshold, context_chars=SECOND_PASS_CONTEXT_CHARS):
+        self.student = student
+        self.teacher = teacher
+        self.threshold = threshold
+        self.context_chars = context_chars
+        self.tokenizer = student.tokenizer # (학생 뇌는 teacher 토크나이저를 그대로 씀)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.student_entities = 0
+        self.second_pass_entities = 0
+
+    def is_uncertain(self, entity):
+        return entity['score'] < self.threshold
+
+    def __call__(self, texts, batch_size=NER_BATCH_SIZE):
+        outputs = [list(entities) for entities in self.student(texts, batch_size=batch_size)]
+
+        # 1. 낮은 확신도 개체 주변 구간 (같은 텍스트에서 겹치는 구간은 하나로)
+        regions = [] # (text_index, char_start, char_end)
+        for text_index, entities in enumerate(outputs):
+            self.student_entities += len(entities)
+            for entity in sorted(filter(self.is_uncertain, entities), key=lambda e: e['start']):
+                self.second_pass_entities += 1
+                start = max(0, entity['start'] - self.context_chars)
+                end = min(len(texts[text_index]), entity['end'] + self.context_chars)
+                if regions and regions[-1][0] == text_index and start <= regions[-1][2]:
+                    regions[-1] = (text_index, regions[-1][1], max(end, regions[-1][2]))
+                else:
+                    regions.append((text_index, start, end))
+        if not regions:
+            return outputs
+
+        # 2. teacher로 한 번에 다시 판단 -> 구간 안의 낮은 확신도 개체를 teacher 결과로 교체
+        teacher_outputs = self.teacher([texts[i][start:end] for i, start, end in regions], batch_size=batch_size)
+        for (text_index, start, end), entities in zip(regions, teacher_outputs):
+            kept = [entity for entity in outputs[text_index]
+                    if not (self.is_uncertain(entity) and start <= entity['start'] and entity['end'] <= end)]
+            kept.extend({**entity, 'start': entity['start'] + start, 'end': entity['end'] + start}
+                        for entity in entities)
+            outputs[text_index] = sorted(kept, key=lambda e: e['start'])
+        logger.debug(f"🎓 [2차 판독] 학생 뇌 개체 {self.student_entities}개 중 {self.second_pass_entities}개를 teacher로 다시 판단")
+        return outputs
+
+
+# --- 8. 메인 함수 ---
+def run_chunked_ner_batch(texts, ner_pipeline, window_tokens=NER_WINDOW_TOKENS,
+                          stride_tokens=NER_STRIDE_TOKENS, batch_size=NER_BATCH_SIZE):
+    """
+    여러 텍스트를 윈도우로 나눈 뒤, 모든 윈도우를 한 번의 배치 호출로 추론합니다.
+    반환: texts와 같은 순서의 개체 리스트 목록 (start/end는 각 텍스트 기준 전역 오프셋)
+    (ner_pipeline이 RemoteNER이면 윈도우 분할/배치는 서비스 쪽에서 처리합니다.)
+    """
+    if isinstance(ner_pipeline, RemoteNER):
+        return ner_pipeline.ner_batch(texts) if texts else []
+
+    queue = NERBatchQueue(ner_pipeline, batch_size=batch_size,
+                          window_tokens=window_tokens, stride_tokens=stride_tokens)
+    for text_index, text in enumerate(texts):
+        queue.submit(text_index, text)
+
+    results = [[] for _ in texts]
+    for text_index, _, entities in queue.flush():
+        results[text_index] = entities
+    return results
+
+def run_chunked_ner(text, ner_pipeline, **kwargs):
+    """단일 텍스트용 슬라이딩 윈도우 NER. (run_chunked_ner_batch의 얇은 래퍼)"""
+    return run_chunked_ner_batch([text], ner_pipeline, **kwargs)[0]
@@ -1,13 +1,20 @@
 # 👁️ (AI) CLOVA OCR API 호출 도우미
 # ----------------------------------------------------
 # 'crawler.py'가 이 파일을 import하여 이미지 속 글자를 읽습니다.
+# (요청은 http_helper 공용 클라이언트로 보냅니다. 연결 재사용, 타임아웃/5xx 재시도, 서킷 브레이커)
 # ----------------------------------------------------
 
 import requests
 import json
 import uuid
 import time
+import logging
 import config # (우리의 비밀 키 로드)
+from http_helper import get_client
+
+logger = logging.getLogger(__name__)
+
+OCR_ENDPOINT = 'clova-ocr' # (http_helper 서킷 브레이커/지표 이름)
 
 def get_ocr_text(image_url):
     """
@@ -33,7 +40,8 @@ def get_ocr_text(image_url):
     }
     
     try:
-        response = requests.post(config.OCR_API_URL, headers=headers, data=json.dumps(payload), timeout=10)
+        response = get_client().post(config.OCR_API_URL, endpoint=OCR_ENDPOINT,
+                                     headers=headers, data=json.dumps(payload), timeout=10)
         response.raise_for_status() # 200 OK가 아니면 에러
         
         result = response.json()
@@ -47,8 +55,8 @@ def get_ocr_text(image_url):
         return full_text
         
     except requests.exceptions.ReadTimeout:
-        print(f"❌ [OCR API 에러] {image_url} 타임아웃")
+        logger.error(f"❌ [OCR API 에러] {image_url} 타임아웃")
         return None
     except Exception as e:
-        print(f"❌ [OCR API 에러] {e}")
+        logger.error(f"❌ [OCR API 에러] {e}")
         return None
\ No newline at end of file
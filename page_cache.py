@@ -0,0 +1,93 @@
+# 🗂️ (엔진) 페이지 상태 캐시 - 변경 없는 페이지는 탐지를 건너뜁니다.
+# ----------------------------------------------------
+# 'crawler.py'가 이 파일을 import하여 URL별 상태를 기억합니다. (page_cache.json)
+# 1. ETag / Last-Modified를 저장해 두었다가 다음 요청에 조건부 헤더(If-None-Match 등)로 보냅니다.
+#    -> 서버가 304 Not Modified를 주면 정규식/NER을 "전부" 건너뜁니다.
+# 2. 정규화한 본문의 해시를 저장합니다. 해시가 같으면(서버가 304를 지원하지 않아도) 건너뜁니다.
+# 3. 블록(줄) 단위 해시도 저장하여, 일부만 바뀐 페이지는 "바뀐 블록만" 다시 스캔합니다.
+# ----------------------------------------------------
+
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_blocks(html_content):
+    """HTML을 블록(줄) 목록으로 정규화합니다. (앞뒤 공백 제거, 빈 줄 제거)"""
+    return [line.strip() for line in html_content.splitlines() if line.strip()]
+
+def hash_text(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """URL -> {etag, last_modified, content_hash, block_hashes, checked_at} 영구 캐시 (JSON 파일)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock() # (fetch 스레드에서 헤더를 읽고, 메인 스레드에서 갱신)
+        self._entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ 페이지 캐시({path}) 로드 실패. 빈 캐시로 시작합니다: {e}")
+
+    def conditional_headers(self, url):
+        """이전 응답의 ETag/Last-Modified로 조건부 요청 헤더를 만듭니다."""
+        with self._lock:
+            entry = self._entries.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def changed_content(self, url, html_content):
+        """
+        이전 스캔과 비교하여 "다시 스캔할 부분"을 반환합니다.
+        - 처음 보는 페이지: 전체 HTML
+        - 본문 해시가 같음: None (스캔 불필요)
+        - 일부 블록만 바뀜: 바뀐(새로 생긴) 블록들만 이어 붙인 HTML
+        """
+        blocks = normalize_blocks(html_content)
+        content_hash = hash_text('\n'.join(blocks))
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return html_content
+        if entry.get('content_hash') == content_hash:
+            return None
+
+        known_blocks = set(entry.get('block_hashes', []))
+        changed = [block for block in blocks if hash_text(block) not in known_blocks]
+        return '\n'.join(changed) if changed else None
+
+    def update(self, url, html_content=None, etag=None, last_modified=None):
+        """스캔을 마친 페이지의 상태를 기록합니다. (html_content가 None이면 확인 시각만 갱신 - 304)"""
+        with self._lock:
+            entry = self._entries.setdefault(url, {})
+            entry['checked_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            if html_content is None:
+                return
+            blocks = normalize_blocks(html_content)
+            entry['etag'] = etag
+            entry['last_modified'] = last_modified
+            entry['content_hash'] = hash_text('\n'.join(blocks))
+            entry['block_hashes'] = sorted({hash_text(block) for block in blocks})
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여, 저장 도중 중단되어도 캐시가 깨지지 않게 합니다."""
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,100 @@
+# 🔍 (엔진) 정규식 PII 탐지 엔진
+# ----------------------------------------------------
+# 'crawler.py'가 이 파일을 import하여 정규식 1차 탐지를 수행합니다.
+# 1. REGEX_PATTERNS 전체를 "한 번만" 컴파일하여 하나의 결합 스캐너로 만듭니다.
+# 2. 문서 1개당 "1번"만 훑습니다. (기존: 패턴 8개 x 8번 스캔)
+# 3. 중복 제거는 set(해시) 기반 O(1) 조회로 처리합니다. (기존: 리스트 선형 탐색 O(n²))
+# 4. (✨ 수정) 결합 스캐너는 "가장 왼쪽" 매치를 고르므로, 먼저 시작하는 하위 패턴이 상위 PII를 삼킬 수 있습니다.
+#    (예: "고객 123 900101-1234567" -> ACCOUNT_NUM '123 900101-1234567')
+#    매치 구간 안에서 시작하는 상위 패턴을 다시 찾아, 그 RRN/카드번호 등도 제 유형으로 보고합니다.
+# ----------------------------------------------------
+
+import re
+
+# (✨ v2.21 정규식) - crawler.py에서 이동
+# (주의) 딕셔너리 순서 = 우선순위입니다. 같은 위치에서 여러 패턴이 맞으면 앞쪽 패턴이 선택됩니다.
+#        (앞선 위치의 하위 패턴 매치 안에 든 상위 패턴은 find_regex_leaks가 구간을 다시 훑어 찾습니다)
+REGEX_PATTERNS = {
+    'EMAIL': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'PHONE': r'\b\(?(010)\)?[-.)\s]*\d{3,4}[-.\s]*\d{4}\b',
+    'RRN': r'\b\d{6}[- ]*[1-4]\d{6}\b',
+    'CREDIT_CARD': r'\b\d{4}[- ]*\d{4}[- ]*\d{4}[- ]*\d{4}\b',
+    'ACCOUNT_NUM': r'\b\d{3}[- ]*\d{2,6}[- ]*\d{2,7}\b',
+    'API_KEY': r'\b(sk|pk|im-key-prod)-[a-zA-Z0-9_,-]{20,}\b',
+    'INTERNAL_IP': r'\b(192\.168\.\d{1,3}\.\d{1,3})\b|\b(10\.\d{1,3}\.\d{1,3}\.\d{1,3})\b',
+    'PHONE_GENERAL': r'\b\(?(0[2-9][0-9]?)\)?[-.)\s]*\d{3,4}[-.\s]*\d{4}\b|\b(15\d{2}|16\d{2})[-.\s]*\d{4}\b'
+}
+
+# PII 앞뒤로 저장할 문맥 길이 (총 300자 내외)
+CONTEXT_CHARS = 150
+
+
+def compile_patterns(patterns):
+    """패턴 딕셔너리를 이름 있는 그룹(named group)으로 묶어 하나의 정규식으로 컴파일합니다."""
+    combined = '|'.join(f'(?P<{pii_type}>{pattern})' for pii_type, pattern in patterns.items())
+    return re.compile(combined)
+
+
+# (✨ 핵심) 모듈 로드 시 "한 번만" 컴파일
+COMBINED_PATTERN = compile_patterns(REGEX_PATTERNS)
+# 유형별로 "그보다 우선순위가 높은 패턴들"만 묶은 스캐너 (매치 구간 재검사용, 첫 유형은 없음)
+HIGHER_PATTERNS = {pii_type: compile_patterns(dict(list(REGEX_PATTERNS.items())[:i]))
+                   for i, pii_type in enumerate(REGEX_PATTERNS) if i}
+
+
+def make_context(text, start, end, width=CONTEXT_CHARS):
+    """PII를 중심으로 앞뒤 width자의 문맥을 생성합니다."""
+    ctx_start = max(0, start - width)
+    ctx_end = min(len(text), end + width)
+    return text[ctx_start:ctx_end].strip().replace('\n', ' ').replace('\r', ' ')
+
+
+def iter_matches(text, pattern=COMBINED_PATTERN, higher=HIGHER_PATTERNS):
+    """pattern의 매치와, 각 매치 구간 안에서 시작하는 더 높은 우선순위 패턴의 매치를 차례로 돌려줍니다."""
+    for match in pattern.finditer(text):
+        yield match
+        yield from _rescan(text, match, higher)
+
+
+def _rescan(text, match, higher):
+    """match 구간 안의 각 위치에서 상위 패턴을 고정 매치합니다. (상위 매치는 구간 밖으로 이어져도 됨)"""
+    inner = higher.get(match.lastgroup)
+    if inner is None:
+        return
+    pos = match.start() + 1 # (시작 위치가 같으면 결합 스캐너가 이미 상위 패턴을 골랐음)
+    while pos < match.end():
+        found = inner.match(text, pos)
+        if found is None:
+            pos += 1
+            continue
+        yield found
+        yield from _rescan(text, found, higher)
+        pos = found.end()
+
+
+def find_regex_leaks(text, seen=None, pattern=COMBINED_PATTERN, higher=HIGHER_PATTERNS):
+    """
+    결합 정규식으로 텍스트를 1번만 훑어 PII 목록을 반환합니다.
+    seen: 이미 찾은 content 집합 (여러 텍스트에 걸쳐 중복을 제거하고 싶을 때 전달)
+    higher: 유형 -> 그보다 높은 우선순위 패턴 스캐너 (매치 구간 재검사, 빈 dict면 재검사 안 함)
+    """
+    leaks = []
+    if not text:
+        return leaks
+    if seen is None:
+        seen = set()
+
+    for match in iter_matches(text, pattern, higher):
+        content = match.group(0)
+        if content in seen: # (✨ O(1) 해시 조회)
+            continue
+        seen.add(content)
+
+        leaks.append({
+            'type': match.lastgroup.replace('_GENERAL', ''),
+            'content': content,
+            'context': make_context(text, match.start(), match.end()),
+            'source': 'regex' # (✨ 탐지 출처: 'regex' / 'ai')
+        })
+
+    return leaks
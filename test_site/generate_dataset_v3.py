@@ -1,6 +1,8 @@
 # 파일 이름: generate_dataset_v3.py (v2 대체)
 # 위치: Pii-Guardian/test_site/
 # (v3.0: PII 유형 추가, 난독화/오탐 패턴 대폭 강화)
+# (v3.1: generate_labeled_test_data - 페이지와 함께 "정답"(어느 줄에 어떤 유출/함정 값을 넣었는지) 반환
+#        -> benchmarks/bench_detection.py가 탐지 정확도 채점에 사용)
 
 import random
 import base64
@@ -115,6 +117,15 @@ def get_safe_number(): return f"Build #{fake.numerify(text='#########')}"
 
 def generate_random_test_data(num_lines=200): # (기본 라인 수 200으로 증가)
     """지정된 줄 수만큼 무작위 PII HTML을 생성하여 '문자열'로 반환"""
+    return generate_labeled_test_data(num_lines)[0]
+
+def generate_labeled_test_data(num_lines=200):
+    """
+    (v3.1) generate_random_test_data와 같은 페이지 + 정답 목록을 반환합니다. (같은 seed -> 같은 페이지)
+    정답: [{'generator': 생성 함수 이름, 'label': 'leak' | 'safe', 'value': 페이지에 넣은 문자열, 'context': 넣은 위치}, ...]
+    (html_comment 위치는 빈 줄이 되어 페이지에 남지 않으므로 정답에서도 뺍니다.)
+    """
+    truth = []
     
     # (v3.0) 생성기 목록 대폭 강화
     pii_generators = [
@@ -156,6 +167,8 @@ def generate_random_test_data(num_lines=200): # (기본 라인 수 200으로 증
                 output_lines.append(f'<p class="{pii_class}">Q: {part1}</p>')
                 output_lines.append(f'<div class="{pii_class}">A: {part2}</div>')
                 output_lines.append(f'<p class="{pii_class}">A2: {part3}</p>')
+                truth.extend({'generator': generator.__name__, 'label': 'leak', 'value': part, 'context': 'split'}
+                             for part in (part1, part2, part3))
                 i += 3 # 3줄 소모
                 continue
             else:
@@ -193,7 +206,10 @@ def generate_random_test_data(num_lines=200): # (기본 라인 수 200으로 증
             line = f'<img src="fake.png" alt="QR Code Data: {pii_data}" class="{pii_class}" style="display:none;">'
             
         output_lines.append(line)
+        if line:
+            truth.append({'generator': generator.__name__, 'label': 'leak' if pii_class == 'warning' else 'safe',
+                          'value': pii_data, 'context': context_choice})
         i += 1
 
     output_lines.append("<hr></body></html>")
-    return "\n".join(output_lines)
\ No newline at end of file
+    return "\n".join(output_lines), truth
\ No newline at end of file
@@ -0,0 +1,200 @@
+# 파일 이름: mock_api.py
+# 위치: Pii-Guardian/test_site/
+# ----------------------------------------------------
+# 유료 외부 API(CLOVA Studio / CLOVA OCR)를 흉내 내는 로컬 대역 서버입니다.
+# http_helper(재시도, 서킷 브레이커, 지표)와 autolabeler를 실제 API 없이 시험할 때 사용합니다.
+#   - POST /v3/chat-completions/<model>  : 단건({"label", "reason"}) / 배치({"results": [...]}) 답변
+#   - POST /ocr                           : CLOVA OCR V2 형식 답변
+#   - GET  /stats                         : 받은 요청 / 주입한 에러 수  (POST /reset 으로 초기화)
+# 장애 주입: --latency-ms, --error-rate(503), --rate-limit-rate(429), --down-seconds(시작 후 N초간 모두 503)
+# (✨ 추가) 부하 테스트용 (benchmarks/bench_labeling.py)
+#   - 지연 분포: --latency-dist fixed | uniform | lognormal, --latency-spread-ms, --per-item-ms(배치 항목당 추가 지연)
+#   - --batch-drop-rate: 배치 답변에서 항목을 빠뜨릴 확률 (autolabeler의 단건 재요청 경로 시험)
+#   - --seed: 지연/장애 주입 난수 고정 (판단은 난수와 무관: 같은 PII에는 항상 같은 판단 -> mock_verdict)
+#     요청마다 seed + 요청 본문 해시 + 같은 본문의 시도 횟수로 난수를 정하므로, 여러 스레드가 동시에 보내도 재현됩니다.
+#
+# 실행: python3 test_site/mock_api.py --port 5001 --error-rate 0.1
+#       (config.py: HCX_API_URL = "http://127.0.0.1:5001", OCR_API_URL = "http://127.0.0.1:5001/ocr")
+# ----------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+SETTINGS = {'latency_ms': 50, 'latency_dist': 'fixed', 'latency_spread_ms': 0.0, 'per_item_ms': 0.0,
+            'error_rate': 0.0, 'rate_limit_rate': 0.0, 'batch_drop_rate': 0.0, 'down_until': 0.0}
+STATS = {'requests': 0, 'items': 0, 'errors': 0, 'rate_limited': 0, 'dropped': 0}
+STATS_LOCK = threading.Lock()
+LATENCY_DISTS = ('fixed', 'uniform', 'lognormal')
+
+SEED = None
+ATTEMPTS = {}  # sha256(요청 본문) -> 지금까지 받은 횟수
+ATTEMPTS_LOCK = threading.Lock()
+
+PUBLIC_HINTS = ('example.', 'support@', 'help@', 'recruit@', 'PROD-', 'ORD-')
+PII_PATTERN = re.compile(r'\[탐지된 PII\]: "(.*)"')
+
+
+def mock_verdict(pii):
+    """PII 문자열만으로 정해지는 고정 판단 '유출' / '공개' (벤치마크의 정답 비교용)"""
+    if any(hint in pii for hint in PUBLIC_HINTS) or re.match(r'^1[5-6]\d{2}-', pii):
+        return '공개'
+    return '유출'
+
+
+def judge(user_message):
+    """간단한 고정 규칙으로 '유출' / '공개'를 답합니다."""
+    match = PII_PATTERN.search(user_message)
+    pii = match.group(1) if match else user_message
+    if mock_verdict(pii) == '공개':
+        return {'label': '공개', 'reason': '공개/샘플 정보 (mock)'}
+    return {'label': '유출', 'reason': '개인 식별 정보 (mock)'}
+
+
+def request_rng():
+    """
+    지금 요청의 난수 생성기. seed + 요청 본문 해시 + 같은 본문의 시도 횟수로 정합니다.
+    (스레드가 요청을 받는 순서와 무관 -> 같은 seed면 동시 실행에서도 같은 지연/장애. 재시도는 시도 횟수가 달라 다른 값)
+    """
+    digest = hashlib.sha256(request.get_data()).hexdigest()
+    with ATTEMPTS_LOCK:
+        attempt = ATTEMPTS.get(digest, 0)
+        ATTEMPTS[digest] = attempt + 1
+    if SEED is None:
+        return random.Random()
+    return random.Random(f"{SEED}:{digest}:{attempt}")
+
+
+def sample_latency(rng, items=1):
+    """설정된 분포에서 지연 시간(초)을 뽑습니다. (배치는 항목당 per_item_ms 추가)"""
+    base, spread = SETTINGS['latency_ms'], SETTINGS['latency_spread_ms']
+    if SETTINGS['latency_dist'] == 'uniform':
+        latency = rng.uniform(max(0.0, base - spread), base + spread)
+    elif SETTINGS['latency_dist'] == 'lognormal':
+        # 중앙값 base, spread는 "대략 p84 - 중앙값" (긴 꼬리)
+        sigma = math.log1p(spread / base) if base > 0 else 0.0
+        latency = rng.lognormvariate(math.log(max(base, 1e-3)), sigma)
+    else:
+        latency = base
+    return (latency + SETTINGS['per_item_ms'] * max(0, items - 1)) / 1000.0
+
+
+def inject_failure(rng, items=1):
+    """설정에 따라 지연을 넣고, 에러 응답(또는 None)을 반환합니다."""
+    with STATS_LOCK:
+        STATS['requests'] += 1
+        STATS['items'] += items
+    time.sleep(sample_latency(rng, items))
+    if time.time() < SETTINGS['down_until'] or rng.random() < SETTINGS['error_rate']:
+        with STATS_LOCK:
+            STATS['errors'] += 1
+        return jsonify({'status': {'code': '50000', 'message': 'mock error'}}), 503
+    if rng.random() < SETTINGS['rate_limit_rate']:
+        with STATS_LOCK:
+            STATS['rate_limited'] += 1
+        return jsonify({'status': {'code': '42901', 'message': 'Too Many Requests'}}), 429, {'Retry-After': '1'}
+    return None
+
+
+@app.route('/v3/chat-completions/<model>', methods=['POST'])
+def chat_completions(model):
+    user_message = request.get_json()['messages'][-1]['content']
+    parts = user_message.split('[항목]')[1:]
+    rng = request_rng()
+    failure = inject_failure(rng, max(1, len(parts)))
+    if failure is not None:
+        return failure
+    if parts:
+        results = []
+        for part in parts:
+            if rng.random() < SETTINGS['batch_drop_rate']:
+                with STATS_LOCK:
+                    STATS['dropped'] += 1
+                continue
+            item_id = int(re.search(r'\[id\]: (\d+)', part).group(1))
+            results.append({'id': item_id, **judge(part)})
+        answer = {'results': results}
+    else:
+        answer = judge(user_message)
+    return jsonify({'status': {'code': '20000'},
+                    'result': {'message': {'role': 'assistant', 'content': json.dumps(answer, ensure_ascii=False)}}})
+
+
+@app.route('/ocr', methods=['POST'])
+def ocr():
+    failure = inject_failure(request_rng())
+    if failure is not None:
+        return failure
+    payload = request.get_json()
+    return jsonify({'version': 'V2', 'requestId': payload.get('requestId'),
+                    'images': [{'inferResult': 'SUCCESS',
+                                'fields': [{'inferText': '연락처:'}, {'inferText': '010-1234-5678'}]}]})
+
+
+@app.route('/stats')
+def stats():
+    with STATS_LOCK:
+        return jsonify(STATS)
+
+
+@app.route('/reset', methods=['POST'])
+def reset():
+    with ATTEMPTS_LOCK:
+        ATTEMPTS.clear() # (같은 seed로 다시 돌리면 처음과 같은 지연/장애)
+    with STATS_LOCK:
+        for key in STATS:
+            STATS[key] = 0
+        return jsonify(STATS)
+
+
+def configure(seed=None, down_seconds=0.0, **settings):
+    """SETTINGS를 바꿉니다. (down_seconds: 지금부터 N초 동안 모두 503)"""
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"알 수 없는 설정: {unknown}")
+    if settings.get('latency_dist', SETTINGS['latency_dist']) not in LATENCY_DISTS:
+        raise ValueError(f"latency_dist는 {LATENCY_DISTS} 중 하나여야 합니다.")
+    global SEED
+    SETTINGS.update(settings, down_until=time.time() + down_seconds)
+    if seed is not None:
+        SEED = seed
+        with ATTEMPTS_LOCK:
+            ATTEMPTS.clear()
+
+
+def serve_in_background(port=0):
+    """(벤치마크용) 같은 프로세스의 스레드에서 서버를 띄우고, (서버, 기본 URL)을 반환합니다. server.shutdown()으로 종료"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="CLOVA Studio / CLOVA OCR 로컬 대역 서버")
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--latency-ms', type=float, default=50, help="지연 시간(ms) (분포의 중앙값)")
+    parser.add_argument('--latency-dist', choices=LATENCY_DISTS, default='fixed')
+    parser.add_argument('--latency-spread-ms', type=float, default=0.0, help="uniform: ±범위, lognormal: 꼬리 폭")
+    parser.add_argument('--per-item-ms', type=float, default=0.0, help="배치 요청의 항목당 추가 지연(ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503을 돌려줄 확률")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="429를 돌려줄 확률")
+    parser.add_argument('--batch-drop-rate', type=float, default=0.0, help="배치 답변에서 항목을 빠뜨릴 확률")
+    parser.add_argument('--down-seconds', type=float, default=0.0, help="시작 후 N초 동안 모든 요청에 503")
+    parser.add_argument('--seed', type=int, default=None, help="지연/장애 주입 난수 seed")
+    args = parser.parse_args()
+
+    configure(seed=args.seed, down_seconds=args.down_seconds, latency_ms=args.latency_ms,
+              latency_dist=args.latency_dist, latency_spread_ms=args.latency_spread_ms,
+              per_item_ms=args.per_item_ms, error_rate=args.error_rate,
+              rate_limit_rate=args.rate_limit_rate, batch_drop_rate=args.batch_drop_rate)
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
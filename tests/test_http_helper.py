@@ -0,0 +1,55 @@
+# 🧪 (테스트) http_helper 서킷 브레이커
+# 실행: python3 -m pytest -q tests
+
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_helper # noqa: E402
+from http_helper import CircuitOpenError, HttpClient # noqa: E402
+
+
+class FakeResponse:
+    status_code = 200
+
+
+def open_breaker(client, endpoint):
+    """엔드포인트의 서킷을 열고, 곧바로 half-open 시험 1건을 보낼 수 있는 상태로 만듭니다."""
+    breaker, _ = client._endpoint_state(endpoint)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == 'open'
+    breaker.reset_seconds = 0.0
+    return breaker
+
+
+def test_half_open_trial_with_unexpected_error_releases_the_trial(monkeypatch):
+    monkeypatch.setattr(http_helper, 'backoff_delay', lambda attempt: 0.0)
+    client = HttpClient(retries=0)
+    breaker = open_breaker(client, 'api')
+
+    def broken_body(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken mid-body")
+    monkeypatch.setattr(client.session, 'request', broken_body)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get('http://api.test/x', endpoint='api')
+    assert breaker.state == 'open' # (시험 실패 -> 다시 차단)
+    assert not breaker._trial_in_flight
+
+    # 차단 시간이 지나면 다음 시험 요청이 실제로 나가고, 성공하면 회복합니다.
+    sent = []
+    monkeypatch.setattr(client.session, 'request', lambda *args, **kwargs: sent.append(args) or FakeResponse())
+    assert client.get('http://api.test/x', endpoint='api').status_code == 200
+    assert sent and breaker.state == 'closed'
+
+
+def test_open_breaker_rejects_without_sending(monkeypatch):
+    client = HttpClient(retries=0)
+    breaker = open_breaker(client, 'api')
+    breaker.reset_seconds = 3600.0
+    monkeypatch.setattr(client.session, 'request', lambda *args, **kwargs: pytest.fail("요청이 나가면 안 됨"))
+    with pytest.raises(CircuitOpenError):
+        client.get('http://api.test/x', endpoint='api')
@@ -0,0 +1,140 @@
+# 🧊 (엔진) 토큰화 결과 캐시 - 학습 데이터를 Arrow 파일로 보관하고, 바뀌지 않은 행은 다시 토큰화하지 않습니다.
+# ----------------------------------------------------
+# 'train.py'가 이 파일을 import하여 (context, content) 행의 토큰화 + IOB2 태그 결과를 재사용합니다.
+# (기존: 매일 밤 새 정답 + 재현(replay) 버퍼를 "전부" 다시 토큰화 -> 같은 행을 몇 번이고 반복 처리)
+# 1. 폴더 = 토크나이저 지문(fingerprint): 토크나이저 설정(tokenizer.json) + 최대 길이 + 태그 정의 + 전처리 버전의 해시
+#    -> 토크나이저나 태그 정의가 바뀌면 다른 폴더를 쓰므로 이전 결과는 자동으로 무시됩니다.
+# 2. 행 키(row_key) = sha1(context + content). 같은 키는 한 번만 토큰화합니다.
+# 3. 새로 토큰화한 행은 조각(shard)으로 저장하고, 조각이 많아지면 하나로 합칩니다. (datasets.save_to_disk, Arrow)
+#
+# 관리: python3 tokenized_cache.py [--clear]  (지문별 행 수 출력)
+# ----------------------------------------------------
+
+import hashlib
+import os
+import shutil
+import time
+import logging
+
+from datasets import concatenate_datasets, load_from_disk
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+BASE_PATH = "/root/PII-Guardian"
+TOKENIZED_CACHE_DIR = os.path.join(BASE_PATH, 'tokenized-cache')
+TOKENIZED_CACHE_MAX_SHARDS = 8     # 조각이 이보다 많으면 하나로 합칩니다.
+ROW_KEY_COLUMN = 'row_key'
+
+
+def row_key(context, content):
+    return hashlib.sha1(f"{context}\x00{content}".encode('utf-8')).hexdigest()
+
+def tokenizer_fingerprint(tokenizer, *extra):
+    """토크나이저 설정 + extra(최대 길이, 태그 정의 등)의 해시 (fast 토크나이저는 tokenizer.json 전체)"""
+    backend = getattr(tokenizer, 'backend_tokenizer', None)
+    identity = backend.to_str() if backend is not None else f"{tokenizer.name_or_path}|{len(tokenizer)}"
+    raw = '|'.join([type(tokenizer).__name__, identity] + [str(value) for value in extra])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class TokenizedCache:
+    """토크나이저 지문 1개에 해당하는 토큰화 결과 (row_key 열 포함 Arrow 조각들)"""
+
+    def __init__(self, fingerprint, root=TOKENIZED_CACHE_DIR, max_shards=TOKENIZED_CACHE_MAX_SHARDS):
+        self.root = root
+        self.fingerprint = fingerprint
+        self.path = os.path.join(root, fingerprint)
+        self.max_shards = max_shards
+        self._dataset = None
+        self._positions = None
+
+    def _shard_paths(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.startswith('shard-'))
+
+    def dataset(self):
+        """저장된 모든 조각을 이어 붙인 Dataset (없으면 None, 메모리 매핑이라 크기와 상관없이 가벼움)"""
+        if self._dataset is None:
+            shards = []
+            for path in self._shard_paths():
+                try:
+                    shards.append(load_from_disk(path))
+                except Exception as e:
+                    logger.warning(f"⚠️ 토큰화 캐시 조각({path}) 로드 실패. 무시합니다: {e}")
+            self._dataset = concatenate_datasets(shards) if shards else None
+        return self._dataset
+
+    def positions(self):
+        """row_key -> dataset() 안의 위치"""
+        if self._positions is None:
+            dataset = self.dataset()
+            keys = dataset[ROW_KEY_COLUMN] if dataset is not None else []
+            self._positions = {key: position for position, key in enumerate(keys)}
+        return self._positions
+
+    def add(self, dataset):
+        """새로 토큰화한 행(row_key 열 포함)을 조각으로 저장합니다."""
+        if dataset is None or len(dataset) == 0:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        dataset.save_to_disk(os.path.join(self.path, f"shard-{time.time_ns()}"))
+        self._dataset, self._positions = None, None
+        if len(self._shard_paths()) > self.max_shards:
+            self.compact()
+
+    def compact(self):
+        """모든 조각을 하나로 합칩니다. (새 조각을 먼저 저장한 뒤 이전 조각을 지움)"""
+        old_shards = self._shard_paths()
+        merged = self.dataset()
+        if merged is None:
+            return
+        merged_path = os.path.join(self.path, f"shard-{time.time_ns()}")
+        merged.flatten_indices().save_to_disk(merged_path)
+        for path in old_shards:
+            shutil.rmtree(path, ignore_errors=True)
+        self._dataset, self._positions = None, None
+        logger.info(f"🧊 토큰화 캐시 조각 {len(old_shards)}개를 1개로 합쳤습니다. ({len(merged)}행)")
+
+    def prune_other_fingerprints(self):
+        """현재 지문이 아닌(이전 토크나이저/태그 정의) 캐시 폴더를 지웁니다. 지운 폴더 수를 반환합니다."""
+        if not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for name in os.listdir(self.root):
+            if name != self.fingerprint and os.path.isdir(os.path.join(self.root, name)):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"🧹 이전 토크나이저의 토큰화 캐시 {removed}개를 지웠습니다.")
+        return removed
+
+    def fetch_or_build(self, keys, build_missing):
+        """
+        keys 순서대로의 Dataset을 반환합니다. (반환: (Dataset, 적중 수, 새로 만든 수))
+        - build_missing(missing_keys): 캐시에 없는 키들의 Dataset(row_key 열 포함)을 만드는 함수
+        """
+        positions = self.positions()
+        missing = [key for key in dict.fromkeys(keys) if key not in positions]
+        if missing:
+            self.add(build_missing(missing))
+            positions = self.positions()
+        dataset = self.dataset()
+        return dataset.select([positions[key] for key in keys]), len(keys) - len(missing), len(missing)
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="학습 데이터 토큰화 캐시 관리")
+    parser.add_argument('--clear', action='store_true', help="캐시를 모두 지웁니다.")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(TOKENIZED_CACHE_DIR, ignore_errors=True)
+    for name in sorted(os.listdir(TOKENIZED_CACHE_DIR)) if os.path.isdir(TOKENIZED_CACHE_DIR) else []:
+        cached = TokenizedCache(name).dataset()
+        logger.info(f"🧊 {name}: {len(cached) if cached is not None else 0}행")
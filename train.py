@@ -1,26 +1,63 @@
 # 🎓 (봇 3) '학습기' 봇. '자동' 정답으로 '신입' 봇 뇌 훈련 -> my-ner-model
-# (v2.4 - 체크포인트 2개 저장)
+# (v2.11 - feedback_data.csv/trained.log -> SQLite 저장소, 이어서 학습(warm-start) + 재현(replay) 버퍼 + 학습량 예산,
+#          일괄 토큰화 + 토큰화 캐시, 토큰 수 예산 배치 + packing, 검증 세트 + 조기 종료 + 마감 시각, 모델 버전 저장소,
+#          학생 뇌 증류)
 # ----------------------------------------------------
-# 1. '정답' 목록 (feedback_data.csv) [In_2]를 읽습니다.
-# 2. 'trained.log' (학습 기록)을 읽습니다.
-# 3. [In_2]에만 있고 [학습 기록]에는 없는 "새로운 정답"만 학습합니다.
-# 4. 학습 완료 후, "새로운 정답"의 ID를 'trained.log'에 '추가'합니다.
+# 1. 저장소(pii_guardian.db)에서 "'유출' 라벨 + 아직 학습 안 함(trained_at 없음)" 행만 읽습니다.
+# 2. (기존 trained.log는 저장소로 최초 1회 자동 이전됩니다.)
+# 3. "새로운 정답"을 학습합니다.
+#    (✨ v2.6) 매번 BASE_MODEL에서 새로 시작하지 않고, 현재 'my-ner-model'에서 이어서 학습합니다. (warm-start)
+#              새 정답에 "이미 학습한 '유출' 행"을 PII 종류별로 고르게 뽑은 재현(replay) 버퍼를 섞어
+#              이전에 배운 것을 잊지 않게 합니다.
+#              1회 학습량은 TRAIN_MAX_STEPS로 고정: 새 정답이 너무 많으면 남은 것은 다음 실행에서 학습합니다.
+#              (python3 train.py --from-base : 기존 방식대로 BASE_MODEL에서 새로 학습)
+#    (✨ v2.7) 전처리: 행마다가 아니라 한 번에 토큰화하고 IOB2 태그는 배열 연산으로 붙입니다.
+#              토큰화 결과는 tokenized_cache(Arrow)에 보관 -> 재현 버퍼 / 재학습 때 같은 행은 다시 토큰화하지 않습니다.
+#    (✨ v2.8) 배치: 고정 2개 대신 길이가 비슷한 샘플끼리 TRAIN_MAX_BATCH_TOKENS 토큰까지 채웁니다. (train_batching)
+#              TRAIN_PACKING = True면 짧은 샘플을 이어 붙입니다. (서로 attention 못 하게 mask)
+#              samples/sec와 패딩 비율을 로그에 남깁니다.
+#    (✨ v2.9) 검증 세트: id % HOLDOUT_EVERY = 0인 '유출' 행은 학습하지 않고 평가에만 씁니다. (실행마다 같은 분할)
+#              EVAL_STEPS 스텝(최소 에포크마다 1번)마다 개체 단위 F1을 재고, EARLY_STOPPING_PATIENCE번 나아지지 않으면 멈춥니다.
+#              TRAIN_DEADLINE_MINUTES: 시작 후 이 시간 안에 끝나도록 마감 전에 멈추고, 가장 좋았던 체크포인트를 씁니다.
+#              (검증 세트가 VALIDATION_MIN_ROWS보다 작으면 기존처럼 평가 없이 학습)
+# 4. 학습 완료 후, 해당 행에 학습 시각(trained_at)을 기록합니다. (✨ v2.6 이번에 실제로 학습한 새 정답만)
 # 5. (✨ 신규) 재학습된 '경력직' 뇌를 'my-ner-model' 폴더에 저장합니다.
+#    (✨ v2.6) 임시 폴더에 저장한 뒤 교체하고, 직전 뇌는 'my-ner-model.prev'로 1개 보관합니다.
+#    (✨ v2.9) 검증 F1이 현재 뇌보다 나아졌을 때만 교체합니다. (아니면 현재 뇌 유지)
+#    (✨ v2.10) 모델 버전 저장소(model_registry)에 새 버전으로 등록하고 'my-ner-model' 링크를 원자적으로 바꿉니다.
+#              (my-ner-model.prev 대신 최근 MODEL_REGISTRY_KEEP개 버전 보관, python3 model_registry.py --rollback)
+#              metadata.json: 학습 데이터 해시, 검증 점수, 로드 시간, 추론 지연
+#              학습이 끝나면 train-checkpoints는 지웁니다. (이어서 학습은 등록된 버전에서 시작)
+# 6. (✨ v2.11) 새 뇌를 등록했으면, 마감 시각 안에서 이어서 작은 '학생' 뇌로 증류합니다. (distill.py -> my-ner-student)
+#              (DISTILL_AFTER_TRAIN = False면 건너뜀, 따로 실행: python3 distill.py)
 # ----------------------------------------------------
 
 import pandas as pd
+import numpy as np
 import os
+import math
+import random
+import hashlib
+import shutil
+import time
 import datetime
 import logging
 import config # (✨ 신규) HF_TOKEN을 읽기 위해
+from leak_store import LeakStore, LEAK_STORE_FILE # (✨ v2.5) CSV + trained.log 대신 저장소
 from datasets import Dataset # (✨ 신규)
+from tokenized_cache import TokenizedCache, tokenizer_fingerprint, row_key, ROW_KEY_COLUMN # (✨ v2.7)
 from transformers import ( # (✨ 신규)
     AutoTokenizer,
     AutoModelForTokenClassification,
     TrainingArguments,
-    Trainer,
-    DataCollatorForTokenClassification # (✨ 패딩 오류 수정)
 )
+from train_batching import ( # (✨ v2.8) 토큰 수 예산 배치 + packing
+    TokenBudgetBatchSampler, TokenBudgetCollator, TokenBudgetTrainer, pack_examples, position_offset,
+    TRAIN_MAX_BATCH_TOKENS
+)
+from transformers import EarlyStoppingCallback # (✨ v2.9)
+from train_eval import DeadlineCallback, compute_metrics, argmax_logits, METRIC_NAME # (✨ v2.9) 검증 F1 + 마감 시각
+from model_registry import ModelRegistry, load_model, MODEL_REGISTRY_KEEP # (✨ v2.10) 버전별 저장 + 'current' 링크 교체
 
 # --- 1. 설정값 ---
 BASE_PATH = "/root/PII-Guardian" 
@@ -31,194 +68,400 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[logging.StreamHandler()])
 
-FEEDBACK_FILE = os.path.join(BASE_PATH, 'feedback_data.csv')
-MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model') # 🧠 '경력직' 뇌 저장 경로
-TRAINED_LOG_FILE = os.path.join(BASE_PATH, 'trained.log')
+MODEL_PATH = os.path.join(BASE_PATH, 'my-ner-model') # 🧠 '경력직' 뇌 저장 경로 (✨ v2.10 현재 버전을 가리키는 링크)
+TRAIN_COLUMNS = ['id', 'content', 'context'] # (✨ v2.5) 학습에 필요한 열만 읽기
 BASE_MODEL = 'klue/roberta-base' # 🧠 '신입' 뇌 (기본 모델)
+MODEL_VERSIONS_DIR = os.path.join(BASE_PATH, 'my-ner-model-versions') # (✨ v2.10) 버전별 뇌 (model_registry)
+CHECKPOINT_DIR = os.path.join(BASE_PATH, 'train-checkpoints') # 학습 중간 과정 (✨ v2.10 학습 후 삭제)
+TOKENIZED_CACHE_DIR = os.path.join(BASE_PATH, 'tokenized-cache') # (✨ v2.7) 토큰화 결과(Arrow) 캐시
+
+# (✨ v2.6) 1회 학습량 예산 / 재현 버퍼 (config.py에서 덮어쓸 수 있음)
+TRAIN_EPOCHS = 3
+TRAIN_BATCH_SIZE = 2              # 한 번에 2개씩 (CPU/저사양 GPU용) (✨ v2.8 샘플 예산 계산 + 고정 배치일 때)
+TRAIN_PACKING = False             # (✨ v2.8) 짧은 샘플을 MAX_LENGTH 안에서 이어 붙여 학습
+TRAIN_MAX_STEPS = 600             # 1회 최대 학습 스텝 -> 1회 샘플 예산 = 600 x 2 / 3 = 400개
+REPLAY_BUFFER_SIZE = 300          # 재현 버퍼 최대 크기 (샘플 예산 안에서)
+REPLAY_MIN_SHARE = 0.3            # (이어서 학습할 때) 샘플 예산 중 재현 버퍼 최소 비율
+WARM_START_LEARNING_RATE = 2e-5   # 이어서 학습할 때는 작게 (처음 학습은 Trainer 기본값 5e-5)
+REPLAY_SEED = 42
+
+# (✨ v2.9) 검증 세트 / 조기 종료 / 마감 시각 (config.py에서 덮어쓸 수 있음)
+HOLDOUT_EVERY = 10                # id % 10 = 0인 '유출' 행 (약 10%)은 검증용 (0이면 검증 없음)
+VALIDATION_MAX_ROWS = 500         # 검증 세트 최대 크기 (최신 행부터, 평가 시간 제한)
+VALIDATION_MIN_ROWS = 20          # 이보다 적으면 검증 F1을 믿을 수 없으므로 평가 없이 학습
+EVAL_STEPS = 100                  # 평가 간격 (에포크가 이보다 짧으면 에포크마다)
+EARLY_STOPPING_PATIENCE = 3       # 평가 n번 연속 나아지지 않으면 멈춤
+EARLY_STOPPING_THRESHOLD = 0.001  # 이만큼은 올라야 "나아졌다"로 봄
+TRAIN_DEADLINE_MINUTES = 90       # 시작 후 이 시간 안에 끝냄 (None이면 제한 없음)
+DISTILL_AFTER_TRAIN = True        # (✨ v2.11) 새 뇌 등록 후 학생 뇌 증류 (남은 마감 시간 안에서)
 
 # (✨ 신규) NER 태그 정의 (IOB2 형식)
 label_list = ['O', 'B-PII', 'I-PII']
 label2id = {label: i for i, label in enumerate(label_list)}
 id2label = {i: label for i, label in enumerate(label_list)}
+MAX_LENGTH = 512
+PREPROCESS_VERSION = 2 # (✨ v2.7) 태그 규칙이 바뀌면 올려서 토큰화 캐시를 무효화
 
 
-# --- 2. 로그 관리 함수 (기존과 동일) ---
-def load_trained_log():
-    """이미 학습한 항목(중복 학습 방지용)을 불러옵니다."""
-    if not os.path.exists(TRAINED_LOG_FILE):
-        return set()
-    try:
-        with open(TRAINED_LOG_FILE, 'r', encoding='utf-8') as f:
-            return set(line.strip() for line in f)
-    except Exception as e:
-        logging.warning(f"⚠️ 'trained.log' 로드 실패: {e}")
-        return set()
+# --- 2. (✨ 신규) 데이터 전처리 함수 ---
+def tag_spans(contexts, spans, tokenizer):
+    """
+    (✨ v2.7) 문맥 목록을 fast 토크나이저로 "한 번에" 토큰화하고, 오프셋 배열 연산으로 IOB2 태그를 붙입니다.
+    spans: 문맥별 PII 위치 (start, end). 반환: input_ids / attention_mask / labels 등의 dict (문맥 순서)
+    """
+    encoded = tokenizer(contexts, truncation=True, max_length=MAX_LENGTH, return_offsets_mapping=True)
+    offsets = encoded.pop('offset_mapping')
+    lengths = np.fromiter((len(offset) for offset in offsets), dtype=np.int64, count=len(offsets))
+    flat = np.array([pair for offset in offsets for pair in offset], dtype=np.int64).reshape(-1, 2)
+    span_start = np.repeat(np.array([start for start, _ in spans], dtype=np.int64), lengths)
+    span_end = np.repeat(np.array([end for _, end in spans], dtype=np.int64), lengths)
+
+    special = (flat[:, 0] == 0) & (flat[:, 1] == 0) # [CLS], [SEP] 같은 특수 토큰
+    inside = (flat[:, 0] >= span_start) & (flat[:, 1] <= span_end) & ~special # PII 범위 안의 토큰
+    previous = np.concatenate(([False], inside[:-1]))
+    previous[np.cumsum(lengths)[:-1]] = False # (문맥 경계에서 초기화)
 
-def save_trained_log(unique_id):
-    """학습 완료된 항목을 기록합니다."""
-    with open(TRAINED_LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(unique_id + '\n')
+    labels = np.full(len(flat), label2id['O'], dtype=np.int64)
+    labels[inside] = label2id['I-PII']
+    labels[inside & ~previous] = label2id['B-PII'] # PII의 첫 토큰은 B-PII
+    labels[special] = -100 # loss 계산에서 제외
+    encoded['labels'] = [part.tolist() for part in np.split(labels, np.cumsum(lengths)[:-1])]
+    return dict(encoded)
 
-# --- 3. (✨ 신규) 데이터 전처리 함수 ---
-def preprocess_for_ner(new_data_df, tokenizer):
+def preprocess_for_ner(new_data_df, tokenizer, cache=None):
     """
     (context, content) 데이터를 NER 학습용 IOB2 태그로 변환합니다.
+    (✨ v2.7) 행마다 토크나이저를 부르지 않고 한 번에 처리하며, cache(TokenizedCache)가 있으면
+              이미 토큰화한 행(같은 context + content)은 Arrow 캐시에서 꺼냅니다.
     """
-    dataset_list = []
-    
-    for index, row in new_data_df.iterrows():
-        context = str(row.get('context', ''))
-        content = str(row.get('content', ''))
+    contexts = new_data_df['context'].fillna('').astype(str).tolist()
+    contents = new_data_df['content'].fillna('').astype(str).tolist()
 
-        if not context or not content:
-            continue
-            
-        # 1. PII (content)가 문맥(context) 어디에 있는지 찾기
-        start_idx = context.find(content)
+    # 1. PII (content)가 문맥(context) 어디에 있는지 찾기
+    rows = {} # row_key -> (context, (start, end))
+    keys, not_found = [], []
+    for context, content in zip(contexts, contents):
+        start_idx = context.find(content) if context and content else -1
         if start_idx == -1:
-            logging.warning(f"⚠️ 학습 데이터 오류: PII '{content}'가 문맥 '{context[:50]}...'에 없습니다. 건너뜁니다.")
+            if context and content:
+                not_found.append(content)
             continue
-        end_idx = start_idx + len(content)
+        key = row_key(context, content)
+        rows[key] = (context, (start_idx, start_idx + len(content)))
+        keys.append(key)
+    if not_found:
+        logging.warning(f"⚠️ 학습 데이터 오류: PII {len(not_found)}건이 문맥에 없습니다. 건너뜁니다. (예: '{not_found[0]}')")
 
-        # 2. 문맥(context)을 토크나이저로 분절
-        tokenized_inputs = tokenizer(context, truncation=True, max_length=512, return_offsets_mapping=True)
-        offsets = tokenized_inputs.pop("offset_mapping")
-        
-        # 3. 모든 토큰을 'O' (PII 아님)으로 초기화
-        labels = [label2id['O']] * len(tokenized_inputs['input_ids'])
-        is_b_token = True # 'B-PII' 태그를 붙였는지 확인
-
-        # 4. 토큰의 위치(offset)와 PII 위치(start_idx, end_idx)를 비교
-        for i, (offset_start, offset_end) in enumerate(offsets):
-            # (예외 처리) [CLS], [SEP] 같은 특수 토큰
-            if offset_start == 0 and offset_end == 0:
-                labels[i] = -100 # loss 계산에서 제외
-                continue
-
-            # (핵심) 현재 토큰이 PII 범위 안에 포함되는지 확인
-            if offset_start >= start_idx and offset_end <= end_idx:
-                if is_b_token:
-                    labels[i] = label2id['B-PII'] # 첫 토큰은 B-PII
-                    is_b_token = False
-                else:
-                    labels[i] = label2id['I-PII'] # 나머지는 I-PII
-            else:
-                is_b_token = True # PII 범위를 벗어나면 B-PII 초기화
-        
-        tokenized_inputs['labels'] = labels
-        dataset_list.append(tokenized_inputs)
-        
-    if not dataset_list:
+    if not keys:
         return None
-        
-    return Dataset.from_list(dataset_list)
+
+    def build(missing_keys):
+        encoded = tag_spans([rows[key][0] for key in missing_keys], [rows[key][1] for key in missing_keys], tokenizer)
+        encoded[ROW_KEY_COLUMN] = list(missing_keys)
+        return Dataset.from_dict(encoded)
+
+    if cache is None:
+        dataset = build(list(dict.fromkeys(keys)))
+        positions = {key: position for position, key in enumerate(dataset[ROW_KEY_COLUMN])}
+        dataset = dataset.select([positions[key] for key in keys])
+    else:
+        dataset, hits, built = cache.fetch_or_build(keys, build)
+        logging.info(f"🧊 토큰화 캐시: 적중 {hits}건 / 새로 토큰화 {built}건")
+    return dataset.remove_columns(ROW_KEY_COLUMN)
+
+# --- 3. (✨ v2.6) 학습량 예산 + 재현(replay) 버퍼 ---
+def sample_budget():
+    """1회 학습에 쓰는 샘플 수 (TRAIN_MAX_STEPS 스텝 x 배치 크기 / 에포크)"""
+    return max(1, getattr(config, 'TRAIN_MAX_STEPS', TRAIN_MAX_STEPS) * TRAIN_BATCH_SIZE // TRAIN_EPOCHS)
+
+def stratified_quota(counts, total):
+    """
+    종류별 보유 건수(counts)에서 total개를 고르게 나눕니다. (적은 종류는 있는 만큼, 남는 몫은 다른 종류로)
+    반환: {종류: 뽑을 개수}
+    """
+    quota = {key: 0 for key in counts}
+    remaining = min(total, sum(counts.values()))
+    open_keys = [key for key, count in counts.items() if count > 0]
+    while remaining > 0 and open_keys:
+        share = max(1, remaining // len(open_keys))
+        for key in list(open_keys):
+            take = min(share, counts[key] - quota[key], remaining)
+            quota[key] += take
+            remaining -= take
+            if quota[key] >= counts[key]:
+                open_keys.remove(key)
+            if remaining == 0:
+                break
+    return quota
+
+def load_replay_buffer(store, size, seed=REPLAY_SEED, holdout_every=0):
+    """이미 학습한 '유출' 행에서 PII 종류별로 고르게 size개를 뽑습니다. (id만 읽어 뽑고, 뽑은 행만 읽음)"""
+    if size <= 0:
+        return pd.DataFrame(columns=TRAIN_COLUMNS)
+    ids_by_type = store.trained_leak_ids_by_type(holdout_every)
+    quota = stratified_quota({pii_type: len(ids) for pii_type, ids in ids_by_type.items()}, size)
+    rng = random.Random(seed)
+    picked = []
+    for pii_type, ids in ids_by_type.items():
+        picked.extend(rng.sample(ids, quota[pii_type]))
+    return store.leaks_by_ids(picked, columns=TRAIN_COLUMNS)
+
+def load_base_or_current(warm_start, hf_token):
+    """(tokenizer, model, 이어서 학습 여부): warm_start이고 현재 뇌가 있으면 그것을, 아니면 BASE_MODEL을 로드합니다."""
+    if warm_start and os.path.exists(os.path.join(MODEL_PATH, 'config.json')):
+        try:
+            tokenizer, model, load_seconds = load_model(MODEL_PATH) # (✨ v2.10 현재 버전 폴더, safetensors)
+            if model.config.label2id == label2id:
+                logging.info(f"🧠 현재 '경력직' 뇌({os.path.realpath(MODEL_PATH)})에서 이어서 학습합니다. "
+                             f"(로드 {load_seconds:.2f}초)")
+                return tokenizer, model, True
+            logging.warning(f"⚠️ 현재 뇌의 태그 정의가 다릅니다({model.config.label2id}). BASE_MODEL에서 새로 학습합니다.")
+        except Exception as e:
+            logging.warning(f"⚠️ 현재 뇌({MODEL_PATH}) 로드 실패({e}). BASE_MODEL에서 새로 학습합니다.")
+
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL, token=hf_token)
+    model = AutoModelForTokenClassification.from_pretrained(
+        BASE_MODEL, 
+        num_labels=len(label_list),
+        id2label=id2label,
+        label2id=label2id,
+        token=hf_token
+    )
+    return tokenizer, model, False
+
+def current_model_f1(trainer):
+    """(✨ v2.9) 비교 기준: 현재 'my-ner-model'의 검증 F1 (현재 뇌가 없거나 태그 정의가 다르면 None)"""
+    if not os.path.exists(os.path.join(MODEL_PATH, 'config.json')):
+        return None
+    try:
+        current = load_model(MODEL_PATH)[1].to(trainer.args.device)
+    except Exception as e:
+        logging.warning(f"⚠️ 현재 뇌({MODEL_PATH}) 로드 실패({e}). 비교 없이 저장합니다.")
+        return None
+    if current.config.label2id != label2id:
+        return None
+    model, trainer.model = trainer.model, current
+    try:
+        return trainer.evaluate()[f'eval_{METRIC_NAME}']
+    finally:
+        trainer.model = model
+
+def training_data_hash(df):
+    """(✨ v2.10) 학습에 쓴 (context, content) 행 집합의 해시 (순서 무관, 모델 버전 metadata용)"""
+    keys = sorted(row_key(context, content) for context, content in
+                  zip(df['context'].fillna('').astype(str), df['content'].fillna('').astype(str)))
+    return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+def best_eval_scores(trainer):
+    """(✨ v2.10) 학습 중 평가 기록에서 검증 F1이 가장 높았던 평가의 점수들"""
+    evaluations = [entry for entry in trainer.state.log_history if f'eval_{METRIC_NAME}' in entry]
+    if not evaluations:
+        return {}
+    best = max(evaluations, key=lambda entry: entry[f'eval_{METRIC_NAME}'])
+    return {key[len('eval_'):]: round(value, 4) for key, value in best.items() if key.startswith('eval_entity_')}
 
 # --- 4. 메인 실행 ---
-def main():
+def main(warm_start=True):
     logging.info("🤖 3. '학습기' 봇(Trainer) 작동 시작...")
+    # (✨ v2.9) 마감 시각 = 시작 + TRAIN_DEADLINE_MINUTES (모델 로드 / 전처리 / 평가 시간 포함)
+    deadline_minutes = getattr(config, 'TRAIN_DEADLINE_MINUTES', TRAIN_DEADLINE_MINUTES)
+    deadline = time.time() + deadline_minutes * 60 if deadline_minutes else None
+    holdout_every = getattr(config, 'HOLDOUT_EVERY', HOLDOUT_EVERY)
     
-    # 1. '정답' 파일(In_2) 로드
-    if not os.path.exists(FEEDBACK_FILE):
-        logging.warning(f"⚠️ '정답' 목록({FEEDBACK_FILE})이 없습니다. 학습을 건너뜁니다.")
-        return
-
+    # 1~2. (✨ v2.5) 저장소에서 "'유출' 라벨이고 아직 학습 안 한" 행을, 필요한 열만 읽기 (✨ v2.9 검증용 행 제외)
     try:
-        feedback_df = pd.read_csv(FEEDBACK_FILE)
-        feedback_df['url'] = feedback_df['url'].fillna('N/A')
-    except pd.errors.EmptyDataError:
-        logging.info("✅ '정답' 목록이 비어있습니다. 학습을 건너뜁니다.")
-        return
+        with LeakStore(LEAK_STORE_FILE) as store:
+            new_data_df = store.untrained_leaks(columns=TRAIN_COLUMNS, holdout_every=holdout_every)
+            holdout_df = store.holdout_leaks(holdout_every, columns=TRAIN_COLUMNS,
+                                             limit=getattr(config, 'VALIDATION_MAX_ROWS', VALIDATION_MAX_ROWS))
     except Exception as e:
-        logging.error(f"❌ '정답' 파일 로드 중 에러: {e}")
+        logging.error(f"❌ '정답' 저장소 로드 중 에러: {e}")
         return
-        
-    # 2. '학습 기록' 로드 및 '새로운 학습 데이터' 필터링
-    trained_set = load_trained_log()
-    
-    new_data_rows = []
-    new_ids_to_log = []
-    
-    for index, row in feedback_df.iterrows():
-        unique_id = f"{row['content']}|{row['url']}"
-        # (조건 1) "유출" 라벨이고, (조건 2) "아직 학습 안 한" 데이터
-        if row['llm_label'] == '유출' and unique_id not in trained_set:
-            new_data_rows.append(row.to_dict())
-            new_ids_to_log.append(unique_id)
-
-    if not new_data_rows:
+
+    if new_data_df.empty:
         logging.info("✅ 새로 학습할 '유출' 데이터가 없습니다. (모두 이전에 학습 완료)")
         return
 
-    logging.info(f"🔥 총 {len(new_data_rows)}개의 '새로운 유출' 샘플로 뇌를 재학습(Fine-Tuning)합니다...")
-    new_data_df = pd.DataFrame(new_data_rows)
-
-    # 3. (✨ 신규) 모델과 토크나이저 로드
+    # 3. (✨ 신규) 모델과 토크나이저 로드 (✨ v2.6 현재 뇌에서 이어서)
     HF_TOKEN = getattr(config, 'HF_TOKEN', None)
     if not HF_TOKEN:
         logging.error("❌ config.py에서 HF_TOKEN을 찾을 수 없습니다. 학습을 중단합니다.")
         return
-        
-    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL, token=HF_TOKEN)
-    model = AutoModelForTokenClassification.from_pretrained(
-        BASE_MODEL, 
-        num_labels=len(label_list),
-        id2label=id2label,
-        label2id=label2id,
-        token=HF_TOKEN
-    )
-    
-    # 4. (✨ 신규) 데이터 전처리
+
+    tokenizer, model, warm_started = load_base_or_current(warm_start, HF_TOKEN)
+
+    # (✨ v2.6) 1회 샘플 예산 = 새 정답 + 재현 버퍼 (이어서 학습할 때만 재현 버퍼 사용)
+    budget = sample_budget()
+    replay_size = 0
+    if warm_started:
+        new_limit = max(1, budget - int(budget * REPLAY_MIN_SHARE))
+        new_data_df = new_data_df.head(new_limit) # (오래된 정답부터, 나머지는 다음 실행)
+        replay_size = min(getattr(config, 'REPLAY_BUFFER_SIZE', REPLAY_BUFFER_SIZE), budget - len(new_data_df))
+    else:
+        new_data_df = new_data_df.head(budget)
+    with LeakStore(LEAK_STORE_FILE) as store:
+        replay_df = load_replay_buffer(store, replay_size, holdout_every=holdout_every)
+        left_over = store.count_untrained(holdout_every) - len(new_data_df)
+
+    logging.info(f"🔥 '새로운 유출' {len(new_data_df)}개 + 재현 버퍼 {len(replay_df)}개로 뇌를 재학습(Fine-Tuning)합니다... "
+                 f"(샘플 예산 {budget}개, 다음 실행으로 넘기는 새 정답 {left_over}개)")
+
+    # 4. (✨ 신규) 데이터 전처리 (✨ v2.7 한 번에 토큰화 + 토큰화 캐시)
     logging.info("데이터 전처리(NER 태깅) 시작...")
-    train_dataset = preprocess_for_ner(new_data_df, tokenizer)
+    preprocess_started = time.perf_counter()
+    cache = TokenizedCache(tokenizer_fingerprint(tokenizer, MAX_LENGTH, label_list, PREPROCESS_VERSION),
+                           root=getattr(config, 'TOKENIZED_CACHE_DIR', TOKENIZED_CACHE_DIR))
+    cache.prune_other_fingerprints()
+    train_df = pd.concat([new_data_df, replay_df], ignore_index=True)
+    train_dataset = preprocess_for_ner(train_df, tokenizer, cache)
+    eval_dataset = preprocess_for_ner(holdout_df, tokenizer, cache) if not holdout_df.empty else None # (✨ v2.9)
+    logging.info(f"⏱️ 전처리 {time.perf_counter() - preprocess_started:.2f}초")
     
     if train_dataset is None:
         logging.warning("⚠️ 전처리 후 학습할 유효한 데이터가 없습니다. 학습을 건너뜁니다.")
         # (참고: PII를 context에서 못 찾는 등의 이유로 데이터가 0이 될 수 있음)
         return
         
-    logging.info(f"✅ 데이터 전처리 완료. (유효 샘플: {len(train_dataset)})")
+    logging.info(f"✅ 데이터 전처리 완료. (유효 샘플: {len(train_dataset)}, 검증 샘플: {len(eval_dataset) if eval_dataset else 0})")
+    if eval_dataset is not None and len(eval_dataset) < getattr(config, 'VALIDATION_MIN_ROWS', VALIDATION_MIN_ROWS):
+        logging.warning(f"⚠️ 검증 샘플이 {len(eval_dataset)}개뿐이라 평가/조기 종료 없이 학습하고, 비교 없이 저장합니다.")
+        eval_dataset = None
 
     # 5. (✨ 신규) 실제 학습(Fine-Tuning) 시작
-    
-    # (✨ 패딩 오류 수정)
-    data_collator = DataCollatorForTokenClassification(tokenizer=tokenizer)
+
+    # (✨ v2.8) 짧은 샘플 이어 붙이기(packing, 선택) + 토큰 수 예산 배치 (길이가 비슷한 샘플끼리)
+    if getattr(config, 'TRAIN_PACKING', TRAIN_PACKING):
+        num_examples = len(train_dataset)
+        train_dataset = Dataset.from_list(pack_examples(train_dataset, MAX_LENGTH))
+        logging.info(f"📦 packing: 샘플 {num_examples}개 -> {len(train_dataset)}줄")
+    max_batch_tokens = getattr(config, 'TRAIN_MAX_BATCH_TOKENS', TRAIN_MAX_BATCH_TOKENS)
+    batch_sampler = None
+    if max_batch_tokens:
+        batch_sampler = TokenBudgetBatchSampler([len(ids) for ids in train_dataset['input_ids']],
+                                                max_tokens=max_batch_tokens, seed=REPLAY_SEED)
+    steps_per_epoch = len(batch_sampler) if batch_sampler else math.ceil(len(train_dataset) / TRAIN_BATCH_SIZE)
+
+    # (✨ 패딩 오류 수정) (✨ v2.8 패딩 + packing mask + 토큰 수 집계)
+    data_collator = TokenBudgetCollator(tokenizer.pad_token_id, position_offset(model.config))
     
     # (NCP 서버 사양에 맞춰 최소한의 설정으로 학습)
+    # (✨ v2.6) 스텝 수는 예산(TRAIN_MAX_STEPS)을 넘지 않습니다.
+    max_steps = min(getattr(config, 'TRAIN_MAX_STEPS', TRAIN_MAX_STEPS), steps_per_epoch * TRAIN_EPOCHS)
+    # (✨ v2.9) 검증 세트가 있으면 EVAL_STEPS(최소 에포크마다 1번)마다 평가하고, 가장 좋았던 것만 체크포인트로 저장
+    eval_steps = max(1, min(getattr(config, 'EVAL_STEPS', EVAL_STEPS), steps_per_epoch))
+    if eval_dataset is not None:
+        eval_args = dict(eval_strategy="steps", eval_steps=eval_steps, save_strategy="best",
+                         load_best_model_at_end=True, metric_for_best_model=METRIC_NAME, greater_is_better=True,
+                         per_device_eval_batch_size=TRAIN_BATCH_SIZE * 4)
+    else:
+        eval_args = dict(save_strategy="epoch") # 1 에포크마다 저장
     training_args = TrainingArguments(
-        output_dir=os.path.join(MODEL_PATH, "checkpoints"), # 학습 중간 과정 저장
-        num_train_epochs=3,             # 3번 반복 학습
-        per_device_train_batch_size=2,  # 한 번에 2개씩 (CPU/저사양 GPU용)
-        save_strategy="epoch",          # 1 에포크마다 저장
+        output_dir=CHECKPOINT_DIR,      # 학습 중간 과정 저장 (✨ v2.6 모델 폴더 밖)
+        max_steps=max_steps,            # 3번 반복 학습 (예산 안에서)
+        per_device_train_batch_size=TRAIN_BATCH_SIZE, # (TRAIN_MAX_BATCH_TOKENS = 0일 때만 사용)
+        remove_unused_columns=False,    # (✨ v2.8 packing 열(segment_ids 등)은 collator가 사용)
+        learning_rate=WARM_START_LEARNING_RATE if warm_started else 5e-5,
         logging_steps=10,               # 10 스텝마다 로그 출력
         report_to="none",               # (필수) wandb 같은 외부 로깅 비활성화
         
         # (✨✨✨ 핵심 수정: 용량 관리 ✨✨✨)
-        # 가장 최근의 체크포인트 2개만 남기고 나머지는 자동으로 삭제합니다.
-        save_total_limit=2
+        # 가장 최근의 체크포인트 2개만 남기고 나머지는 자동으로 삭제합니다. (✨ v2.9 best 체크포인트는 항상 남김)
+        save_total_limit=2,
+        **eval_args
     )
 
-    trainer = Trainer(
+    deadline_callback = DeadlineCallback(deadline)
+    callbacks = [deadline_callback]
+    if eval_dataset is not None:
+        callbacks.append(EarlyStoppingCallback(
+            early_stopping_patience=getattr(config, 'EARLY_STOPPING_PATIENCE', EARLY_STOPPING_PATIENCE),
+            early_stopping_threshold=EARLY_STOPPING_THRESHOLD))
+    trainer = TokenBudgetTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
-        data_collator=data_collator # (✨ 패딩 오류 수정)
+        eval_dataset=eval_dataset,
+        data_collator=data_collator, # (✨ 패딩 오류 수정)
+        compute_metrics=compute_metrics if eval_dataset is not None else None,
+        preprocess_logits_for_metrics=argmax_logits if eval_dataset is not None else None,
+        callbacks=callbacks,
+        train_batch_sampler=batch_sampler
     )
 
-    logging.info("🔥 '경력직' 뇌 실제 학습 시작... (CPU/GPU 사용)")
+    # (✨ v2.9) 비교 기준: 학습 전 현재 뇌의 검증 F1 (이어서 학습하면 시작 모델 = 현재 뇌)
+    baseline_f1 = None
+    if eval_dataset is not None:
+        baseline_f1 = (trainer.evaluate()[f'eval_{METRIC_NAME}'] if warm_started
+                       else current_model_f1(trainer))
+        if baseline_f1 is not None:
+            logging.info(f"🎯 현재 뇌의 검증 F1: {baseline_f1:.4f} (검증 샘플 {len(eval_dataset)}개)")
+
+    logging.info(f"🔥 '경력직' 뇌 실제 학습 시작... (CPU/GPU 사용, 에포크당 {steps_per_epoch}배치, 최대 {max_steps}스텝, "
+                 f"평가 {eval_steps if eval_dataset is not None else '-'}스텝마다"
+                 f"{', 마감 ' + datetime.datetime.fromtimestamp(deadline).strftime('%H:%M') if deadline else ''})")
+    eval_seconds = trainer.eval_seconds
+    train_started = time.perf_counter()
     trainer.train()
-    logging.info("✅ 재학습 완료!")
+    train_seconds = time.perf_counter() - train_started - (trainer.eval_seconds - eval_seconds)
+    logging.info(f"✅ 재학습 완료! {trainer.state.global_step}스텝, 학습 {train_seconds:.1f}초 "
+                 f"(+평가 {trainer.eval_seconds - eval_seconds:.1f}초), "
+                 f"{data_collator.examples / max(train_seconds, 1e-9):.1f} samples/sec, "
+                 f"패딩 비율 {data_collator.padding_ratio():.1%} "
+                 f"(실제 토큰 {data_collator.real_tokens:,} / 패딩 포함 {data_collator.padded_tokens:,})")
+    stopped_by = 'max_steps'
+    if deadline_callback.stopped_at_step is not None:
+        stopped_by = 'deadline'
+        logging.info(f"⏰ 마감 시각 때문에 {deadline_callback.stopped_at_step}/{max_steps}스텝에서 멈췄습니다.")
+    elif eval_dataset is not None and trainer.state.global_step < max_steps:
+        stopped_by = 'early_stopping'
+        logging.info(f"🛑 검증 F1이 {trainer.state.global_step}스텝에서 더 나아지지 않아 조기 종료했습니다.")
 
-    # 6. (✨ 신규) '경력직' 뇌 최종 저장
-    logging.info(f"💾 '경력직' 뇌를 {MODEL_PATH}에 저장합니다.")
-    trainer.save_model(MODEL_PATH)
-    tokenizer.save_pretrained(MODEL_PATH) # (중요) 토크나이저도 함께 저장
+    # 6. (✨ 신규) '경력직' 뇌 최종 저장 (✨ v2.9 검증 F1이 나아졌을 때만)
+    best_f1 = trainer.state.best_metric
+    published = False
+    if baseline_f1 is not None and (best_f1 is None or best_f1 <= baseline_f1):
+        logging.warning(f"⚠️ 검증 F1이 나아지지 않았습니다. (현재 뇌 {baseline_f1:.4f} -> 최고 {best_f1 or 0.0:.4f}) "
+                        f"현재 뇌를 그대로 둡니다.")
+    else:
+        # (✨ v2.10) 버전 저장소에 등록 -> 'my-ner-model' 링크 교체 (오래된 버전 정리)
+        logging.info(f"💾 '경력직' 뇌를 새 버전으로 등록합니다. ({MODEL_VERSIONS_DIR})"
+                     + (f" 검증 F1 {baseline_f1 or 0.0:.4f} -> {best_f1:.4f}" if best_f1 is not None else ""))
+        registry = ModelRegistry(MODEL_PATH, MODEL_VERSIONS_DIR,
+                                 keep=getattr(config, 'MODEL_REGISTRY_KEEP', MODEL_REGISTRY_KEEP))
+        metadata = {
+            'base_model': BASE_MODEL, 'warm_started': warm_started,
+            'train_rows': len(new_data_df), 'replay_rows': len(replay_df),
+            'train_data_sha1': training_data_hash(train_df),
+            'eval_rows': len(eval_dataset) if eval_dataset is not None else 0, 'holdout_every': holdout_every,
+            'baseline_f1': round(baseline_f1, 4) if baseline_f1 is not None else None,
+            **best_eval_scores(trainer),
+            'steps': trainer.state.global_step, 'stopped_by': stopped_by, 'train_seconds': round(train_seconds, 1),
+        }
+        sample_texts = (holdout_df if not holdout_df.empty else train_df)['context'].dropna().tolist() # (추론 지연 측정용)
+        registry.publish(trainer.model, tokenizer, metadata, sample_texts=sample_texts)
+        published = True
+    shutil.rmtree(CHECKPOINT_DIR, ignore_errors=True) # (✨ v2.10 best 체크포인트는 이미 등록했거나 버림)
 
-    # 7. (기존) "학습 완료"된 ID들을 로그에 기록 (중복 학습 방지)
-    for unique_id in new_ids_to_log:
-        save_trained_log(unique_id)
+    # 7. "학습 완료" 시각을 저장소에 기록 (중복 학습 방지)
+    # (✨ v2.9 저장하지 않았어도 기록: 같은 행을 매번 다시 학습하지 않고, 다음부터는 재현 버퍼 후보로 씁니다)
+    with LeakStore(LEAK_STORE_FILE) as store:
+        store.mark_trained(new_data_df['id'].tolist())
         
-    logging.info(f"💾 {len(new_ids_to_log)}건을 '학습 완료' 처리했습니다.")
+    logging.info(f"💾 {len(new_data_df)}건을 '학습 완료' 처리했습니다.")
     logging.info("🤖 3. '학습기' 봇(Trainer) 작동 완료.")
 
+    # 8. (✨ v2.11) 새 뇌로 학생 뇌 증류 (train 마감 시각 안에서)
+    if published and getattr(config, 'DISTILL_AFTER_TRAIN', DISTILL_AFTER_TRAIN):
+        import distill # (distill이 이 파일의 전처리 함수를 쓰므로 여기서 import)
+        try:
+            distill.main(deadline=deadline)
+        except Exception as e:
+            logging.error(f"❌ 학생 뇌 증류 중 에러 (새 뇌 등록은 완료): {e}")
+
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="'학습기' 봇: '유출' 정답으로 NER 모델 재학습")
+    parser.add_argument('--from-base', action='store_true',
+                        help="현재 뇌에서 이어서 학습하지 않고 BASE_MODEL에서 새로 학습합니다. (재현 버퍼 없음)")
+    args = parser.parse_args()
+    main(warm_start=not args.from_base)
@@ -0,0 +1,187 @@
+# 📐 (엔진) 학습 배치 구성 - 길이가 비슷한 샘플끼리 "토큰 수" 예산으로 묶기 + (선택) 짧은 샘플 이어 붙이기(packing)
+# ----------------------------------------------------
+# 'train.py'가 이 파일을 import하여 패딩에 버려지는 CPU 연산을 줄입니다.
+# (기존: per_device_train_batch_size=2 고정 + 배치 안 가장 긴 샘플에 맞춰 패딩 -> 문맥 길이가 제각각이라 낭비가 큼)
+# 1. TokenBudgetBatchSampler: 무작위 창(window) 안에서 길이순으로 정렬한 뒤, "배치 최대 길이 x 샘플 수"가
+#    max_tokens를 넘지 않을 때까지 채웁니다. (짧은 샘플은 많이, 긴 샘플은 적게) 배치 순서는 에포크마다 섞습니다.
+# 2. pack_examples: 짧은 샘플 여러 개를 max_length 안에서 한 줄로 이어 붙입니다. (first-fit decreasing)
+#    - 샘플마다 segment_ids를 달고, 블록 대각(block-diagonal) attention mask로 서로를 보지 못하게 합니다.
+#    - position_ids는 샘플마다 0부터 다시 셉니다. (RoBERTa는 padding_idx + 1부터)
+#    - 라벨은 원래 샘플의 라벨 그대로 ([CLS]/[SEP]/패딩은 -100)
+# 3. TokenBudgetCollator: 패딩 + mask를 만들고, 실제 토큰 / 패딩 포함 토큰 / 샘플 수를 셉니다. (패딩 비율, samples/sec)
+# ----------------------------------------------------
+
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Sampler
+from transformers import Trainer
+
+# --- 1. 설정값 ---
+TRAIN_MAX_BATCH_TOKENS = 1024    # 배치 1개의 최대 토큰 수 (패딩 포함, 0이면 고정 배치 크기)
+SORT_WINDOW = 1000               # 이 개수씩 무작위로 나눈 창 안에서만 길이순 정렬 (완전 정렬보다 다양한 배치)
+ROBERTA_MODEL_TYPES = ('roberta', 'xlm-roberta', 'camembert')
+
+
+# --- 2. 토큰 예산 배치 샘플러 ---
+class TokenBudgetBatchSampler(Sampler):
+    """lengths[i] = i번째 샘플의 토큰 수. 배치마다 (최대 길이 x 샘플 수) <= max_tokens인 인덱스 목록을 냅니다."""
+
+    def __init__(self, lengths, max_tokens=TRAIN_MAX_BATCH_TOKENS, shuffle=True, seed=42, window=SORT_WINDOW):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.seed = seed
+        self.window = window
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def batches(self, epoch=0):
+        rng = np.random.default_rng(self.seed + epoch)
+        order = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+        batches = []
+        for start in range(0, len(order), self.window):
+            window = order[start:start + self.window]
+            window = window[np.argsort(self.lengths[window], kind='stable')]
+            current, longest = [], 0
+            for index in window.tolist():
+                length = int(self.lengths[index])
+                if current and max(longest, length) * (len(current) + 1) > self.max_tokens:
+                    batches.append(current)
+                    current, longest = [], 0
+                current.append(index)
+                longest = max(longest, length)
+            if current:
+                batches.append(current)
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        batches = self.batches(self.epoch)
+        self.epoch += 1 # (set_epoch을 부르지 않는 환경에서도 에포크마다 다르게)
+        return iter(batches)
+
+    def __len__(self):
+        return len(self.batches(0))
+
+
+# --- 3. packing ---
+def position_offset(model_config):
+    """position_ids 시작값: RoBERTa 계열은 padding_idx + 1, 그 밖에는 0"""
+    if getattr(model_config, 'model_type', None) in ROBERTA_MODEL_TYPES:
+        return (getattr(model_config, 'pad_token_id', None) or 0) + 1
+    return 0
+
+def pack_examples(dataset, max_length):
+    """
+    샘플(input_ids, labels, ...)을 max_length 안에서 이어 붙인 목록을 반환합니다. (first-fit decreasing)
+    반환: [{'input_ids', 'labels', 'segment_ids', 'position_ids', ('token_type_ids')}, ...]
+    """
+    columns = [column for column in ('input_ids', 'labels', 'token_type_ids') if column in dataset.column_names]
+    data = {column: dataset[column] for column in columns}
+    lengths = [len(ids) for ids in data['input_ids']]
+    bins = [] # [남은 자리, [인덱스, ...]]
+    for index in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+        for packed in bins:
+            if packed[0] >= lengths[index]:
+                packed[0] -= lengths[index]
+                packed[1].append(index)
+                break
+        else:
+            bins.append([max_length - lengths[index], [index]])
+
+    packs = []
+    for _, indices in bins:
+        pack = {column: [] for column in columns}
+        pack['segment_ids'], pack['position_ids'] = [], []
+        for segment, index in enumerate(indices):
+            for column in columns:
+                pack[column].extend(data[column][index])
+            pack['segment_ids'].extend([segment] * lengths[index])
+            pack['position_ids'].extend(range(lengths[index]))
+        packs.append(pack)
+    return packs
+
+
+# --- 4. collator ---
+class TokenBudgetCollator:
+    """
+    패딩 + attention mask를 만들고 토큰 수를 셉니다.
+    - 일반 샘플: 2D attention mask
+    - packing 샘플(segment_ids 있음): 4D 블록 대각 mask (같은 샘플끼리만 attention, 패딩은 패딩끼리)
+    """
+
+    def __init__(self, pad_token_id, position_offset=0):
+        self.pad_token_id = pad_token_id
+        self.position_offset = position_offset
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counting = True # (평가 배치는 집계하지 않음 -> TokenBudgetTrainer.evaluate)
+        self.examples = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def padding_ratio(self):
+        return 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+    def __call__(self, features):
+        lengths = [len(feature['input_ids']) for feature in features]
+        width = max(lengths)
+        packed = 'segment_ids' in features[0]
+
+        def pad(column, value):
+            return torch.tensor([feature[column] + [value] * (width - len(feature[column])) for feature in features])
+
+        batch = {'input_ids': pad('input_ids', self.pad_token_id), 'labels': pad('labels', -100)}
+        if 'token_type_ids' in features[0]:
+            batch['token_type_ids'] = pad('token_type_ids', 0)
+        if packed:
+            segments = pad('segment_ids', -1)
+            batch['attention_mask'] = (segments[:, :, None] == segments[:, None, :])[:, None]
+            batch['position_ids'] = pad('position_ids', 0) + self.position_offset
+            examples = sum(max(feature['segment_ids']) + 1 for feature in features)
+        else:
+            batch['attention_mask'] = torch.tensor([[1] * length + [0] * (width - length) for length in lengths])
+            examples = len(features)
+        if self.counting:
+            self.examples += examples
+            self.real_tokens += sum(lengths)
+            self.padded_tokens += width * len(features)
+        return batch
+
+
+# --- 5. Trainer ---
+class TokenBudgetTrainer(Trainer):
+    """
+    train_batch_sampler가 있으면 (고정 배치 크기 대신) 그 샘플러로 학습 배치를 만드는 Trainer
+    (평가 배치는 collator의 토큰 집계에서 빼고, 평가 시간은 eval_seconds에 따로 모읍니다)
+    """
+
+    def __init__(self, *args, train_batch_sampler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.train_batch_sampler = train_batch_sampler
+        self.eval_seconds = 0.0 # 평가에 쓴 시간 합계 (학습 처리량 계산에서 뺌)
+
+    def evaluate(self, *args, **kwargs):
+        counting = getattr(self.data_collator, 'counting', None)
+        if counting is not None:
+            self.data_collator.counting = False
+        started = time.perf_counter()
+        try:
+            return super().evaluate(*args, **kwargs)
+        finally:
+            self.eval_seconds += time.perf_counter() - started
+            if counting is not None:
+                self.data_collator.counting = counting
+
+    def get_train_dataloader(self):
+        if self.train_batch_sampler is None:
+            return super().get_train_dataloader()
+        loader = DataLoader(self.train_dataset, batch_sampler=self.train_batch_sampler,
+                            collate_fn=self.data_collator, num_workers=self.args.dataloader_num_workers)
+        return self.accelerator.prepare(loader)
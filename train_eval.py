@@ -0,0 +1,98 @@
+# 🎯 (엔진) 학습 평가 + 시간 예산 - 검증 세트 개체(entity) 단위 F1, 조기 종료, 마감 시각(deadline)
+# ----------------------------------------------------
+# 'train.py'가 이 파일을 import하여 "정해진 시간 안에서, 나아질 때까지만" 학습합니다.
+# (기존: 새 정답이 많든 적든 무조건 3 에포크 + 검증 없음 -> 다음 cron 시각을 넘기거나, 적은 데이터에 3 에포크 낭비)
+# 1. entity_f1: IOB2 태그 열에서 개체(B-PII로 시작해 I-PII로 이어지는 구간)를 뽑아,
+#    예측 구간과 정답 구간이 "시작/끝 모두" 같을 때만 맞힌 것으로 셉니다. (배열 연산)
+# 2. DeadlineCallback: 최근 스텝 시간 + 최근 평가(+저장) 시간을 보고, 다음 스텝이 마감을 넘길 것 같으면 학습을 멈춥니다.
+#    멈추기 직전에 아직 평가하지 않은 상태면 한 번 더 평가합니다. (더 좋으면 best 체크포인트로 저장)
+# (조기 종료는 transformers의 EarlyStoppingCallback을 그대로 사용)
+# ----------------------------------------------------
+
+import time
+import logging
+
+import numpy as np
+from transformers import TrainerCallback
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+METRIC_NAME = 'entity_f1' # (Trainer 로그에는 'eval_entity_f1')
+OUTSIDE_ID, BEGIN_ID, INSIDE_ID = 0, 1, 2 # train.label_list = ['O', 'B-PII', 'I-PII']
+
+
+# --- 2. 개체 단위 F1 ---
+def entity_spans(tags, rows):
+    """
+    tags: 이어 붙인 태그 id 배열, rows: 같은 길이의 문장 번호 배열
+    반환: 개체 구간 {(시작 위치, 끝 위치)} (위치는 이어 붙인 배열 기준이라 문장끼리 겹치지 않음)
+    """
+    same_row = np.concatenate(([False], rows[1:] == rows[:-1]))
+    inside = tags != OUTSIDE_ID
+    starts = inside & ((tags == BEGIN_ID) | ~(np.concatenate(([False], inside[:-1])) & same_row))
+    continues = np.concatenate(((tags[1:] == INSIDE_ID) & same_row[1:], [False])) # 다음 토큰이 같은 개체
+    ends = inside & ~continues
+    return set(zip(np.flatnonzero(starts).tolist(), np.flatnonzero(ends).tolist()))
+
+def entity_scores(predictions, labels):
+    """predictions / labels: (문장 수, 길이) 태그 id 배열 (labels -100 위치는 제외). 반환: precision / recall / f1"""
+    predictions, labels = np.asarray(predictions), np.asarray(labels)
+    mask = labels != -100
+    rows = np.broadcast_to(np.arange(labels.shape[0])[:, None], labels.shape)[mask]
+    predicted = entity_spans(predictions[mask], rows)
+    gold = entity_spans(labels[mask], rows)
+    hits = len(predicted & gold)
+    precision = hits / len(predicted) if predicted else 0.0
+    recall = hits / len(gold) if gold else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'entity_precision': precision, 'entity_recall': recall, METRIC_NAME: f1}
+
+def compute_metrics(eval_prediction):
+    """(Trainer compute_metrics) predictions는 argmax_logits로 이미 태그 id"""
+    return entity_scores(eval_prediction.predictions, eval_prediction.label_ids)
+
+def argmax_logits(logits, labels):
+    """(Trainer preprocess_logits_for_metrics) 평가 중 logits 전체 대신 태그 id만 모읍니다. (메모리 절약)"""
+    if isinstance(logits, tuple):
+        logits = logits[0]
+    return logits.argmax(dim=-1)
+
+
+# --- 3. 마감 시각 ---
+class DeadlineCallback(TrainerCallback):
+    """deadline(time.time() 기준 시각, None이면 제한 없음)을 넘기기 전에 학습을 멈춥니다."""
+
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.step_started = None
+        self.step_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.eval_started = None
+        self.last_eval_step = -1
+        self.stopped_at_step = None
+
+    def on_step_begin(self, args, state, control, **kwargs):
+        self.step_started = time.time()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.time()
+        self.step_seconds = now - self.step_started
+        self.eval_started = now # (이 스텝 뒤에 평가가 이어지면 평가 시간 측정 시작점)
+        if self.deadline is None or now + self.step_seconds + self.eval_seconds < self.deadline:
+            return
+        control.should_training_stop = True
+        self.stopped_at_step = state.global_step
+        if args.eval_strategy != 'no' and self.last_eval_step != state.global_step:
+            control.should_evaluate = True
+        logger.info(f"⏰ 마감 시각이 다가와 {state.global_step}스텝에서 학습을 멈춥니다. "
+                    f"(스텝 {self.step_seconds:.1f}초, 평가+저장 {self.eval_seconds:.1f}초 기준)")
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        if self.eval_started is not None:
+            self.eval_seconds = time.time() - self.eval_started
+        self.last_eval_step = state.global_step
+
+    def on_save(self, args, state, control, **kwargs):
+        if self.eval_started is not None:
+            self.eval_seconds = time.time() - self.eval_started # (평가 + best 체크포인트 저장)
@@ -0,0 +1,190 @@
+# 🩺 (엔진) LLM 앞단 규칙 기반 분류(Triage) - 뻔한 항목은 로컬에서 바로 판정
+# ----------------------------------------------------
+# 'autolabeler.py'가 이 파일을 import하여 LLM에게 묻기 "전에" 확실한 항목을 걸러냅니다.
+# (기존: crawler가 보낸 의심 항목 "전부"를 유료 HyperCLOVA에 질의)
+# 1. 규칙에 확실히 걸리는 항목은 '유출'/'공개'와 사유 코드(reason code)를 바로 붙입니다.
+#    - CARD_LUHN_FAIL        : 카드번호 형식이지만 Luhn 검사 실패 -> '공개'
+#    - RRN_INVALID_DATE      : 주민번호 앞 6자리가 존재하지 않는 날짜 -> '공개'
+#    - RRN_CHECKSUM_FAIL     : 주민번호 검증 숫자 불일치 -> '공개' (RRN_CHECKSUM_RULE = True일 때만)
+#    - EMAIL_EXAMPLE_DOMAIN  : example.com 등 예약(샘플) 도메인 -> '공개'
+#    - EMAIL_ROLE_ACCOUNT    : support@, recruit@ 등 대표 계정 -> '공개'
+#    - PUBLIC_REPRESENTATIVE : 15xx/16xx 대표번호 -> '공개'
+#    - SAMPLE_NUMBER         : 010-0000-0000처럼 같은 숫자 반복 -> '공개'
+#    - LOOKALIKE_PREFIX      : PROD- / ORD- / v / Build # 뒤에 붙은 숫자 (상품/주문/버전 번호) -> '공개'
+#    - INTERNAL_IP           : 사설 IP(192.168.x.x, 10.x.x.x) -> '유출'
+# 2. 애매한 나머지만 LLM에게 보냅니다.
+# 3. PII 종류별 자동 판정 비율을 보고합니다.
+#
+# 미리 보기: python3 triage.py  (pending 행에 규칙만 적용해 종류별 자동 판정 비율 출력, 저장 안 함)
+# ----------------------------------------------------
+
+import datetime
+import re
+
+# (주의) 2020년 10월 이후 발급된 주민번호는 뒷자리가 임의 번호라 검증 숫자가 맞지 않습니다.
+#        진짜 유출을 '공개'로 닫을 수 있으므로 기본은 끄고(False), 날짜 검사만 적용합니다.
+RRN_CHECKSUM_RULE = False
+
+EXAMPLE_DOMAINS = ('example.com', 'example.net', 'example.org', 'example.co.kr', 'test.com', 'localhost')
+ROLE_ACCOUNTS = {'support', 'help', 'helpdesk', 'recruit', 'info', 'contact', 'admin', 'webmaster',
+                 'noreply', 'no-reply', 'cs', 'service', 'sales', 'press', 'privacy'}
+LOOKALIKE_PREFIXES = ('PROD-', 'ORD-', 'v', 'V', 'Build #', 'build #')
+PUBLIC_NUMBER_PATTERN = re.compile(r'^1[56]\d{2}[-.\s]*\d{4}$')
+RRN_WEIGHTS = (2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5)
+
+LABEL_LEAK, LABEL_PUBLIC = '유출', '공개'
+
+REASONS = {
+    'CARD_LUHN_FAIL': (LABEL_PUBLIC, "카드번호 형식이지만 Luhn 검사에 실패한 숫자 나열"),
+    'RRN_INVALID_DATE': (LABEL_PUBLIC, "주민번호 형식이지만 생년월일이 존재하지 않는 날짜"),
+    'RRN_CHECKSUM_FAIL': (LABEL_PUBLIC, "주민번호 형식이지만 검증 숫자가 맞지 않음"),
+    'EMAIL_EXAMPLE_DOMAIN': (LABEL_PUBLIC, "샘플/예약 도메인(example.com 등) 이메일"),
+    'EMAIL_ROLE_ACCOUNT': (LABEL_PUBLIC, "고객센터/채용 등 대표 계정 이메일"),
+    'PUBLIC_REPRESENTATIVE': (LABEL_PUBLIC, "15xx/16xx 대표 전화번호"),
+    'SAMPLE_NUMBER': (LABEL_PUBLIC, "같은 숫자를 반복한 샘플 번호"),
+    'LOOKALIKE_PREFIX': (LABEL_PUBLIC, "상품/주문/버전 번호의 일부 (PROD-/ORD-/v 접두어)"),
+    'INTERNAL_IP': (LABEL_LEAK, "사설(내부) IP 주소"),
+}
+
+
+# --- 1. 검사 함수 ---
+def digits_of(text):
+    return ''.join(ch for ch in str(text) if ch.isdigit())
+
+def luhn_valid(number):
+    digits = [int(d) for d in digits_of(number)]
+    if not digits:
+        return False
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        if index % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+def rrn_birth_date(rrn):
+    """주민번호 13자리의 생년월일 (성별 숫자로 세기 결정). 존재하지 않는 날짜면 None"""
+    digits = digits_of(rrn)
+    if len(digits) != 13:
+        return None
+    century = {'1': 1900, '2': 1900, '3': 2000, '4': 2000, '5': 1900, '6': 1900,
+               '7': 2000, '8': 2000, '9': 1800, '0': 1800}[digits[6]]
+    try:
+        return datetime.date(century + int(digits[:2]), int(digits[2:4]), int(digits[4:6]))
+    except ValueError:
+        return None
+
+def rrn_checksum_valid(rrn):
+    digits = [int(d) for d in digits_of(rrn)]
+    if len(digits) != 13:
+        return False
+    total = sum(d * w for d, w in zip(digits, RRN_WEIGHTS))
+    return (11 - total % 11) % 10 == digits[12]
+
+def has_lookalike_prefix(content, context):
+    """문맥에서 content 바로 앞에 PROD- / ORD- / v / Build # 접두어가 붙어 있는지"""
+    content, context = str(content), str(context)
+    start = context.find(content)
+    while start != -1:
+        if any(context[:start].endswith(prefix) for prefix in LOOKALIKE_PREFIXES):
+            return True
+        start = context.find(content, start + 1)
+    return False
+
+
+# --- 2. 분류 ---
+def triage_code(pii_type, content, context):
+    """규칙에 확실히 걸리면 사유 코드를, 애매하면 None을 반환합니다."""
+    pii_type = str(pii_type)
+    content = str(content).strip()
+
+    if has_lookalike_prefix(content, context):
+        return 'LOOKALIKE_PREFIX'
+
+    if pii_type == 'CREDIT_CARD' and not luhn_valid(content):
+        return 'CARD_LUHN_FAIL'
+
+    if pii_type == 'RRN':
+        if rrn_birth_date(content) is None:
+            return 'RRN_INVALID_DATE'
+        if RRN_CHECKSUM_RULE and not rrn_checksum_valid(content):
+            return 'RRN_CHECKSUM_FAIL'
+
+    if pii_type == 'EMAIL' and '@' in content:
+        local, domain = content.lower().rsplit('@', 1)
+        if domain in EXAMPLE_DOMAINS or domain.endswith(('.example', '.test', '.invalid')):
+            return 'EMAIL_EXAMPLE_DOMAIN'
+        if local in ROLE_ACCOUNTS:
+            return 'EMAIL_ROLE_ACCOUNT'
+
+    if pii_type == 'PHONE':
+        if PUBLIC_NUMBER_PATTERN.match(content):
+            return 'PUBLIC_REPRESENTATIVE'
+        digits = digits_of(content)
+        if len(digits) >= 8 and len(set(digits[3:])) == 1:
+            return 'SAMPLE_NUMBER'
+
+    if pii_type == 'INTERNAL_IP':
+        return 'INTERNAL_IP'
+
+    return None
+
+def triage_leak(pii_type, content, context):
+    """확실한 항목이면 {'label', 'reason', 'code'}를, 애매하면 None을 반환합니다."""
+    code = triage_code(pii_type, content, context)
+    if code is None:
+        return None
+    label, description = REASONS[code]
+    return {'label': label, 'reason': f"[triage:{code}] {description}", 'code': code}
+
+
+# --- 3. 보고 ---
+class TriageStats:
+    """PII 종류별 (전체, 자동 판정) 건수와 사유 코드별 건수"""
+
+    def __init__(self):
+        self.by_type = {}
+        self.by_code = {}
+
+    def add(self, pii_type, verdict):
+        total, resolved = self.by_type.get(pii_type, (0, 0))
+        self.by_type[pii_type] = (total + 1, resolved + (verdict is not None))
+        if verdict is not None:
+            self.by_code[verdict['code']] = self.by_code.get(verdict['code'], 0) + 1
+
+    def resolved(self):
+        return sum(resolved for _, resolved in self.by_type.values())
+
+    def total(self):
+        return sum(total for total, _ in self.by_type.values())
+
+    def report_lines(self):
+        lines = [f"🩺 [Triage] 자동 판정 {self.resolved()}/{self.total()}건 "
+                 f"({self.resolved() / max(self.total(), 1):.0%}) -> LLM 요청 대상 {self.total() - self.resolved()}건"]
+        for pii_type, (total, resolved) in sorted(self.by_type.items(), key=lambda item: -item[1][0]):
+            lines.append(f"    - {pii_type}: {resolved}/{total} ({resolved / total:.0%})")
+        if self.by_code:
+            lines.append("    - 사유 코드: " + ', '.join(f"{code} {count}" for code, count in
+                                                    sorted(self.by_code.items(), key=lambda item: -item[1])))
+        return lines
+
+
+def triage_rows(rows):
+    """rows(type, content, context 속성)를 분류합니다. 반환: (rows와 같은 순서의 판정 또는 None 목록, TriageStats)"""
+    stats = TriageStats()
+    verdicts = []
+    for row in rows:
+        verdict = triage_leak(row.type, row.content, row.context)
+        stats.add(row.type, verdict)
+        verdicts.append(verdict)
+    return verdicts, stats
+
+
+if __name__ == "__main__":
+    from leak_store import LeakStore, LEAK_STORE_FILE
+    with LeakStore(LEAK_STORE_FILE) as store:
+        pending = store.pending_leaks(columns=['type', 'content', 'context'])
+    _, preview = triage_rows(list(pending.itertuples(index=False)))
+    print('\n'.join(preview.report_lines()))
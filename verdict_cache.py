@@ -0,0 +1,166 @@
+# 🗃️ (엔진) LLM 판단(verdict) 캐시 - (정규화된 PII + 문맥 지문 + 프롬프트 버전) 키
+# ----------------------------------------------------
+# 'autolabeler.py'가 이 파일을 import하여 "이미 물어본 적 있는" 항목은 LLM을 다시 부르지 않습니다.
+# (기존: 같은 고객센터 이메일/대표번호/API 키가 페이지마다, 크롤링마다 반복되어도 매번 유료 API 호출)
+# 1. 키 = sha1(프롬프트 버전 | 정규화된 PII | 문맥 지문)
+#    - PII 정규화: 유니코드 NFKC + 소문자 + 공백/하이픈 제거 (010-1234-5678 == 01012345678)
+#    - 문맥 지문: PII 자리를 지우고 공백을 정리한 문맥의 해시 (같은 PII라도 문맥이 다르면 다시 판단)
+#    - 프롬프트 버전: BATCH_SYSTEM_PROMPT(SYSTEM_PROMPT + 배치 지시문)의 해시 -> 어느 쪽이 바뀌어도 이전 판단은 자동으로 무효화됩니다.
+# 2. TTL(기본 30일)이 지난 판단은 쓰지 않고, 항목 수가 한도를 넘으면 가장 오래 안 쓴 것부터 지웁니다. (LRU)
+# 3. '오류' 판단은 저장하지 않습니다. (다음 실행에서 다시 물어봄)
+# 4. 적중/실패(hit/miss) 횟수를 셉니다.
+#
+# 관리: python3 verdict_cache.py [--clear]  (항목 수 출력)
+# ----------------------------------------------------
+
+import hashlib
+import re
+import sqlite3
+import time
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- 1. 설정값 ---
+VERDICT_CACHE_TTL_DAYS = 30
+VERDICT_CACHE_MAX_ENTRIES = 200000
+UNCACHEABLE_LABELS = {'오류'}
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+PII_SEPARATOR_PATTERN = re.compile(r'[\s\-]+')
+
+
+def prompt_version(system_prompt):
+    return hashlib.sha1(system_prompt.encode('utf-8')).hexdigest()[:12]
+
+def normalize_pii(content):
+    content = unicodedata.normalize('NFKC', str(content)).lower()
+    return PII_SEPARATOR_PATTERN.sub('', content)
+
+def context_fingerprint(context, content):
+    """PII 자리를 지우고 공백/대소문자를 정리한 문맥의 해시"""
+    context = unicodedata.normalize('NFKC', str(context)).replace(str(content), ' ')
+    context = WHITESPACE_PATTERN.sub(' ', context).strip().lower()
+    return hashlib.sha1(context.encode('utf-8')).hexdigest()[:16]
+
+
+class VerdictCache:
+    """
+    LLM 판단 캐시 (SQLite 테이블 llm_verdicts).
+    - VerdictCache(path): 자체 연결을 엽니다. (pii_guardian.db 안에 테이블을 만들어도 됨)
+    - VerdictCache(conn=...): 다른 객체의 연결을 빌려 씁니다. (커밋/종료는 연결 주인이 담당)
+    """
+
+    def __init__(self, path=None, system_prompt='', conn=None,
+                 ttl_days=VERDICT_CACHE_TTL_DAYS, max_entries=VERDICT_CACHE_MAX_ENTRIES):
+        self._owns_conn = conn is None
+        self.conn = conn if conn is not None else sqlite3.connect(path, timeout=30)
+        if self._owns_conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_verdicts ("
+            " key TEXT PRIMARY KEY, prompt_version TEXT NOT NULL, label TEXT NOT NULL, reason TEXT,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL"
+            ")"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_verdicts_last_used ON llm_verdicts (last_used)")
+        self.prompt_version = prompt_version(system_prompt)
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidate_other_versions()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._owns_conn:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+            self.conn.close()
+        return False
+
+    def commit(self):
+        """(자체 연결일 때) 지금까지의 변경을 커밋합니다. 오래 걸리는 LLM 호출 전에 쓰기 잠금을 풀기 위함."""
+        if self._owns_conn:
+            self.conn.commit()
+
+    def make_key(self, content, context):
+        raw = f"{self.prompt_version}|{normalize_pii(content)}|{context_fingerprint(context, content)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """캐시된 {'label', 'reason'}을 반환합니다. (없거나 TTL이 지났으면 None)"""
+        now = time.time()
+        row = self.conn.execute("SELECT label, reason, created_at FROM llm_verdicts WHERE key = ?",
+                                (key,)).fetchone()
+        if row is None or now - row[2] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.conn.execute("UPDATE llm_verdicts SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return {'label': row[0], 'reason': row[1]}
+
+    def put(self, key, verdict):
+        """판단을 저장합니다. ('오류' 판단은 저장하지 않음)"""
+        label = verdict.get('label')
+        if not label or label in UNCACHEABLE_LABELS:
+            return False
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_verdicts (key, prompt_version, label, reason, created_at, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, self.prompt_version, label, verdict.get('reason'), now, now)
+        )
+        return True
+
+    def evict(self):
+        """TTL이 지난 항목을 지우고, 한도를 넘으면 가장 오래 안 쓴 항목부터 지웁니다. 지운 건수를 반환합니다."""
+        removed = self.conn.execute("DELETE FROM llm_verdicts WHERE created_at < ?",
+                                    (time.time() - self.ttl_seconds,)).rowcount
+        overflow = self.count() - self.max_entries
+        if overflow > 0:
+            removed += self.conn.execute(
+                "DELETE FROM llm_verdicts WHERE key IN"
+                " (SELECT key FROM llm_verdicts ORDER BY last_used LIMIT ?)", (overflow,)
+            ).rowcount
+        return removed
+
+    def invalidate_other_versions(self):
+        """현재 프롬프트 버전이 아닌 판단을 모두 지웁니다."""
+        removed = self.conn.execute("DELETE FROM llm_verdicts WHERE prompt_version != ?",
+                                    (self.prompt_version,)).rowcount
+        if removed:
+            logger.info(f"🧹 프롬프트 버전 변경({self.prompt_version}) -> 이전 LLM 판단 캐시 {removed}건을 지웠습니다.")
+        return removed
+
+    def clear(self):
+        self.conn.execute("DELETE FROM llm_verdicts")
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM llm_verdicts").fetchone()[0]
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+if __name__ == "__main__":
+    import argparse
+    from leak_store import LEAK_STORE_FILE
+    from llm_helper import BATCH_SYSTEM_PROMPT
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description="LLM 판단 캐시(llm_verdicts) 관리")
+    parser.add_argument('--clear', action='store_true', help="캐시를 모두 지웁니다.")
+    args = parser.parse_args()
+
+    with VerdictCache(LEAK_STORE_FILE, BATCH_SYSTEM_PROMPT) as cache: # (autolabeler와 같은 프롬프트 버전)
+        if args.clear:
+            cache.clear()
+        logger.info(f"🗃️ LLM 판단 캐시: {cache.count()}건 (프롬프트 버전 {cache.prompt_version})")